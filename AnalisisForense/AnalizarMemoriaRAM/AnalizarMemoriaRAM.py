@@ -1,5 +1,16 @@
 import os
+import re
+import sys
+import math
+import time
+import heapq
+import array
+import signal
+import struct
+import argparse
 import psutil
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
 from dotenv import load_dotenv
 from datetime import datetime
 
@@ -7,6 +18,49 @@ from datetime import datetime
 MB_DIVISOR = 1024 ** 2  # Divisor to convert bytes to MB
 GB_DIVISOR = 1024 ** 3  # Divisor to convert bytes to GB
 
+# Modo de muestreo continuo (series temporales para buscar fugas de memoria)
+MUESTREO_INTERVALO_MS = 1000  # Intervalo entre muestras
+MUESTREO_CAPACIDAD = 300  # Muestras que se conservan en memoria (buffer circular)
+MUESTREO_FILAS_POR_MUESTRA = 2048  # Filas de procesos reservadas por muestra en el buffer
+MUESTREO_VOLCADO_S = 10  # Cada cuántos segundos se añaden las muestras nuevas al archivo
+MUESTREO_MAGIC = b"MEM1"  # Inicio de cada bloque del archivo de muestras
+MUESTREO_CABECERA = struct.Struct("<4scII")  # Magic, orden de bytes, filas del sistema, filas de procesos
+
+# Columnas (nombre, tipo de array) de las muestras del sistema y de los procesos.
+# "muestra" es el número de muestra del sistema al que pertenece cada fila de proceso
+COLUMNAS_SISTEMA = (("tiempo", "d"), ("mem_total", "Q"), ("mem_disponible", "Q"),
+                    ("mem_usada", "Q"), ("swap_usada", "Q"))
+COLUMNAS_PROCESOS = (("muestra", "Q"), ("pid", "I"), ("creacion", "d"), ("rss", "Q"))
+
+# Lectura directa de /proc en Linux (sin crear objetos psutil.Process); si no
+# está disponible o se desactiva, todo se obtiene con psutil
+LECTOR_PROC_DIRECTO = True
+LECTOR_PROC_BUFFER = 16384  # Bytes del buffer reutilizable (/proc/<pid>/stat, statm, status y smaps_rollup caben de sobra)
+LECTOR_PROC_MAX_DESCRIPTORES = 8192  # /proc/<pid>/stat abiertos entre barridos (como mucho la mitad del límite del sistema)
+
+# Detección de fugas sobre muestras sucesivas
+FUGA_EWMA_ALFA = 0.2  # Peso de la muestra nueva en la media y la varianza exponenciales
+FUGA_MUESTRAS_MINIMAS = 10  # Muestras de un proceso antes de estimar su pendiente o avisar
+FUGA_UMBRAL_MB_MIN = 5.0  # Aviso si el RSS crece más de estos MB por minuto...
+FUGA_VENTANA_MINIMA_S = 30  # ...durante al menos estos segundos de observación...
+FUGA_CRECIMIENTO_MINIMO_MB = 5.0  # ...y el crecimiento estimado en ese tiempo supera estos MB
+FUGA_UMBRAL_ANOMALIA = 6.0  # Aviso si una muestra se separa de la media más de estas desviaciones
+FUGA_DESVIACION_MINIMA_MB = 1.0  # Desviación mínima, para que un proceso estable no dispare avisos por ruido
+FUGA_TOP = 10  # Procesos en el informe de mayor crecimiento
+
+# Uso de CPU: una única ventana de medida compartida por todos los procesos detallados
+CPU_VENTANA_S = 0.1
+
+# Modo profundo: desglose de los mapas de memoria de los procesos que más consumen
+PROFUNDO_TOP = 50  # Procesos analizados
+PROFUNDO_HILOS = 8  # Hilos que leen los mapas de memoria en paralelo
+PROFUNDO_MAX_ARCHIVOS = 50  # Archivos abiertos listados por proceso (5 en el informe normal)
+# Mapas de bibliotecas compartidas (Linux, Windows y macOS)
+PROFUNDO_PATRON_BIBLIOTECA = re.compile(r"\.(so(\.\d+)*|dll|dylib)$", re.IGNORECASE)
+# Categorías del desglose, en el orden del informe
+PROFUNDO_CATEGORIAS = (("heap", "HEAP"), ("pila", "PILA"), ("anonima", "ANÓNIMA"),
+                       ("archivos", "ARCHIVOS"), ("bibliotecas", "BIBLIOTECAS"), ("otros", "OTROS"))
+
 def fGuardarResultado(strNombreArchivo, strContenido):
    """
    Guarda los resultados del análisis en un archivo de texto.
@@ -37,16 +91,333 @@ def fGuardarResultado(strNombreArchivo, strContenido):
    print(f"INFO    - Resultado guardado en: {strRutaArchivoTxt}")
 
 
-def fObtenerMemoriaSistema():
+class LectorProc:
+   """
+   Lector directo de /proc para Linux. Cada archivo se lee con os.open y
+   os.readv sobre un único buffer reservado de antemano, y los procesos se
+   abren relativos a un descriptor de /proc, así que por proceso solo se
+   hacen las llamadas al sistema imprescindibles y no se crean objetos
+   psutil.Process. La fecha de creación se calcula igual que psutil, por lo
+   que las claves (pid, creación) coinciden con las de la ruta de psutil.
+   
+   En los barridos sin nombres (los del muestreador), /proc/<pid>/stat se
+   lee solo la primera vez que aparece un proceso, para su fecha de
+   creación, y después basta con releer /proc/<pid>/statm con os.preadv
+   sobre un descriptor que queda abierto entre barridos. Un descriptor de un
+   proceso terminado falla con ESRCH aunque el PID se reutilice, así que la
+   fecha de creación guardada siempre corresponde al proceso que se lee.
+   
+   El buffer es compartido: cada hilo debe usar su propio LectorProc.
+   """
+
+   def __init__(self):
+      # Hora de arranque del sistema (btime de /proc/stat), base de la fecha de
+      # creación. /proc/stat crece con el número de CPUs y puede no caber en el
+      # buffer, así que se lee entero una sola vez; sin btime no hay claves
+      # compatibles con psutil y el lector no se usa
+      with open("/proc/stat", "rb") as objArchivo:
+         bytStat = objArchivo.read()
+      iPos = bytStat.find(b"\nbtime ")
+      if iPos < 0:
+         raise OSError("btime no encontrado en /proc/stat")
+      self.fArranque = float(bytStat[iPos + 7:bytStat.find(b"\n", iPos + 1)])
+      self.objBuffer = bytearray(LECTOR_PROC_BUFFER)
+      self.lstBuffers = [self.objBuffer]
+      self.iFdProc = os.open("/proc", os.O_RDONLY | os.O_DIRECTORY)
+      # Por PID (bytes): (descriptor abierto de /proc/<pid>/statm, fecha de creación)
+      self.dictAbiertos = {}
+      try:
+         import resource
+         self.iMaxDescriptores = min(LECTOR_PROC_MAX_DESCRIPTORES,
+                                     resource.getrlimit(resource.RLIMIT_NOFILE)[0] // 2)
+      except (ImportError, ValueError, OSError):
+         self.iMaxDescriptores = 0
+      self.iTamPagina = os.sysconf("SC_PAGE_SIZE")
+      self.fTicks = float(os.sysconf("SC_CLK_TCK"))
+
+   @staticmethod
+   def fDisponible():
+      """
+      Returns:
+         bool: True si se puede leer /proc directamente en este sistema
+      """
+      return LECTOR_PROC_DIRECTO and sys.platform.startswith("linux") and hasattr(os, "preadv") \
+         and os.path.exists("/proc/self/stat")
+
+   def fCerrar(self):
+      """Cierra los descriptores de /proc y de los procesos."""
+      for iFd, _ in self.dictAbiertos.values():
+         os.close(iFd)
+      self.dictAbiertos.clear()
+      if self.iFdProc is not None:
+         os.close(self.iFdProc)
+         self.iFdProc = None
+
+   def fLeer(self, bytRuta):
+      """
+      Lee un archivo de /proc en el buffer compartido. Los archivos de
+      /proc/<pid> usados aquí se generan completos en una sola lectura.
+      
+      Args:
+         bytRuta (bytes): Ruta relativa a /proc (p. ej. b"1234/stat")
+      
+      Returns:
+         int: Bytes leídos en self.objBuffer
+      """
+      iFd = os.open(bytRuta, os.O_RDONLY, dir_fd=self.iFdProc)
+      try:
+         return os.readv(iFd, self.lstBuffers)
+      finally:
+         os.close(iFd)
+
+   def fPids(self):
+      """
+      Returns:
+         list: Nombres (bytes) de los directorios de procesos de /proc
+      """
+      return [bytNombre for bytNombre in os.listdir(b"/proc") if bytNombre.isdigit()]
+
+   def fLeerStat(self, bytPid, bNombre=True):
+      """
+      Lee /proc/<pid>/stat: nombre, fecha de creación y memoria en una sola lectura.
+      
+      Args:
+         bytPid (bytes): PID como bytes
+         bNombre (bool): Decodificar el nombre del proceso
+      
+      Returns:
+         tuple: (nombre o None, fecha de creación, RSS en bytes, VMS en bytes)
+      """
+      iBytes = self.fLeer(bytPid + b"/stat")
+      # El nombre va entre paréntesis y puede contener espacios y paréntesis
+      iFinNombre = self.objBuffer.rfind(b")", 0, iBytes)
+      strNombre = None
+      if bNombre:
+         strNombre = self.objBuffer[self.objBuffer.find(b"(", 0, iBytes) + 1:iFinNombre].decode("utf-8", "replace")
+      # Campos tras el nombre, separados por un espacio: 0 = estado, 19 = starttime,
+      # 20 = vsize, 21 = rss (en páginas)
+      lstCampos = self.objBuffer[iFinNombre + 2:iBytes].split(b" ", 22)
+      return (strNombre,
+              self.fArranque + int(lstCampos[19]) / self.fTicks,
+              int(lstCampos[21]) * self.iTamPagina,
+              int(lstCampos[20]))
+
+   def fLeerRssAbierto(self, bytPid):
+      """
+      RSS de un proceso releyendo su /proc/<pid>/statm ya abierto (lo abre y
+      guarda su fecha de creación la primera vez).
+      
+      Args:
+         bytPid (bytes): PID como bytes
+      
+      Returns:
+         tuple: (fecha de creación, RSS en bytes)
+      """
+      tplAbierto = self.dictAbiertos.get(bytPid)
+      if tplAbierto is not None:
+         try:
+            iBytes = os.preadv(tplAbierto[0], self.lstBuffers, 0)
+         except OSError:
+            # El proceso terminó (y el PID puede ser ya de otro): se abre de nuevo
+            os.close(self.dictAbiertos.pop(bytPid)[0])
+            return self.fLeerRssAbierto(bytPid)
+         # statm: tamaño, residente, compartida... (en páginas)
+         iInicio = self.objBuffer.find(b" ", 0, iBytes) + 1
+         return tplAbierto[1], int(self.objBuffer[iInicio:self.objBuffer.find(b" ", iInicio, iBytes)]) * self.iTamPagina
+
+      # statm se abre antes de leer stat: si el proceso termina entre medias,
+      # la siguiente lectura del descriptor falla y se descarta
+      iFd = None
+      if len(self.dictAbiertos) < self.iMaxDescriptores:
+         iFd = os.open(bytPid + b"/statm", os.O_RDONLY, dir_fd=self.iFdProc)
+      try:
+         _, fCreacion, iRss, _ = self.fLeerStat(bytPid, False)
+      except (OSError, IndexError, ValueError):
+         if iFd is not None:
+            os.close(iFd)
+         raise
+      if iFd is not None:
+         self.dictAbiertos[bytPid] = (iFd, fCreacion)
+      return fCreacion, iRss
+
+   def fLeerStatm(self, iPid):
+      """
+      Lee /proc/<pid>/statm.
+      
+      Args:
+         iPid (int): ID del proceso
+      
+      Returns:
+         tuple: (RSS, VMS, memoria compartida) en bytes
+      """
+      iBytes = self.fLeer(b"%d/statm" % iPid)
+      lstCampos = self.objBuffer[:iBytes].split(None, 3)
+      return (int(lstCampos[1]) * self.iTamPagina, int(lstCampos[0]) * self.iTamPagina,
+              int(lstCampos[2]) * self.iTamPagina)
+
+   def fLeerCamposKb(self, iPid, strArchivo):
+      """
+      Lee un archivo de /proc/<pid> con líneas "Clave: valor kB" (status, smaps_rollup).
+      
+      Args:
+         iPid (int): ID del proceso
+         strArchivo (str): Nombre del archivo dentro de /proc/<pid>
+      
+      Returns:
+         dict: Clave -> bytes, solo de las líneas con valor en kB
+      """
+      iBytes = self.fLeer(b"%d/%s" % (iPid, strArchivo.encode()))
+      dictCampos = {}
+      for bytLinea in self.objBuffer[:iBytes].split(b"\n"):
+         if bytLinea.endswith(b" kB"):
+            bytClave, _, bytValor = bytLinea.partition(b":")
+            dictCampos[bytClave.decode()] = int(bytValor[:-3]) * 1024
+      return dictCampos
+
+   def fBarrido(self, bNombres=True):
+      """
+      Recorre todos los procesos. Con nombres se lee /proc/<pid>/stat de cada
+      uno; sin ellos, /proc/<pid>/statm sobre descriptores abiertos.
+      
+      Args:
+         bNombres (bool): Incluir los nombres de los procesos
+      
+      Returns:
+         tuple: (lista de PIDs, lista de nombres, lista de fechas de creación, lista de RSS en bytes)
+      """
+      lstPid = []
+      lstNombre = []
+      lstCreacion = []
+      lstRss = []
+      lstPids = self.fPids()
+      # Cerrar los descriptores de los procesos que ya no existen
+      if self.dictAbiertos and not bNombres:
+         for bytPid in self.dictAbiertos.keys() - set(lstPids):
+            os.close(self.dictAbiertos.pop(bytPid)[0])
+      for bytPid in lstPids:
+         try:
+            if bNombres:
+               strNombre, fCreacion, iRss, _ = self.fLeerStat(bytPid)
+            else:
+               strNombre = None
+               fCreacion, iRss = self.fLeerRssAbierto(bytPid)
+         except (OSError, IndexError, ValueError):
+            # Proceso terminado durante el barrido
+            continue
+         lstPid.append(int(bytPid))
+         lstNombre.append(strNombre)
+         lstCreacion.append(fCreacion)
+         lstRss.append(iRss)
+      return lstPid, lstNombre, lstCreacion, lstRss
+
+
+def fObtenerLectorProc():
+   """
+   Lector directo de /proc compartido por el hilo principal (se crea la
+   primera vez que se pide).
+   
+   Returns:
+      LectorProc: Lector directo de /proc, o None si hay que usar psutil
+   """
+   global objLectorCompartido
+   if not LectorProc.fDisponible():
+      return None
+   if objLectorCompartido is None:
+      try:
+         objLectorCompartido = LectorProc()
+      except OSError:
+         return None
+   return objLectorCompartido
+
+
+# Lector de /proc del hilo principal (ver fObtenerLectorProc)
+objLectorCompartido = None
+
+
+class InstantaneaProcesos:
+   """
+   Estado de la memoria y de los procesos tomado en un único recorrido,
+   compartido por todas las secciones del informe para que sean coherentes
+   entre sí y no vuelvan a enumerar los procesos.
+   """
+
+   # Atributos mínimos que necesitan las secciones del informe; process_iter
+   # los lee dentro de oneshot(), así que /proc/<pid>/stat se lee una sola vez
+   ATRIBUTOS = ['pid', 'name', 'memory_info', 'create_time']
+
+   def __init__(self, objLector=None):
+      """
+      Args:
+         objLector (LectorProc): Lector directo de /proc (None = el compartido si
+            LECTOR_PROC_DIRECTO está activo y el sistema lo permite, si no psutil)
+      """
+      if objLector is None:
+         objLector = fObtenerLectorProc()
+      # Memoria del sistema y swap en el mismo instante que los procesos
+      self.objMem = psutil.virtual_memory()
+      self.objSwap = psutil.swap_memory()
+      self.fMarcaTiempo = time.time()
+      # Objetos Process por PID, para los detalles sin volver a abrir cada proceso
+      # (vacío con el lector de /proc: los detalles se leen entonces con el propio lector)
+      self.dictProcesos = {}
+      self.objLector = objLector
+      lstProcesos = []
+
+      if objLector is not None:
+         lstProcesos = [(iPid, strNombre, iRss / MB_DIVISOR, fCreacion)
+                        for iPid, strNombre, fCreacion, iRss in zip(*objLector.fBarrido())]
+      else:
+         for objProc in psutil.process_iter(self.ATRIBUTOS):
+            dictInfo = objProc.info
+            # Los procesos terminados o sin permisos devuelven None en los atributos
+            if dictInfo['memory_info'] is None:
+               continue
+            lstProcesos.append((dictInfo['pid'], dictInfo['name'] or "", dictInfo['memory_info'].rss / MB_DIVISOR,
+                                dictInfo['create_time']))
+            self.dictProcesos[dictInfo['pid']] = objProc
+
+      # Procesos como (pid, nombre, memoria en MB, tiempo de creación), de mayor a menor memoria
+      self.lstProcesos = sorted(lstProcesos, key=lambda x: x[2], reverse=True)
+
+   def fProcesosSobreUmbral(self, fUmbralMemoria=0):
+      """
+      Args:
+         fUmbralMemoria (float): Umbral mínimo de memoria en MB
+      
+      Returns:
+         list: Tuplas (pid, nombre, memoria en MB) ordenadas de mayor a menor memoria
+      """
+      return [(iPid, strNombre, fMemoriaMB) for iPid, strNombre, fMemoriaMB, _ in self.lstProcesos
+              if fMemoriaMB > fUmbralMemoria]
+
+   def fProceso(self, iPid):
+      """
+      Args:
+         iPid (int): ID del proceso
+      
+      Returns:
+         psutil.Process: Objeto del proceso (de la instantánea si está en ella)
+      """
+      objProc = self.dictProcesos.get(iPid)
+      return objProc if objProc is not None else psutil.Process(iPid)
+
+
+def fObtenerMemoriaSistema(objInstantanea=None):
    """
    Obtiene información detallada sobre el uso de memoria del sistema y memoria swap.
    
+   Args:
+      objInstantanea (InstantaneaProcesos): Instantánea compartida (None = leer la memoria ahora)
+   
    Returns:
       str: Cadena con la información formateada sobre el uso de memoria
    """
    # Obtener objetos con información de memoria
-   objMem = psutil.virtual_memory()
-   objSwap = psutil.swap_memory()
+   if objInstantanea is not None:
+      objMem, objSwap = objInstantanea.objMem, objInstantanea.objSwap
+   else:
+      objMem = psutil.virtual_memory()
+      objSwap = psutil.swap_memory()
 
    # Construir el informe de memoria
    strContenido = "===== INFORMACIÓN DE MEMORIA DEL SISTEMA =====\n"
@@ -64,35 +435,22 @@ def fObtenerMemoriaSistema():
    return strContenido
 
 
-def fListarProcesos(fUmbralMemoria=0):
+def fListarProcesos(fUmbralMemoria=0, objInstantanea=None):
    """
    Lista todos los procesos activos y su uso de memoria, filtrando por un umbral mínimo.
    
    Args:
       fUmbralMemoria (float): Umbral mínimo de memoria en MB para incluir un proceso
+      objInstantanea (InstantaneaProcesos): Instantánea compartida (None = enumerar los procesos ahora)
    
    Returns:
       tuple: (lista de procesos ordenados, cadena con la información formateada)
    """
-   # Lista para almacenar la información de los procesos
-   lstProcesos = []
-   
-   # Iterar sobre todos los procesos del sistema
-   for objProc in psutil.process_iter(['pid', 'name', 'memory_info']):
-      try:
-         # Calcular la memoria en MB
-         fMemoriaMB = objProc.info['memory_info'].rss / MB_DIVISOR
-         
-         # Aplicar filtro por umbral de memoria
-         if fMemoriaMB > fUmbralMemoria:
-               iTuple = (objProc.info['pid'], objProc.info['name'], fMemoriaMB)
-               lstProcesos.append(iTuple)
-      except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-         # Ignorar procesos que ya no existen o a los que no se puede acceder
-         pass
+   if objInstantanea is None:
+      objInstantanea = InstantaneaProcesos()
 
-   # Ordenar los procesos por memoria utilizada (de mayor a menor)
-   lstProcesosOrdenados = sorted(lstProcesos, key=lambda x: x[2], reverse=True)
+   # Procesos sobre el umbral, ya ordenados por memoria utilizada (de mayor a menor)
+   lstProcesosOrdenados = objInstantanea.fProcesosSobreUmbral(fUmbralMemoria)
 
    # Construir el informe de procesos
    strContenido = "\n===== PROCESOS ACTIVOS POR USO DE MEMORIA =====\n"
@@ -109,33 +467,49 @@ def fListarProcesos(fUmbralMemoria=0):
    return lstProcesosOrdenados, strContenido
 
 
-def fUsoMemoriaProceso(iPid):
+def fUsoMemoriaProceso(iPid, objInstantanea=None, dictCpu=None, iMaxArchivos=5):
    """
    Obtiene información detallada sobre la memoria utilizada por un proceso específico.
    
    Args:
       iPid (int): ID del proceso a analizar
+      objInstantanea (InstantaneaProcesos): Instantánea compartida (None = abrir el proceso ahora)
+      dictCpu (dict): Uso de CPU ya medido por PID (ver fCerrarVentanaCpu); sin él se mide
+         durante CPU_VENTANA_S solo para este proceso
+      iMaxArchivos (int): Archivos abiertos que se listan
    
    Returns:
       str: Cadena con la información formateada sobre el uso de memoria del proceso
    """
    try:
-      # Obtener el objeto del proceso
-      objProc = psutil.Process(iPid)
-      
-      # Obtener información de memoria
-      objMemoryInfo = objProc.memory_info()
+      # Obtener el objeto del proceso (reutilizando el de la instantánea si existe)
+      objProc = objInstantanea.fProceso(iPid) if objInstantanea is not None else psutil.Process(iPid)
+      objLector = objInstantanea.objLector if objInstantanea is not None else None
       
-      # Obtener nombre e información adicional del proceso
-      strNombreProc = objProc.name()
+      # Los procesos de la instantánea ya traen memoria, nombre y creación del mismo instante
+      dictInfo = getattr(objProc, 'info', None) or {}
       
-      # Intentar obtener el usuario (puede fallar en algunos casos)
-      try:
-         strUsuario = objProc.username()
-      except:
-         strUsuario = "N/A"
+      # Leer el resto de atributos básicos de una vez
+      with objProc.oneshot():
+         # Obtener información de memoria
+         objMemoryInfo = dictInfo.get('memory_info')
+         if objMemoryInfo is None and objLector is not None:
+            iRss, iVms, iCompartida = objLector.fLeerStatm(iPid)
+            objMemoryInfo = SimpleNamespace(rss=iRss, vms=iVms, shared=iCompartida)
+         elif objMemoryInfo is None:
+            objMemoryInfo = objProc.memory_info()
          
-      strTiempoCreacion = datetime.fromtimestamp(objProc.create_time()).strftime('%Y-%m-%d %H:%M:%S')
+         # Obtener nombre e información adicional del proceso
+         strNombreProc = dictInfo.get('name') or objProc.name()
+         
+         # Intentar obtener el usuario (puede fallar en algunos casos)
+         try:
+            strUsuario = objProc.username()
+         except:
+            strUsuario = "N/A"
+            
+         fCreacion = dictInfo.get('create_time') or objProc.create_time()
+         strTiempoCreacion = datetime.fromtimestamp(fCreacion).strftime('%Y-%m-%d %H:%M:%S')
       
       # Construir el informe detallado
       strContenido = f"\n===== DETALLES DE MEMORIA DEL PROCESO (PID: {iPid}) =====\n"
@@ -157,9 +531,29 @@ def fUsoMemoriaProceso(iPid):
       if hasattr(objMemoryInfo, 'private'):
          strContenido += f"Memoria privada: {objMemoryInfo.private / MB_DIVISOR:.2f} MB\n"
       
+      # Con el lector de /proc: pico de memoria, swap y memoria proporcional/privada (PSS/USS)
+      if objLector is not None:
+         try:
+            dictEstado = objLector.fLeerCamposKb(iPid, "status")
+            if "VmHWM" in dictEstado:
+               strContenido += f"Pico de memoria física (VmHWM): {dictEstado['VmHWM'] / MB_DIVISOR:.2f} MB\n"
+            if "VmSwap" in dictEstado:
+               strContenido += f"Memoria en swap: {dictEstado['VmSwap'] / MB_DIVISOR:.2f} MB\n"
+            dictRollup = objLector.fLeerCamposKb(iPid, "smaps_rollup")
+            if "Pss" in dictRollup:
+               iUss = dictRollup.get("Private_Clean", 0) + dictRollup.get("Private_Dirty", 0)
+               strContenido += f"Memoria proporcional (PSS): {dictRollup['Pss'] / MB_DIVISOR:.2f} MB\n"
+               strContenido += f"Memoria exclusiva (USS): {iUss / MB_DIVISOR:.2f} MB\n"
+         except OSError:
+            # smaps_rollup requiere permisos sobre el proceso (o un kernel >= 4.14)
+            pass
+      
       # Obtener información adicional si está disponible
       try:
-         fPercentCPU = objProc.cpu_percent(interval=0.1)
+         if dictCpu is not None:
+            fPercentCPU = dictCpu[iPid]
+         else:
+            fPercentCPU = objProc.cpu_percent(interval=CPU_VENTANA_S)
          strContenido += f"Uso de CPU: {fPercentCPU:.1f}%\n"
       except:
          pass
@@ -169,11 +563,11 @@ def fUsoMemoriaProceso(iPid):
          lstArchivos = objProc.open_files()
          if lstArchivos:
                strContenido += f"\nArchivos abiertos ({len(lstArchivos)}):\n"
-               # Mostrar solo los primeros 5 archivos para no sobrecargar el informe
-               for i, archivo in enumerate(lstArchivos[:5]):
+               # Mostrar solo los primeros archivos para no sobrecargar el informe
+               for i, archivo in enumerate(lstArchivos[:iMaxArchivos]):
                   strContenido += f"  {i+1}. {archivo.path}\n"
-               if len(lstArchivos) > 5:
-                  strContenido += f"  ... y {len(lstArchivos) - 5} más\n"
+               if len(lstArchivos) > iMaxArchivos:
+                  strContenido += f"  ... y {len(lstArchivos) - iMaxArchivos} más\n"
       except:
          pass
          
@@ -182,18 +576,22 @@ def fUsoMemoriaProceso(iPid):
       return f"[!] Error: No se pudo obtener información del proceso con PID {iPid}.\n"
 
 
-def fObtenerTopProcesos(iNumProcesos=5):
+def fObtenerTopProcesos(iNumProcesos=5, objInstantanea=None):
    """
    Obtiene información detallada sobre los N procesos que más memoria utilizan.
    
    Args:
       iNumProcesos (int): Número de procesos a analizar
+      objInstantanea (InstantaneaProcesos): Instantánea compartida (None = enumerar los procesos ahora)
    
    Returns:
       str: Cadena con la información formateada de los procesos que más memoria consumen
    """
+   if objInstantanea is None:
+      objInstantanea = InstantaneaProcesos()
+
    # Obtener todos los procesos ordenados por uso de memoria
-   lstProcesosOrdenados, _ = fListarProcesos(fUmbralMemoria=0)
+   lstProcesosOrdenados = objInstantanea.fProcesosSobreUmbral(0)
    
    # Validar que haya suficientes procesos
    iNumProcesosReal = min(iNumProcesos, len(lstProcesosOrdenados))
@@ -204,27 +602,37 @@ def fObtenerTopProcesos(iNumProcesos=5):
    # Construir el informe detallado
    strContenido = f"\n===== TOP {iNumProcesosReal} PROCESOS POR CONSUMO DE MEMORIA =====\n\n"
    
+   # Medir el uso de CPU de todos en una única ventana en lugar de una por proceso
+   lstObjProc = fProcesosParaDetalle([iPid for iPid, _, _ in lstTopProcesos], objInstantanea)
+   dictCpu = fCerrarVentanaCpu(lstObjProc, fIniciarVentanaCpu(lstObjProc))
+   
    # Analizar cada uno de los procesos top
    for i, (iPid, strName, _) in enumerate(lstTopProcesos, 1):
       strContenido += f"--- Proceso #{i} ---"
-      strContenido += fUsoMemoriaProceso(iPid)
+      strContenido += fUsoMemoriaProceso(iPid, objInstantanea, dictCpu)
       strContenido += "\n"
    
    return strContenido
 
 
-def fCapturarPantallaMemoria():
+def fCapturarPantallaMemoria(objInstantanea=None):
    """
    Genera un informe resumido con la información clave de memoria del sistema.
    
+   Args:
+      objInstantanea (InstantaneaProcesos): Instantánea compartida (None = enumerar los procesos ahora)
+   
    Returns:
       str: Cadena con el resumen de memoria
    """
+   if objInstantanea is None:
+      objInstantanea = InstantaneaProcesos()
+
    # Obtener información de memoria
-   objMem = psutil.virtual_memory()
+   objMem = objInstantanea.objMem
    
    # Obtener todos los procesos ordenados por uso de memoria
-   lstProcesosOrdenados, _ = fListarProcesos(fUmbralMemoria=100)  # Filtrar por más de 100MB
+   lstProcesosOrdenados = objInstantanea.fProcesosSobreUmbral(100)  # Filtrar por más de 100MB
    
    # Tomar los 10 procesos principales
    lstTopProcesos = lstProcesosOrdenados[:10]
@@ -245,25 +653,706 @@ def fCapturarPantallaMemoria():
    return strContenido
 
 
-def main():
+def fProcesosParaDetalle(lstPids, objInstantanea):
+   """
+   Args:
+      lstPids (list): PIDs de los procesos
+      objInstantanea (InstantaneaProcesos): Instantánea de la que reutilizar los objetos Process
+   
+   Returns:
+      list: Objetos psutil.Process de los procesos que siguen existiendo
+   """
+   lstObjProc = []
+   for iPid in lstPids:
+      try:
+         lstObjProc.append(objInstantanea.fProceso(iPid))
+      except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+         continue
+   return lstObjProc
+
+
+def fIniciarVentanaCpu(lstObjProc):
+   """
+   Abre una ventana de medida de CPU común a varios procesos: cpu_percent
+   sin intervalo devuelve el uso desde la llamada anterior, así que basta con
+   una llamada al inicio y otra al final para todos ellos.
+   
+   Args:
+      lstObjProc (list): Objetos psutil.Process
+   
+   Returns:
+      float: Inicio de la ventana (reloj monótono)
+   """
+   for objProc in lstObjProc:
+      try:
+         objProc.cpu_percent(interval=None)
+      except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+         pass
+   return time.monotonic()
+
+
+def fCerrarVentanaCpu(lstObjProc, fInicio, fVentana=CPU_VENTANA_S):
+   """
+   Cierra la ventana abierta con fIniciarVentanaCpu, esperando solo lo que
+   falte para que dure fVentana segundos.
+   
+   Args:
+      lstObjProc (list): Los mismos objetos psutil.Process
+      fInicio (float): Inicio de la ventana
+      fVentana (float): Duración mínima de la ventana en segundos
+   
+   Returns:
+      dict: PID -> porcentaje de CPU (sin los procesos que terminaron o no son accesibles)
+   """
+   time.sleep(max(0.0, fInicio + fVentana - time.monotonic()))
+   dictCpu = {}
+   for objProc in lstObjProc:
+      try:
+         dictCpu[objProc.pid] = objProc.cpu_percent(interval=None)
+      except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+         pass
+   return dictCpu
+
+
+def fDesgloseMemoriaProceso(objProc):
+   """
+   Desglosa la memoria de un proceso a partir de sus mapas de memoria
+   (smaps en Linux): RSS por heap, pila, memoria anónima, archivos mapeados,
+   bibliotecas compartidas y otros mapas del kernel, más USS, PSS y swap.
+   
+   Args:
+      objProc (psutil.Process): Proceso a analizar
+   
+   Returns:
+      dict: Bytes por categoría y totales ("rss", "uss", "pss", "swap", "mapas"),
+         o {"error": motivo} si no se pudieron leer los mapas
+   """
+   dictDesglose = {strClave: 0 for strClave, _ in PROFUNDO_CATEGORIAS}
+   dictDesglose.update({"rss": 0, "uss": 0, "pss": 0, "swap": 0, "mapas": 0})
+   try:
+      lstMapas = objProc.memory_maps(grouped=False)
+   except psutil.AccessDenied:
+      return {"error": "acceso denegado"}
+   except (psutil.NoSuchProcess, psutil.ZombieProcess):
+      return {"error": "el proceso ya no existe"}
+   except (NotImplementedError, AttributeError):
+      return {"error": "no soportado en este sistema"}
+
+   for objMapa in lstMapas:
+      strRuta = objMapa.path
+      if strRuta.endswith(" (deleted)"):
+         strRuta = strRuta[:-10]
+      if strRuta == "[heap]":
+         strCategoria = "heap"
+      elif strRuta.startswith("[stack"):
+         strCategoria = "pila"
+      elif not strRuta or strRuta.startswith("[anon"):
+         strCategoria = "anonima"
+      elif strRuta.startswith("["):
+         # [vdso], [vvar], [vsyscall]...
+         strCategoria = "otros"
+      elif PROFUNDO_PATRON_BIBLIOTECA.search(strRuta):
+         strCategoria = "bibliotecas"
+      else:
+         strCategoria = "archivos"
+      dictDesglose[strCategoria] += objMapa.rss
+      dictDesglose["rss"] += objMapa.rss
+      # Campos que solo existen en algunos sistemas (todos en Linux)
+      dictDesglose["uss"] += getattr(objMapa, "private_clean", 0) + getattr(objMapa, "private_dirty", 0)
+      dictDesglose["pss"] += getattr(objMapa, "pss", 0)
+      dictDesglose["swap"] += getattr(objMapa, "swap", 0)
+      dictDesglose["mapas"] += 1
+   return dictDesglose
+
+
+def fAnalisisProfundo(iNumProcesos=PROFUNDO_TOP, objInstantanea=None, bDetalles=True):
+   """
+   Modo profundo para el triaje forense: desglose de los mapas de memoria
+   de los N procesos que más memoria usan. Los mapas se leen en paralelo
+   (PROFUNDO_HILOS hilos) dentro de una única ventana de medida de CPU, así
+   que el tiempo total es del orden de CPU_VENTANA_S y no de CPU_VENTANA_S
+   por proceso.
+   
+   Args:
+      iNumProcesos (int): Número de procesos a analizar
+      objInstantanea (InstantaneaProcesos): Instantánea compartida (None = enumerar los procesos ahora)
+      bDetalles (bool): Añadir los detalles de cada proceso (usuario, archivos abiertos...)
+   
+   Returns:
+      str: Cadena con el desglose formateado
+   """
+   if objInstantanea is None:
+      objInstantanea = InstantaneaProcesos()
+
+   lstTopProcesos = objInstantanea.fProcesosSobreUmbral(0)[:iNumProcesos]
+   lstObjProc = fProcesosParaDetalle([iPid for iPid, _, _ in lstTopProcesos], objInstantanea)
+
+   # Los mapas se leen mientras transcurre la ventana de CPU
+   fInicio = fIniciarVentanaCpu(lstObjProc)
+   with ThreadPoolExecutor(max_workers=PROFUNDO_HILOS) as objPool:
+      dictDesgloses = dict(zip([objProc.pid for objProc in lstObjProc],
+                               objPool.map(fDesgloseMemoriaProceso, lstObjProc)))
+   dictCpu = fCerrarVentanaCpu(lstObjProc, fInicio)
+   fDuracion = time.monotonic() - fInicio
+
+   strContenido = f"\n===== ANÁLISIS PROFUNDO DE MEMORIA (TOP {len(lstTopProcesos)} PROCESOS) =====\n"
+   strContenido += f"(Valores en MB; recogido en {fDuracion * 1000:.0f} ms)\n\n"
+   strCabecera = f"{'PID':<8} {'NOMBRE':<20} {'RSS':>9} {'USS':>9} {'PSS':>9} "
+   strCabecera += " ".join(f"{strTitulo:>11}" for _, strTitulo in PROFUNDO_CATEGORIAS)
+   strCabecera += f" {'SWAP':>8} {'CPU %':>6}\n"
+   strContenido += strCabecera + "-" * (len(strCabecera) - 1) + "\n"
+
+   for iPid, strNombre, _ in lstTopProcesos:
+      dictDesglose = dictDesgloses.get(iPid, {"error": "el proceso ya no existe"})
+      strCpu = f"{dictCpu[iPid]:>6.1f}" if iPid in dictCpu else f"{'-':>6}"
+      if "error" in dictDesglose:
+         strContenido += f"{iPid:<8} {strNombre[:20]:<20} [!] {dictDesglose['error']}\n"
+         continue
+      strContenido += f"{iPid:<8} {strNombre[:20]:<20} "
+      strContenido += " ".join(f"{dictDesglose[strClave] / MB_DIVISOR:>9.2f}" for strClave in ("rss", "uss", "pss"))
+      strContenido += " " + " ".join(f"{dictDesglose[strClave] / MB_DIVISOR:>11.2f}" for strClave, _ in PROFUNDO_CATEGORIAS)
+      strContenido += f" {dictDesglose['swap'] / MB_DIVISOR:>8.2f} {strCpu}\n"
+
+   if bDetalles:
+      for i, (iPid, _, _) in enumerate(lstTopProcesos, 1):
+         strContenido += f"\n--- Proceso #{i} ---"
+         strContenido += fUsoMemoriaProceso(iPid, objInstantanea, dictCpu, PROFUNDO_MAX_ARCHIVOS)
+   return strContenido
+
+
+class BufferCircular:
+   """
+   Buffer circular de tamaño fijo organizado por columnas: un array.array
+   reservado de antemano por columna, sin un objeto por fila. Cuando se
+   llena, las filas nuevas sobrescriben las más antiguas.
+   """
+
+   def __init__(self, tplColumnas, iCapacidad):
+      """
+      Args:
+         tplColumnas (tuple): Pares (nombre, tipo de array) de las columnas
+         iCapacidad (int): Número máximo de filas en memoria
+      """
+      self.tplColumnas = tplColumnas
+      self.iCapacidad = iCapacidad
+      self.lstArrays = [array.array(strTipo, bytes(array.array(strTipo).itemsize * iCapacidad))
+                        for _, strTipo in tplColumnas]
+      # Filas añadidas desde el inicio; la siguiente va en iTotal % iCapacidad
+      self.iTotal = 0
+
+   def fAgregarFilas(self, lstColumnas):
+      """
+      Añade varias filas de una vez, dadas por columnas.
+      
+      Args:
+         lstColumnas (list): Una secuencia de valores por columna, todas de la misma longitud
+      """
+      iFilas = len(lstColumnas[0])
+      if iFilas > self.iCapacidad:
+         # Solo caben las últimas iCapacidad filas
+         self.iTotal += iFilas - self.iCapacidad
+         lstColumnas = [lstValores[-self.iCapacidad:] for lstValores in lstColumnas]
+         iFilas = self.iCapacidad
+      iPos = self.iTotal % self.iCapacidad
+      iPrimerTramo = min(iFilas, self.iCapacidad - iPos)
+      for objArray, lstValores in zip(self.lstArrays, lstColumnas):
+         objValores = array.array(objArray.typecode, lstValores)
+         objArray[iPos:iPos + iPrimerTramo] = objValores[:iPrimerTramo]
+         if iPrimerTramo < iFilas:
+            objArray[:iFilas - iPrimerTramo] = objValores[iPrimerTramo:]
+      self.iTotal += iFilas
+
+   def fLeer(self, iDesde, iHasta=None):
+      """
+      Lee las filas [iDesde, iHasta) numeradas desde el inicio.
+      
+      Args:
+         iDesde (int): Primera fila (si ya se sobrescribió, se empieza en la más antigua conservada)
+         iHasta (int): Fila siguiente a la última (None = hasta la más reciente)
+      
+      Returns:
+         tuple: (primera fila devuelta, lista con un array por columna)
+      """
+      iHasta = self.iTotal if iHasta is None else min(iHasta, self.iTotal)
+      iDesde = max(iDesde, iHasta - self.iCapacidad, 0)
+      iInicio = iDesde % self.iCapacidad
+      iFin = iInicio + (iHasta - iDesde)
+      lstColumnas = []
+      for objArray in self.lstArrays:
+         if iFin <= self.iCapacidad:
+            lstColumnas.append(objArray[iInicio:iFin])
+         else:
+            lstColumnas.append(objArray[iInicio:] + objArray[:iFin - self.iCapacidad])
+      return iDesde, lstColumnas
+
+
+class MuestreadorMemoria:
+   """
+   Muestreo periódico de la memoria del sistema, la swap y el RSS de cada
+   proceso, guardado en dos buffers circulares por columnas y volcado cada
+   cierto tiempo a un archivo binario de solo añadir. Cada volcado es un
+   bloque con su cabecera (MUESTREO_CABECERA) y, a continuación, los bytes
+   de cada columna de COLUMNAS_SISTEMA y COLUMNAS_PROCESOS; se lee con
+   fLeerArchivoMuestras.
+   """
+
+   def __init__(self, strRutaArchivo=None, iCapacidad=MUESTREO_CAPACIDAD, objFugas=None):
+      """
+      Args:
+         strRutaArchivo (str): Archivo binario de muestras (None = solo en memoria)
+         iCapacidad (int): Muestras que se conservan en memoria
+         objFugas (AnalizadorFugas): Análisis de crecimiento que recibe cada muestra (None = sin análisis)
+      """
+      self.strRutaArchivo = strRutaArchivo
+      self.objSistema = BufferCircular(COLUMNAS_SISTEMA, iCapacidad)
+      self.objProcesos = BufferCircular(COLUMNAS_PROCESOS, iCapacidad * MUESTREO_FILAS_POR_MUESTRA)
+      # Primera fila de cada buffer que aún no se ha volcado al archivo
+      self.iVolcadoSistema = 0
+      self.iVolcadoProcesos = 0
+      self.bDetener = False
+      self.objLector = fObtenerLectorProc()
+      self.objFugas = objFugas
+
+   def fTomarMuestra(self):
+      """
+      Toma una muestra: memoria y swap del sistema y RSS de cada proceso.
+      Con el lector de /proc basta una lectura de /proc/<pid>/stat por
+      proceso; con psutil, process_iter reutiliza los objetos Process entre
+      llamadas y por proceso solo se lee memory_info (la fecha de creación
+      queda en caché).
+      
+      Returns:
+         int: Número de procesos muestreados
+      """
+      objMem = psutil.virtual_memory()
+      objSwap = psutil.swap_memory()
+      if self.objLector is not None:
+         lstPid, _, lstCreacion, lstRss = self.objLector.fBarrido(bNombres=False)
+      else:
+         lstPid = []
+         lstCreacion = []
+         lstRss = []
+         for objProc in psutil.process_iter():
+            try:
+               iRss = objProc.memory_info().rss
+               fCreacion = objProc.create_time()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+               continue
+            lstPid.append(objProc.pid)
+            lstCreacion.append(fCreacion)
+            lstRss.append(iRss)
+
+      iMuestra = self.objSistema.iTotal
+      fTiempo = time.time()
+      self.objSistema.fAgregarFilas([[fTiempo], [objMem.total], [objMem.available], [objMem.used],
+                                     [objSwap.used]])
+      self.objProcesos.fAgregarFilas([[iMuestra] * len(lstPid), lstPid, lstCreacion, lstRss])
+      if self.objFugas is not None:
+         for strAlerta in self.objFugas.fAgregarMuestra(fTiempo, lstPid, lstCreacion, lstRss):
+            print(strAlerta)
+      return len(lstPid)
+
+   def fVolcar(self):
+      """
+      Añade al archivo un bloque con las filas tomadas desde el último volcado.
+      
+      Returns:
+         int: Muestras volcadas
+      """
+      if self.strRutaArchivo is None or self.objSistema.iTotal == self.iVolcadoSistema:
+         return 0
+      iDesdeSistema, lstSistema = self.objSistema.fLeer(self.iVolcadoSistema)
+      iDesdeProcesos, lstProcesos = self.objProcesos.fLeer(self.iVolcadoProcesos)
+      if iDesdeSistema > self.iVolcadoSistema or iDesdeProcesos > self.iVolcadoProcesos:
+         print("WARNING - El buffer circular se llenó antes del volcado: se han perdido muestras")
+
+      with open(self.strRutaArchivo, 'ab') as objArchivo:
+         objArchivo.write(MUESTREO_CABECERA.pack(MUESTREO_MAGIC, b"<" if sys.byteorder == "little" else b">",
+                                                 len(lstSistema[0]), len(lstProcesos[0])))
+         for objColumna in lstSistema + lstProcesos:
+            objColumna.tofile(objArchivo)
+
+      iMuestras = len(lstSistema[0])
+      self.iVolcadoSistema = self.objSistema.iTotal
+      self.iVolcadoProcesos = self.objProcesos.iTotal
+      return iMuestras
+
+   def fDetener(self, iSenal=None, objFrame=None):
+      """Pide que termine el bucle de muestreo (también como manejador de SIGTERM)."""
+      self.bDetener = True
+
+   def fEjecutar(self, iIntervaloMs=MUESTREO_INTERVALO_MS, fDuracionS=None):
+      """
+      Bucle de muestreo hasta fDuracionS segundos, Ctrl-C o SIGTERM. Las
+      muestras se programan sobre un reloj monótono para que el intervalo no
+      se desplace con el tiempo de cada barrido.
+      
+      Args:
+         iIntervaloMs (int): Milisegundos entre muestras
+         fDuracionS (float): Duración del muestreo en segundos (None = indefinida)
+      
+      Returns:
+         dict: Muestras tomadas, duración media del barrido y uso de CPU del muestreador
+      """
+      if hasattr(signal, "SIGTERM"):
+         signal.signal(signal.SIGTERM, self.fDetener)
+      fIntervalo = iIntervaloMs / 1000
+      fInicio = time.monotonic()
+      fCpuInicio = time.process_time()
+      fUltimoVolcado = fInicio
+      fBarridos = 0.0
+      iMuestras = 0
+      iProcesos = 0
+      try:
+         while not self.bDetener:
+            fAntes = time.perf_counter()
+            iProcesos = self.fTomarMuestra()
+            fBarridos += time.perf_counter() - fAntes
+            iMuestras += 1
+
+            fAhora = time.monotonic()
+            if fAhora - fUltimoVolcado >= MUESTREO_VOLCADO_S:
+               self.fVolcar()
+               fUltimoVolcado = fAhora
+            if fDuracionS is not None and fAhora - fInicio >= fDuracionS:
+               break
+            # Siguiente instante de la rejilla; si un barrido se alarga se salta al siguiente
+            fSiguiente = fInicio + (int((fAhora - fInicio) / fIntervalo) + 1) * fIntervalo
+            time.sleep(max(0.0, fSiguiente - time.monotonic()))
+      except KeyboardInterrupt:
+         print("\nINFO    - Muestreo interrumpido")
+      finally:
+         self.fVolcar()
+
+      fDuracion = max(time.monotonic() - fInicio, 1e-6)
+      return {"iMuestras": iMuestras, "iProcesos": iProcesos,
+              "fBarridoMs": fBarridos / max(iMuestras, 1) * 1000,
+              "fCpuPorcentaje": (time.process_time() - fCpuInicio) / fDuracion * 100}
+
+
+def fLeerArchivoMuestras(strRutaArchivo):
+   """
+   Lee un archivo de muestras escrito por MuestreadorMemoria bloque a bloque.
+   
+   Args:
+      strRutaArchivo (str): Ruta al archivo binario de muestras
+   
+   Returns:
+      generator: Por bloque, (dict columna -> array del sistema, dict columna -> array de procesos)
+   """
+   with open(strRutaArchivo, 'rb') as objArchivo:
+      while True:
+         bytCabecera = objArchivo.read(MUESTREO_CABECERA.size)
+         if len(bytCabecera) < MUESTREO_CABECERA.size:
+            return
+         bytMagic, bytOrden, iFilasSistema, iFilasProcesos = MUESTREO_CABECERA.unpack(bytCabecera)
+         if bytMagic != MUESTREO_MAGIC:
+            raise ValueError(f"Bloque de muestras no válido en la posición {objArchivo.tell() - len(bytCabecera)}")
+         bInvertir = bytOrden != (b"<" if sys.byteorder == "little" else b">")
+
+         lstBloque = []
+         for tplColumnas, iFilas in ((COLUMNAS_SISTEMA, iFilasSistema), (COLUMNAS_PROCESOS, iFilasProcesos)):
+            dictColumnas = {}
+            for strNombre, strTipo in tplColumnas:
+               objColumna = array.array(strTipo)
+               objColumna.fromfile(objArchivo, iFilas)
+               if bInvertir:
+                  objColumna.byteswap()
+               dictColumnas[strNombre] = objColumna
+            lstBloque.append(dictColumnas)
+         yield lstBloque[0], lstBloque[1]
+
+
+class SerieProceso:
+   """
+   Estadísticos acumulados del RSS de un proceso, actualizados en O(1) por
+   muestra: regresión lineal en línea (medias y co-momentos de Welford) para
+   la pendiente, y media y varianza exponenciales (EWMA) para el nivel
+   reciente y la puntuación de anomalía.
+   """
+
+   __slots__ = ("iMuestras", "fInicio", "fMediaT", "fMediaRss", "fCoMomento", "fM2T",
+                "fEwma", "fEwVar", "iRss", "fAnomalia", "bAvisoPendiente", "iVista")
+
+   def __init__(self, fTiempo, iRss, iVista):
+      self.iMuestras = 0
+      # Tiempos relativos a la primera muestra, para no perder precisión con epoch
+      self.fInicio = fTiempo
+      self.fMediaT = 0.0
+      self.fMediaRss = 0.0
+      self.fCoMomento = 0.0
+      self.fM2T = 0.0
+      self.fEwma = float(iRss)
+      self.fEwVar = 0.0
+      self.iRss = iRss
+      self.fAnomalia = 0.0
+      self.bAvisoPendiente = False
+      # Última muestra del analizador en la que apareció el proceso
+      self.iVista = iVista
+
+   def fPendienteMBMin(self):
+      """
+      Returns:
+         float: Pendiente de la regresión del RSS en MB por minuto (0 sin datos suficientes)
+      """
+      if self.fM2T <= 0:
+         return 0.0
+      return self.fCoMomento / self.fM2T * 60 / MB_DIVISOR
+
+
+class AnalizadorFugas:
+   """
+   Análisis incremental del crecimiento de memoria sobre muestras sucesivas.
+   Cada proceso se identifica por (pid, fecha de creación), de modo que un
+   PID reutilizado empieza una serie nueva. Por muestra y proceso se
+   actualizan la pendiente del RSS, su EWMA y una puntuación de anomalía
+   (desviaciones respecto a la EWMA), y se devuelven avisos cuando la
+   pendiente supera FUGA_UMBRAL_MB_MIN o la anomalía FUGA_UMBRAL_ANOMALIA.
+   """
+
+   def __init__(self, fUmbralMBMin=FUGA_UMBRAL_MB_MIN, fUmbralAnomalia=FUGA_UMBRAL_ANOMALIA,
+                fAlfa=FUGA_EWMA_ALFA, iMuestrasMinimas=FUGA_MUESTRAS_MINIMAS):
+      """
+      Args:
+         fUmbralMBMin (float): Pendiente en MB/min a partir de la que se avisa
+         fUmbralAnomalia (float): Desviaciones respecto a la EWMA a partir de las que se avisa
+         fAlfa (float): Peso de la muestra nueva en la EWMA
+         iMuestrasMinimas (int): Muestras de un proceso antes de estimar o avisar
+      """
+      self.fUmbralMBMin = fUmbralMBMin
+      self.fUmbralAnomalia = fUmbralAnomalia
+      self.fAlfa = fAlfa
+      self.iMuestrasMinimas = iMuestrasMinimas
+      self.fVarianzaMinima = (FUGA_DESVIACION_MINIMA_MB * MB_DIVISOR) ** 2
+      # (pid, fecha de creación) -> SerieProceso
+      self.dictSeries = {}
+      self.iMuestras = 0
+
+   def fAgregarMuestra(self, fTiempo, lstPid, lstCreacion, lstRss, dictNombres=None):
+      """
+      Incorpora una muestra de todos los procesos. Las series de los procesos
+      que ya no aparecen se descartan.
+      
+      Args:
+         fTiempo (float): Marca de tiempo de la muestra (segundos)
+         lstPid (list): PIDs
+         lstCreacion (list): Fechas de creación de cada proceso
+         lstRss (list): RSS en bytes de cada proceso
+         dictNombres (dict): PID -> nombre, solo para el texto de los avisos
+      
+      Returns:
+         list: Avisos generados por esta muestra
+      """
+      self.iMuestras += 1
+      iMuestra = self.iMuestras
+      fAlfa = self.fAlfa
+      dictSeries = self.dictSeries
+      lstAvisos = []
+
+      for iPid, fCreacion, iRss in zip(lstPid, lstCreacion, lstRss):
+         tplClave = (iPid, fCreacion)
+         objSerie = dictSeries.get(tplClave)
+         if objSerie is None:
+            objSerie = dictSeries[tplClave] = SerieProceso(fTiempo, iRss, iMuestra)
+         objSerie.iVista = iMuestra
+
+         # Regresión lineal en línea del RSS frente al tiempo
+         objSerie.iMuestras += 1
+         fT = fTiempo - objSerie.fInicio
+         fDifT = fT - objSerie.fMediaT
+         objSerie.fMediaT += fDifT / objSerie.iMuestras
+         objSerie.fMediaRss += (iRss - objSerie.fMediaRss) / objSerie.iMuestras
+         objSerie.fCoMomento += fDifT * (iRss - objSerie.fMediaRss)
+         objSerie.fM2T += fDifT * (fT - objSerie.fMediaT)
+
+         # Anomalía respecto a la media y la varianza exponenciales anteriores
+         fDif = iRss - objSerie.fEwma
+         objSerie.fAnomalia = abs(fDif) / math.sqrt(max(objSerie.fEwVar, self.fVarianzaMinima))
+         fIncremento = fAlfa * fDif
+         objSerie.fEwma += fIncremento
+         objSerie.fEwVar = (1 - fAlfa) * (objSerie.fEwVar + fDif * fIncremento)
+         objSerie.iRss = iRss
+
+         if objSerie.iMuestras < self.iMuestrasMinimas:
+            continue
+         if objSerie.fAnomalia >= self.fUmbralAnomalia:
+            lstAvisos.append(self.fTextoAviso(iPid, dictNombres,
+                                              f"salto de memoria a {iRss / MB_DIVISOR:.1f} MB "
+                                              f"({objSerie.fAnomalia:.1f} desviaciones sobre la media)"))
+         # La pendiente solo avisa una vez por proceso, y no durante el arranque
+         # (unos KB en pocos segundos también dan muchos MB/min)
+         if not objSerie.bAvisoPendiente and fT >= FUGA_VENTANA_MINIMA_S \
+               and objSerie.fPendienteMBMin() >= self.fUmbralMBMin \
+               and objSerie.fPendienteMBMin() * fT / 60 >= FUGA_CRECIMIENTO_MINIMO_MB:
+            objSerie.bAvisoPendiente = True
+            lstAvisos.append(self.fTextoAviso(iPid, dictNombres,
+                                              f"posible fuga, crece {objSerie.fPendienteMBMin():.1f} MB/min "
+                                              f"(RSS {iRss / MB_DIVISOR:.1f} MB)"))
+
+      # Descartar los procesos terminados
+      if len(dictSeries) > len(lstPid):
+         for tplClave in [tplClave for tplClave, objSerie in dictSeries.items() if objSerie.iVista != iMuestra]:
+            del dictSeries[tplClave]
+      return lstAvisos
+
+   def fTextoAviso(self, iPid, dictNombres, strMotivo):
+      """Texto de un aviso con el PID y, si se conoce, el nombre del proceso."""
+      strNombre = f" ({dictNombres[iPid]})" if dictNombres and iPid in dictNombres else ""
+      return f"WARNING - PID {iPid}{strNombre}: {strMotivo}"
+
+   def fAgregarInstantanea(self, objInstantanea):
+      """
+      Incorpora una InstantaneaProcesos como una muestra más.
+      
+      Args:
+         objInstantanea (InstantaneaProcesos): Instantánea de los procesos
+      
+      Returns:
+         list: Avisos generados por esta muestra
+      """
+      lstPid = [tplProceso[0] for tplProceso in objInstantanea.lstProcesos]
+      lstCreacion = [tplProceso[3] for tplProceso in objInstantanea.lstProcesos]
+      lstRss = [round(tplProceso[2] * MB_DIVISOR) for tplProceso in objInstantanea.lstProcesos]
+      dictNombres = {tplProceso[0]: tplProceso[1] for tplProceso in objInstantanea.lstProcesos}
+      return self.fAgregarMuestra(objInstantanea.fMarcaTiempo, lstPid, lstCreacion, lstRss, dictNombres)
+
+   def fRanking(self, iTop=FUGA_TOP):
+      """
+      Args:
+         iTop (int): Número de procesos
+      
+      Returns:
+         list: ((pid, fecha de creación), SerieProceso) de mayor a menor pendiente
+      """
+      return heapq.nlargest(iTop, ((tplClave, objSerie) for tplClave, objSerie in self.dictSeries.items()
+                                   if objSerie.iMuestras >= self.iMuestrasMinimas),
+                            key=lambda tplItem: tplItem[1].fPendienteMBMin())
+
+   def fInforme(self, iTop=FUGA_TOP, dictNombres=None):
+      """
+      Informe de los procesos que más rápido crecen.
+      
+      Args:
+         iTop (int): Número de procesos del informe
+         dictNombres (dict): (pid, fecha de creación) -> nombre del proceso
+      
+      Returns:
+         str: Cadena con el informe formateado
+      """
+      dictNombres = dictNombres or {}
+      strContenido = "\n===== PROCESOS CON MAYOR CRECIMIENTO DE MEMORIA =====\n"
+      strContenido += (f"(Muestras analizadas: {self.iMuestras}; aviso a partir de {self.fUmbralMBMin} MB/min "
+                       f"o {self.fUmbralAnomalia} desviaciones)\n\n")
+      strContenido += (f"{'PID':<8} {'NOMBRE':<25} {'RSS (MB)':>10} {'MB/MIN':>9} {'EWMA (MB)':>10} "
+                       f"{'ANOMALÍA':>9} {'MUESTRAS':>9}\n")
+      strContenido += "-" * 86 + "\n"
+      for tplClave, objSerie in self.fRanking(iTop):
+         strNombre = dictNombres.get(tplClave, "?")[:25]
+         strContenido += (f"{tplClave[0]:<8} {strNombre:<25} {objSerie.iRss / MB_DIVISOR:>10.2f} "
+                          f"{objSerie.fPendienteMBMin():>9.2f} {objSerie.fEwma / MB_DIVISOR:>10.2f} "
+                          f"{objSerie.fAnomalia:>9.1f} {objSerie.iMuestras:>9}\n")
+      return strContenido
+
+
+def fAnalizarArchivoMuestras(strRutaArchivo, iTop=FUGA_TOP):
+   """
+   Analiza el crecimiento de memoria de un archivo de muestras ya grabado.
+   
+   Args:
+      strRutaArchivo (str): Ruta al archivo binario de muestras
+      iTop (int): Número de procesos del informe
+   
+   Returns:
+      str: Cadena con los avisos y el informe de mayor crecimiento
+   """
+   objFugas = AnalizadorFugas()
+   lstAvisos = []
+   for dictSistema, dictProcesos in fLeerArchivoMuestras(strRutaArchivo):
+      lstMuestra = dictProcesos["muestra"]
+      if not lstMuestra:
+         continue
+      # Las filas de procesos van en orden de muestra y las del sistema son las
+      # últimas muestras del bloque, así que la última muestra fija la correspondencia
+      iBase = lstMuestra[-1] - len(dictSistema["tiempo"]) + 1
+      iInicio = 0
+      while iInicio < len(lstMuestra):
+         iMuestra = lstMuestra[iInicio]
+         iFin = iInicio
+         while iFin < len(lstMuestra) and lstMuestra[iFin] == iMuestra:
+            iFin += 1
+         if iMuestra >= iBase:
+            lstAvisos += objFugas.fAgregarMuestra(dictSistema["tiempo"][iMuestra - iBase],
+                                                  dictProcesos["pid"][iInicio:iFin],
+                                                  dictProcesos["creacion"][iInicio:iFin],
+                                                  dictProcesos["rss"][iInicio:iFin])
+         iInicio = iFin
+
+   strContenido = f"===== ANÁLISIS DE FUGAS: {os.path.basename(strRutaArchivo)} =====\n"
+   strContenido += "".join(strAviso + "\n" for strAviso in lstAvisos)
+   strContenido += objFugas.fInforme(iTop)
+   return strContenido
+
+
+def fMuestrearMemoria(iIntervaloMs=MUESTREO_INTERVALO_MS, fDuracionS=None):
+   """
+   Modo de muestreo: toma muestras continuas y las guarda en
+   MuestrasMemoria_<fecha>.bin dentro de RUTA_DIRECTORIO. Al terminar
+   guarda el informe de los procesos que más crecen en AnalisisFugas_<fecha>.txt.
+   
+   Args:
+      iIntervaloMs (int): Milisegundos entre muestras
+      fDuracionS (float): Duración del muestreo en segundos (None = hasta Ctrl-C o SIGTERM)
+   
+   Returns:
+      str: Ruta del archivo de muestras
+   """
+   load_dotenv()
+   sRUTA_DIRECTORIO = os.getenv('RUTA_DIRECTORIO')
+   os.makedirs(sRUTA_DIRECTORIO, exist_ok=True)
+   strRutaArchivo = os.path.join(sRUTA_DIRECTORIO, f"MuestrasMemoria_{datetime.now().strftime('%Y%m%d_%H%M%S')}.bin")
+
+   print(f"INFO    - Muestreando la memoria cada {iIntervaloMs} ms (Ctrl-C para terminar)...")
+   objFugas = AnalizadorFugas()
+   objMuestreador = MuestreadorMemoria(strRutaArchivo, objFugas=objFugas)
+   dictResumen = objMuestreador.fEjecutar(iIntervaloMs, fDuracionS)
+   print(f"INFO    - {dictResumen['iMuestras']} muestras de {dictResumen['iProcesos']} procesos | "
+         f"barrido medio {dictResumen['fBarridoMs']:.1f} ms | CPU del muestreador {dictResumen['fCpuPorcentaje']:.2f}%")
+   print(f"INFO    - Muestras guardadas en: {strRutaArchivo}")
+
+   # Nombres de los procesos que siguen vivos para el informe
+   dictNombres = {(iPid, fCreacion): strNombre
+                  for iPid, strNombre, _, fCreacion in InstantaneaProcesos().lstProcesos}
+   strInforme = objFugas.fInforme(dictNombres=dictNombres)
+   print(strInforme)
+   fGuardarResultado(f"AnalisisFugas_{datetime.now().strftime('%Y%m%d_%H%M%S')}", strInforme)
+   return strRutaArchivo
+
+
+def main(iProfundo=0):
    """
    Función principal que ejecuta el análisis completo de memoria y guarda los resultados.
    Coordina la ejecución de las diferentes funciones de análisis y combina sus resultados.
+   
+   Args:
+      iProfundo (int): Procesos del análisis profundo de mapas de memoria (0 = sin él)
    """
    print("INFO    - Iniciando análisis de memoria del sistema y procesos...")
 
    try:
+      # Enumerar los procesos una sola vez para todas las secciones del informe
+      objInstantanea = InstantaneaProcesos()
+
       # Obtener la información de la memoria del sistema
-      strResultadoMemoria = fObtenerMemoriaSistema()
+      strResultadoMemoria = fObtenerMemoriaSistema(objInstantanea)
 
       # Listar los procesos y ordenarlos por la memoria utilizada (umbral de 50MB)
-      _, strResultadoProcesos = fListarProcesos(fUmbralMemoria=50)
+      _, strResultadoProcesos = fListarProcesos(fUmbralMemoria=50, objInstantanea=objInstantanea)
 
       # Obtener información detallada de los 3 procesos que más memoria consumen
-      strTopProcesos = fObtenerTopProcesos(iNumProcesos=3)
+      strTopProcesos = fObtenerTopProcesos(iNumProcesos=3, objInstantanea=objInstantanea)
 
       # Generar captura rápida del estado de memoria
-      strCaptura = fCapturarPantallaMemoria()
+      strCaptura = fCapturarPantallaMemoria(objInstantanea)
 
       # Si se desea analizar un proceso específico por su PID
       # Comentar esta línea o cambiar a un PID válido
@@ -275,20 +1364,19 @@ def main():
       bPidEncontrado = False
       
       # Intentar encontrar un proceso conocido según el sistema operativo
-      for objProc in psutil.process_iter(['pid', 'name']):
-         try:
-               strNombreProc = objProc.info['name'].lower()
-               if "explorer" in strNombreProc or "systemd" in strNombreProc:
-                  iPidAnalizar = objProc.info['pid']
-                  strAnalisisPid = fUsoMemoriaProceso(iPidAnalizar)
-                  bPidEncontrado = True
-                  break
-         except:
-               continue
+      for iPidAnalizar, strNombreProc, _, _ in sorted(objInstantanea.lstProcesos):
+         strNombreProc = strNombreProc.lower()
+         if "explorer" in strNombreProc or "systemd" in strNombreProc:
+            strAnalisisPid = fUsoMemoriaProceso(iPidAnalizar, objInstantanea)
+            bPidEncontrado = True
+            break
       
       if not bPidEncontrado:
          strAnalisisPid = "INFO    - No se analizó ningún proceso específico por PID\n"
 
+      # Desglose de los mapas de memoria de los procesos que más consumen
+      strAnalisisProfundo = fAnalisisProfundo(iProfundo, objInstantanea) if iProfundo > 0 else ""
+
       # Obtener fecha y hora actual para el informe
       strFechaHora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
       
@@ -303,6 +1391,7 @@ def main():
       strContenidoFinal += strResultadoProcesos
       strContenidoFinal += strTopProcesos
       strContenidoFinal += strAnalisisPid
+      strContenidoFinal += strAnalisisProfundo
 
       # Guardar el resultado en un archivo
       strNombreArchivo = f"AnalisisMemoria_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
@@ -316,4 +1405,23 @@ def main():
 
 # Punto de entrada del script
 if __name__ == "__main__":
-   main()
+   objParser = argparse.ArgumentParser(description="Análisis de la memoria del sistema y de los procesos")
+   objParser.add_argument("--muestreo", action="store_true",
+                          help="Muestreo continuo a un archivo binario en lugar del informe único")
+   objParser.add_argument("--intervalo-ms", type=int, default=MUESTREO_INTERVALO_MS,
+                          help=f"Milisegundos entre muestras (por defecto {MUESTREO_INTERVALO_MS})")
+   objParser.add_argument("--duracion", type=float, default=None,
+                          help="Segundos de muestreo (por defecto, hasta Ctrl-C o SIGTERM)")
+   objParser.add_argument("--analizar-muestras", metavar="ARCHIVO", default=None,
+                          help="Informe de crecimiento de memoria de un archivo de muestras ya grabado")
+   objParser.add_argument("--profundo", type=int, nargs="?", const=PROFUNDO_TOP, default=0, metavar="N",
+                          help=f"Añadir el desglose de mapas de memoria de los N procesos que más usan "
+                               f"(por defecto {PROFUNDO_TOP})")
+   objArgs = objParser.parse_args()
+
+   if objArgs.analizar_muestras:
+      print(fAnalizarArchivoMuestras(objArgs.analizar_muestras))
+   elif objArgs.muestreo:
+      fMuestrearMemoria(objArgs.intervalo_ms, objArgs.duracion)
+   else:
+      main(objArgs.profundo)
@@ -0,0 +1,231 @@
+import os
+import sys
+import time
+import subprocess
+import psutil
+from datetime import datetime
+
+# El analizador está en el mismo directorio que este script
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import AnalizarMemoriaRAM as objAnalizador
+
+# ==========================================
+# CONFIGURACIÓN DEL BENCHMARK
+# ==========================================
+# Procesos inactivos que se lanzan para simular un servidor cargado
+BENCH_PROCESOS_EXTRA = 5000
+# Repeticiones de cada medida (se toma la mejor)
+BENCH_REPETICIONES = 3
+# Barridos consecutivos para medir la latencia del muestreo
+BENCH_BARRIDOS = 20
+# Procesos del detalle profundo (los que más memoria usan)
+BENCH_PROFUNDO = 50
+
+
+# ==========================================
+# INFORME ORIGINAL
+# ==========================================
+# Copia de la lógica del informe antes de la instantánea compartida: cada
+# sección enumera los procesos por su cuenta y cada proceso detallado espera
+# su propia medida de CPU de 100 ms. No usa las funciones actuales del
+# analizador para que la comparación sea siempre contra el comportamiento original.
+def fListarProcesosOriginal(fUmbralMemoria=0):
+   """Procesos por encima del umbral (en MB) con su propio process_iter, e informe formateado."""
+   lstProcesos = []
+   for objProc in psutil.process_iter(['pid', 'name', 'memory_info']):
+      try:
+         fMemoriaMB = objProc.info['memory_info'].rss / objAnalizador.MB_DIVISOR
+         if fMemoriaMB > fUmbralMemoria:
+            lstProcesos.append((objProc.info['pid'], objProc.info['name'], fMemoriaMB))
+      except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+         pass
+   lstProcesosOrdenados = sorted(lstProcesos, key=lambda x: x[2], reverse=True)
+   strContenido = f"{'PID':<8} {'MEMORIA (MB)':<15} {'NOMBRE':<40}\n"
+   for iPid, strName, fMemoria in lstProcesosOrdenados:
+      strContenido += f"{iPid:<8} {fMemoria:<15.2f} {strName:<40}\n"
+   return lstProcesosOrdenados, strContenido
+
+
+def fUsoMemoriaProcesoOriginal(iPid):
+   """Detalle de un proceso con psutil.Process y cpu_percent(interval=0.1)."""
+   try:
+      objProc = psutil.Process(iPid)
+      objMemoryInfo = objProc.memory_info()
+      strContenido = f"{objProc.name()} {objMemoryInfo.rss} {objMemoryInfo.vms}\n"
+      try:
+         strContenido += f"{objProc.username()}\n"
+      except:
+         pass
+      strContenido += f"{datetime.fromtimestamp(objProc.create_time())}\n"
+      try:
+         strContenido += f"{objProc.cpu_percent(interval=0.1):.1f}%\n"
+      except:
+         pass
+      try:
+         for objArchivo in objProc.open_files()[:5]:
+            strContenido += f"{objArchivo.path}\n"
+      except:
+         pass
+      return strContenido
+   except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+      return ""
+
+
+def fInformeOriginal():
+   """Secciones del informe como las calculaba main() originalmente."""
+   psutil.virtual_memory()
+   psutil.swap_memory()
+   fListarProcesosOriginal(fUmbralMemoria=50)
+   # Top 3 procesos: otra enumeración y 3 medidas de CPU de 100 ms, una tras otra
+   lstProcesosOrdenados, _ = fListarProcesosOriginal(fUmbralMemoria=0)
+   for iPid, _, _ in lstProcesosOrdenados[:3]:
+      fUsoMemoriaProcesoOriginal(iPid)
+   # Captura resumida: otra enumeración
+   psutil.virtual_memory()
+   fListarProcesosOriginal(fUmbralMemoria=100)
+   # Proceso conocido: otra enumeración y otra medida de CPU
+   for objProc in psutil.process_iter(['pid', 'name']):
+      try:
+         strNombreProc = objProc.info['name'].lower()
+         if "explorer" in strNombreProc or "systemd" in strNombreProc:
+            fUsoMemoriaProcesoOriginal(objProc.info['pid'])
+            break
+      except:
+         continue
+
+
+# ==========================================
+# INFORME ACTUAL
+# ==========================================
+def fInformeConInstantanea():
+   """Las mismas secciones leyendo todas de una única InstantaneaProcesos."""
+   objInstantanea = objAnalizador.InstantaneaProcesos()
+   objAnalizador.fObtenerMemoriaSistema(objInstantanea)
+   objAnalizador.fListarProcesos(fUmbralMemoria=50, objInstantanea=objInstantanea)
+   objAnalizador.fObtenerTopProcesos(iNumProcesos=3, objInstantanea=objInstantanea)
+   objAnalizador.fCapturarPantallaMemoria(objInstantanea)
+   for iPid, strNombreProc, _, _ in sorted(objInstantanea.lstProcesos):
+      strNombreProc = strNombreProc.lower()
+      if "explorer" in strNombreProc or "systemd" in strNombreProc:
+         objAnalizador.fUsoMemoriaProceso(iPid, objInstantanea)
+         break
+
+
+# ==========================================
+# BARRIDOS DEL MUESTREADOR
+# ==========================================
+def fBarridoPsutil():
+   """Barrido de RSS y fecha de creación con psutil (ruta de respaldo del muestreador)."""
+   lstFilas = []
+   for objProc in psutil.process_iter():
+      try:
+         lstFilas.append((objProc.pid, objProc.create_time(), objProc.memory_info().rss))
+      except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+         continue
+   return lstFilas
+
+
+def fBarridoLectorProc():
+   """El mismo barrido leyendo /proc/<pid>/stat directamente."""
+   return objAnalizador.fObtenerLectorProc().fBarrido(bNombres=False)
+
+
+# ==========================================
+# DETALLE DE LOS PROCESOS QUE MÁS USAN
+# ==========================================
+def fDetalleSecuencial(objInstantanea):
+   """Detalle de cada proceso con su propia ventana de CPU de 100 ms, uno tras otro."""
+   for iPid, _, _ in objInstantanea.fProcesosSobreUmbral(0)[:BENCH_PROFUNDO]:
+      objAnalizador.fUsoMemoriaProceso(iPid, objInstantanea)
+
+
+def fDetalleProfundo(objInstantanea):
+   """Análisis profundo: mapas en paralelo dentro de una única ventana de CPU."""
+   objAnalizador.fAnalisisProfundo(BENCH_PROFUNDO, objInstantanea)
+
+
+# ==========================================
+# MEDIDAS
+# ==========================================
+def fMedir(fInforme, bLectorProc=False, iRepeticiones=BENCH_REPETICIONES):
+   """
+   Args:
+      fInforme (function): Función que genera el informe
+      bLectorProc (bool): Permitir el lector directo de /proc durante la medida
+      iRepeticiones (int): Veces que se repite la medida
+
+   Returns:
+      tuple: (mejor tiempo real en segundos, mejor tiempo de CPU en segundos)
+   """
+   objAnalizador.LECTOR_PROC_DIRECTO = bLectorProc
+   # Una pasada previa para que psutil tenga en caché los objetos Process, como en uso continuo
+   fInforme()
+   fMejorReal = float("inf")
+   fMejorCpu = float("inf")
+   for _ in range(iRepeticiones):
+      fInicioReal = time.perf_counter()
+      fInicioCpu = time.process_time()
+      fInforme()
+      fMejorCpu = min(fMejorCpu, time.process_time() - fInicioCpu)
+      fMejorReal = min(fMejorReal, time.perf_counter() - fInicioReal)
+   return fMejorReal, fMejorCpu
+
+
+if __name__ == "__main__":
+   print("=" * 80)
+   print("BENCHMARK DEL ANÁLISIS DE MEMORIA")
+   print("=" * 80)
+
+   print(f"INFO    - Lanzando {BENCH_PROCESOS_EXTRA} procesos inactivos...")
+   lstExtra = [subprocess.Popen([sys.executable, "-c", "import time; time.sleep(3600)"] if os.name == "nt"
+                                else ["sleep", "3600"]) for _ in range(BENCH_PROCESOS_EXTRA)]
+   try:
+      print(f"INFO    - Procesos en el sistema: {len(psutil.pids())}")
+      bProcDisponible = objAnalizador.LectorProc.fDisponible()
+
+      print(f"\n{'INFORME':<40} {'REAL (ms)':>10} {'CPU (ms)':>10} {'MEJORA REAL':>11} {'MEJORA CPU':>11}")
+      print("-" * 86)
+      fBaseReal = None
+      fBaseCpu = None
+      for strModo, fInforme, bLectorProc in (("original (enumeración por sección)", fInformeOriginal, False),
+                                             ("instantánea compartida (psutil)", fInformeConInstantanea, False),
+                                             ("instantánea compartida (/proc)", fInformeConInstantanea, True)):
+         if bLectorProc and not bProcDisponible:
+            continue
+         fReal, fCpu = fMedir(fInforme, bLectorProc)
+         fBaseReal = fBaseReal or fReal
+         fBaseCpu = fBaseCpu or fCpu
+         print(f"{strModo:<40} {fReal * 1000:>10.1f} {fCpu * 1000:>10.1f} {fBaseReal / fReal:>10.1f}x "
+               f"{fBaseCpu / fCpu:>10.1f}x")
+      print("\n(El tiempo real incluye la espera de la medida de CPU: 100 ms por proceso detallado en el original,"
+            "\n una ventana de 100 ms para todo el top y otra para el proceso conocido en el actual)")
+
+      if bProcDisponible:
+         print(f"\n{'BARRIDO DEL MUESTREADOR':<40} {'REAL (ms)':>10} {'CPU (ms)':>10} {'MEJORA CPU':>11}")
+         print("-" * 80)
+         fBaseCpu = None
+         for strModo, fBarrido, bLectorProc in (("psutil (process_iter + memory_info)", fBarridoPsutil, False),
+                                                ("lector directo de /proc", fBarridoLectorProc, True)):
+            fReal, fCpu = fMedir(fBarrido, bLectorProc, BENCH_BARRIDOS)
+            fBaseCpu = fBaseCpu or fCpu
+            print(f"{strModo:<40} {fReal * 1000:>10.1f} {fCpu * 1000:>10.1f} {fBaseCpu / fCpu:>10.1f}x")
+      objAnalizador.LECTOR_PROC_DIRECTO = True
+
+      print(f"\n{'DETALLE DE ' + str(BENCH_PROFUNDO) + ' PROCESOS':<40} {'REAL (ms)':>10} {'CPU (ms)':>10} {'MEJORA REAL':>11}")
+      print("-" * 80)
+      objInstantanea = objAnalizador.InstantaneaProcesos()
+      fBaseReal = None
+      for strModo, fDetalle in (("secuencial (100 ms de CPU por proceso)", fDetalleSecuencial),
+                                ("análisis profundo (ventana compartida)", fDetalleProfundo)):
+         fInicioReal = time.perf_counter()
+         fInicioCpu = time.process_time()
+         fDetalle(objInstantanea)
+         fCpu = time.process_time() - fInicioCpu
+         fReal = time.perf_counter() - fInicioReal
+         fBaseReal = fBaseReal or fReal
+         print(f"{strModo:<40} {fReal * 1000:>10.1f} {fCpu * 1000:>10.1f} {fBaseReal / fReal:>10.1f}x")
+   finally:
+      for objPopen in lstExtra:
+         objPopen.kill()
+      for objPopen in lstExtra:
+         objPopen.wait()
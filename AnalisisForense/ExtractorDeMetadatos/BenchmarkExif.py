@@ -0,0 +1,168 @@
+import os
+import sys
+import time
+import random
+import struct
+import tempfile
+
+# El extractor está en el mismo directorio que este script
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import ExtractorDeMetadatos as oExtractor
+
+# -----------------------
+# Configuración del benchmark
+# -----------------------
+# Semilla fija para que el corpus sea reproducible
+INT_SEED = 1234
+# Corpus de fotos de cámara sintéticas
+INT_IMAGES = 200
+INT_IMAGE_BYTES = 3 * 1024 * 1024
+INT_THUMBNAIL_BYTES = 16 * 1024
+INT_MAKERNOTE_ENTRIES = 60
+# Repeticiones de cada medida (se toma la mejor)
+INT_REPEATS = 3
+
+# Tipos TIFF: ASCII, SHORT, LONG, RATIONAL, UNDEFINED
+INT_ASCII, INT_SHORT, INT_LONG, INT_RATIONAL, INT_UNDEFINED = 2, 3, 4, 5, 7
+DICT_TYPE_SIZES = {INT_ASCII: 1, INT_SHORT: 2, INT_LONG: 4, INT_RATIONAL: 8, INT_UNDEFINED: 1}
+
+
+# -----------------------
+# Corpus sintético
+# -----------------------
+def fEntry(iTag, iType, oValue):
+   """Entrada de IFD (little-endian) como (etiqueta, tipo, número de valores, bytes)."""
+   if iType == INT_ASCII:
+      bData = oValue.encode("ascii") + b"\x00"
+   elif iType == INT_UNDEFINED:
+      bData = oValue
+   elif iType == INT_RATIONAL:
+      bData = b"".join(struct.pack("<II", iNum, iDen) for iNum, iDen in oValue)
+   else:
+      bData = struct.pack("<" + ("H" if iType == INT_SHORT else "I") * len(oValue), *oValue)
+   return iTag, iType, len(bData) // DICT_TYPE_SIZES[iType], bData
+
+def fBuildIfd(list_entries, iOffset, iNextIfd=0):
+   """IFD en iOffset con sus datos de más de 4 bytes justo a continuación."""
+   iDataOffset = iOffset + 2 + 12 * len(list_entries) + 4
+   bEntries = struct.pack("<H", len(list_entries))
+   bData = b""
+   for iTag, iType, iCount, bValue in sorted(list_entries):
+      if len(bValue) <= 4:
+         bEntries += struct.pack("<HHI", iTag, iType, iCount) + bValue.ljust(4, b"\x00")
+      else:
+         bEntries += struct.pack("<HHII", iTag, iType, iCount, iDataOffset + len(bData))
+         bData += bValue + b"\x00" * (len(bValue) % 2)
+   return bEntries + struct.pack("<I", iNextIfd) + bData
+
+def fBuildTiff(oRandom, iMakerNoteEntries=INT_MAKERNOTE_ENTRIES):
+   """Bloque TIFF con IFD0, Exif, GPS, MakerNote de Canon y miniatura en IFD1."""
+   bThumbnail = b"\xff\xd8" + oRandom.randbytes(INT_THUMBNAIL_BYTES) + b"\xff\xd9"
+   # MakerNote de Canon: un IFD cuyos desplazamientos son relativos al bloque TIFF
+   list_maker = [fEntry(iTag, INT_SHORT, [oRandom.randint(0, 999) for _ in range(8)])
+                 for iTag in range(1, iMakerNoteEntries + 1)]
+   list_gps = [
+      fEntry(0x0001, INT_ASCII, oRandom.choice("NS")),
+      fEntry(0x0002, INT_RATIONAL, [(oRandom.randint(0, 89), 1), (oRandom.randint(0, 59), 1), (oRandom.randint(0, 5999), 100)]),
+      fEntry(0x0003, INT_ASCII, oRandom.choice("EW")),
+      fEntry(0x0004, INT_RATIONAL, [(oRandom.randint(0, 179), 1), (oRandom.randint(0, 59), 1), (oRandom.randint(0, 5999), 100)]),
+   ]
+
+   list_exif = [
+      fEntry(0x829A, INT_RATIONAL, [(1, oRandom.choice([60, 125, 250]))]),
+      fEntry(0x829D, INT_RATIONAL, [(oRandom.choice([18, 28, 40]), 10)]),
+      fEntry(0x8827, INT_SHORT, [oRandom.choice([100, 200, 400])]),
+      fEntry(0x9003, INT_ASCII, "2024:05:01 10:00:00"),
+   ]
+
+   def fExif(iMakerNote):
+      return list_exif + [fEntry(0x927C, INT_UNDEFINED, fBuildIfd(list_maker, iMakerNote))]
+
+   def fIfd0(iExif, iGps):
+      return [
+         fEntry(0x010F, INT_ASCII, "Canon"),
+         fEntry(0x0110, INT_ASCII, "Canon EOS 5D Mark IV"),
+         fEntry(0x0112, INT_SHORT, [1]),
+         fEntry(0x0132, INT_ASCII, "2024:05:01 10:00:00"),
+         fEntry(0x8769, INT_LONG, [iExif]),
+         fEntry(0x8825, INT_LONG, [iGps]),
+      ]
+
+   def fIfd1(iThumbnail):
+      return [fEntry(0x0103, INT_SHORT, [6]), fEntry(0x0201, INT_LONG, [iThumbnail]),
+              fEntry(0x0202, INT_LONG, [len(bThumbnail)])]
+
+   # El tamaño de cada IFD no depende de los desplazamientos: primero se mide y luego se coloca
+   iIfd0 = 8
+   iIfd1 = iIfd0 + len(fBuildIfd(fIfd0(0, 0), 0))
+   iThumbnail = iIfd1 + len(fBuildIfd(fIfd1(0), 0))
+   iExif = iThumbnail + len(bThumbnail)
+   iExifSize = len(fBuildIfd(fExif(0), 0))
+   # MakerNote es la etiqueta más alta del IFD Exif, así que sus datos van al final
+   iMakerNote = iExif + iExifSize - len(fBuildIfd(list_maker, 0))
+   iGps = iExif + iExifSize
+
+   bExif = fBuildIfd(fExif(iMakerNote), iExif)
+   return (b"II*\x00" + struct.pack("<I", iIfd0) + fBuildIfd(fIfd0(iExif, iGps), iIfd0, iIfd1)
+           + fBuildIfd(fIfd1(iThumbnail), iIfd1) + bThumbnail + bExif + fBuildIfd(list_gps, iGps))
+
+def fWriteJpeg(sPath, oRandom):
+   """JPEG con APP0 JFIF, APP1 Exif, tablas y datos de imagen de relleno."""
+   bTiff = fBuildTiff(oRandom)
+   bApp1 = b"Exif\x00\x00" + bTiff
+   with open(sPath, 'wb') as file_out:
+      file_out.write(b"\xff\xd8")
+      file_out.write(b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00")
+      file_out.write(b"\xff\xe1" + struct.pack(">H", len(bApp1) + 2) + bApp1)
+      file_out.write(b"\xff\xdb" + struct.pack(">H", 67) + b"\x00" + oRandom.randbytes(64))
+      file_out.write(b"\xff\xda" + struct.pack(">H", 8) + b"\x01\x01\x00\x00\x3f\x00")
+      file_out.write(oRandom.randbytes(INT_IMAGE_BYTES).replace(b"\xff", b"\xfe"))
+      file_out.write(b"\xff\xd9")
+
+
+# -----------------------
+# Medidas
+# -----------------------
+def fTime(fnExtract, list_paths):
+   """Mejor tiempo de INT_REPEATS pasadas sobre el corpus y número total de etiquetas."""
+   flBest = float("inf")
+   iTags = 0
+   for _ in range(INT_REPEATS):
+      flStart = time.perf_counter()
+      iTags = sum(len(fnExtract(sPath)) for sPath in list_paths)
+      flBest = min(flBest, time.perf_counter() - flStart)
+   return flBest, iTags
+
+
+if __name__ == "__main__":
+   print("=" * 80)
+   print("BENCHMARK DE LA LECTURA DE EXIF")
+   print("=" * 80)
+
+   oRandom = random.Random(INT_SEED)
+   with tempfile.TemporaryDirectory() as sTmpDir:
+      list_paths = []
+      for iImage in range(INT_IMAGES):
+         sPath = os.path.join(sTmpDir, f"IMG_{iImage:04d}.jpg")
+         fWriteJpeg(sPath, oRandom)
+         list_paths.append(sPath)
+      flMegabytes = sum(os.path.getsize(sPath) for sPath in list_paths) / 1e6
+      print(f"INFO    - Corpus: {INT_IMAGES} JPEG de cámara ({flMegabytes:.0f} MB)")
+
+      list_modes = [
+         ("original (open + details=True)",
+          lambda sPath: oExtractor.fExtractImageMetadata(sPath, bVerbose=False)),
+         ("mmap + details=True",
+          lambda sPath: oExtractor.fExtractImageMetadataMmap(sPath, bVerbose=False, bDetails=True)),
+         ("mmap + solo APP1/IFD (por defecto)",
+          lambda sPath: oExtractor.fExtractImageMetadataMmap(sPath, bVerbose=False)),
+      ]
+
+      print(f"\n{'LECTOR':<38} {'TIEMPO (s)':>10} {'IMÁGENES/S':>11} {'ETIQUETAS':>10} {'MEJORA':>8}")
+      print("-" * 80)
+      flBase = None
+      for sMode, fnExtract in list_modes:
+         flSeconds, iTags = fTime(fnExtract, list_paths)
+         flBase = flBase or flSeconds
+         print(f"{sMode:<38} {flSeconds:>10.3f} {INT_IMAGES / flSeconds:>11.0f} {iTags:>10} "
+               f"{flBase / flSeconds:>7.1f}x")
@@ -0,0 +1,155 @@
+import os
+import re
+import sys
+import time
+import zipfile
+import tempfile
+import multiprocessing
+
+try:
+   import resource
+except ImportError:  # Windows
+   resource = None
+
+# El extractor está en el mismo directorio que este script
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import ExtractorDeMetadatos as oExtractor
+
+# -----------------------
+# Configuración del benchmark
+# -----------------------
+# Documentos grandes generados para la prueba
+INT_PDF_PAGES = 5000
+INT_DOCX_PARAGRAPHS = 50000
+# Líneas de texto por página del PDF
+INT_PDF_LINES_PER_PAGE = 40
+# Repeticiones de cada extracción (se toma la mejor)
+INT_REPEATS = 3
+
+LIST_EXTRACTORS = [
+   ("pdf", "completo (PdfReader + pages)", "fExtractPdfMetadata"),
+   ("pdf", "cabeceras (Info + /Count)", "fExtractPdfMetadataLazy"),
+   ("docx", "completo (Document)", "fExtractDocxMetadata"),
+   ("docx", "cabeceras (docProps/*.xml)", "fExtractDocxMetadataLazy"),
+]
+
+
+# -----------------------
+# Documentos de prueba
+# -----------------------
+def fWritePdf(sPath, iPages):
+   """PDF sin comprimir con iPages páginas de texto, un árbol de páginas plano y diccionario Info."""
+   list_offsets = []
+   with open(sPath, 'wb') as file_out:
+      def fObject(bBody):
+         list_offsets.append(file_out.tell())
+         file_out.write(f"{len(list_offsets)} 0 obj\n".encode() + bBody + b"\nendobj\n")
+
+      file_out.write(b"%PDF-1.4\n")
+      # 1: catálogo, 2: árbol de páginas, 3: fuente, 4: Info; después, página y contenido alternos
+      sKids = " ".join(f"{5 + 2 * iPage} 0 R" for iPage in range(iPages))
+      fObject(b"<< /Type /Catalog /Pages 2 0 R >>")
+      fObject(f"<< /Type /Pages /Kids [{sKids}] /Count {iPages} >>".encode())
+      fObject(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+      fObject(b"<< /Title (Informe de prueba) /Author (Benchmark) /Producer (BenchmarkExtraccion) >>")
+      for iPage in range(iPages):
+         fObject(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {6 + 2 * iPage} 0 R "
+                 f"/Resources << /Font << /F1 3 0 R >> >> >>".encode())
+         sLines = " ".join(f"(Pagina {iPage + 1} linea {iLine} contacto usuario{iLine}@empresa.com) Tj T*"
+                           for iLine in range(INT_PDF_LINES_PER_PAGE))
+         bStream = f"BT /F1 10 Tf 12 TL 50 750 Td {sLines} ET".encode()
+         fObject(f"<< /Length {len(bStream)} >>\nstream\n".encode() + bStream + b"\nendstream")
+
+      iXref = file_out.tell()
+      file_out.write(f"xref\n0 {len(list_offsets) + 1}\n0000000000 65535 f \n".encode())
+      file_out.write(b"".join(f"{iOffset:010d} 00000 n \n".encode() for iOffset in list_offsets))
+      file_out.write(f"trailer\n<< /Size {len(list_offsets) + 1} /Root 1 0 R /Info 4 0 R >>\n"
+                     f"startxref\n{iXref}\n%%EOF\n".encode())
+
+def fWriteDocx(sPath, iParagraphs):
+   """DOCX con iParagraphs párrafos y propiedades rellenas, generado con python-docx."""
+   from docx import Document
+   oDoc = Document()
+   oDoc.core_properties.author = "Benchmark"
+   oDoc.core_properties.title = "Informe de prueba"
+   for iParagraph in range(iParagraphs):
+      oDoc.add_paragraph(f"Párrafo {iParagraph} con texto de relleno y contacto usuario{iParagraph}@empresa.com")
+   oDoc.save(sPath)
+   # python-docx no actualiza el recuento de app.xml; se fija como haría Word
+   with zipfile.ZipFile(sPath) as oZip:
+      dMembers = {sName: oZip.read(sName) for sName in oZip.namelist()}
+   sApp = re.sub(r"<Paragraphs>\d*</Paragraphs>", f"<Paragraphs>{iParagraphs}</Paragraphs>",
+                 dMembers["docProps/app.xml"].decode("utf-8"))
+   dMembers["docProps/app.xml"] = sApp.encode("utf-8")
+   with zipfile.ZipFile(sPath, 'w', zipfile.ZIP_DEFLATED) as oZip:
+      for sName, bData in dMembers.items():
+         oZip.writestr(sName, bData)
+
+
+# -----------------------
+# Medidas
+# -----------------------
+def fPeakRssMb():
+   """Pico de memoria residente del proceso, en MB."""
+   if resource is None:
+      return None
+   # ru_maxrss está en KB en Linux y en bytes en macOS
+   iDivisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+   return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / iDivisor
+
+def fExtractorWorker(sFunction, sPath, oConn):
+   """
+   Proceso aislado por extractor, para que el pico de memoria de uno no
+   contamine la medida del siguiente.
+   """
+   fnExtract = getattr(oExtractor, sFunction)
+   flRssBefore = fPeakRssMb()
+   flBest = float("inf")
+   dMetadata = {}
+   for _ in range(INT_REPEATS):
+      flStart = time.perf_counter()
+      dMetadata = fnExtract(sPath, bVerbose=False)
+      flBest = min(flBest, time.perf_counter() - flStart)
+   flRssAfter = fPeakRssMb()
+   oConn.send({"flSeconds": flBest, "iKeys": len(dMetadata),
+               "sCount": dMetadata.get("PageCount") or dMetadata.get("ParagraphCount"),
+               "flRss": flRssAfter, "flRssDelta": None if flRssAfter is None else flRssAfter - flRssBefore})
+   oConn.close()
+
+def fRunExtractor(sFunction, sPath):
+   oContext = multiprocessing.get_context("spawn")
+   oParent, oChild = oContext.Pipe(duplex=False)
+   oProcess = oContext.Process(target=fExtractorWorker, args=(sFunction, sPath, oChild))
+   oProcess.start()
+   oChild.close()
+   dRes = oParent.recv()
+   oProcess.join()
+   return dRes
+
+def fFormatMb(flValue):
+   return f"{flValue:.1f}" if flValue is not None else "-"
+
+
+if __name__ == "__main__":
+   print("=" * 90)
+   print("BENCHMARK DE LA EXTRACCIÓN DE METADATOS: DOCUMENTO COMPLETO FRENTE A CABECERAS")
+   print("=" * 90)
+
+   with tempfile.TemporaryDirectory() as sTmpDir:
+      dPaths = {"pdf": os.path.join(sTmpDir, "grande.pdf"), "docx": os.path.join(sTmpDir, "grande.docx")}
+      print(f"INFO    - Generando PDF de {INT_PDF_PAGES} páginas y DOCX de {INT_DOCX_PARAGRAPHS} párrafos...")
+      fWritePdf(dPaths["pdf"], INT_PDF_PAGES)
+      fWriteDocx(dPaths["docx"], INT_DOCX_PARAGRAPHS)
+      for sType, sPath in dPaths.items():
+         print(f"INFO    - {sType.upper()}: {os.path.getsize(sPath) / 1e6:.1f} MB")
+
+      print(f"\n{'EXTRACTOR':<36} {'TIEMPO (ms)':>12} {'MEJORA':>8} {'RSS (MB)':>9} {'+RSS (MB)':>10} "
+            f"{'CLAVES':>7} {'RECUENTO':>9}")
+      print("-" * 90)
+      dBase = {}
+      for sType, sName, sFunction in LIST_EXTRACTORS:
+         dRes = fRunExtractor(sFunction, dPaths[sType])
+         flBase = dBase.setdefault(sType, dRes["flSeconds"])
+         print(f"{sType.upper() + ' ' + sName:<36} {dRes['flSeconds'] * 1000:>12.1f} "
+               f"{flBase / dRes['flSeconds']:>7.1f}x {fFormatMb(dRes['flRss']):>9} "
+               f"{fFormatMb(dRes['flRssDelta']):>10} {dRes['iKeys']:>7} {str(dRes['sCount']):>9}")
@@ -1,9 +1,26 @@
+import io
 import os
 import json
+import mmap
+import zlib
+import math
+import struct
 import re
+import time
+import signal
+import sqlite3
+import hashlib
+import zipfile
+import tarfile
+import ipaddress
+import datetime
+import contextlib
 import webbrowser
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 from dotenv import load_dotenv
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, Optional, Union, Iterator, Iterable, List, Tuple, Callable, NamedTuple, BinaryIO
 from PyPDF2 import PdfReader
 from docx import Document
 import exifread
@@ -11,48 +28,304 @@ import exifread
 # -----------------------
 # Constantes
 # -----------------------
+# Patrones de datos sensibles. Cada uno se busca por separado, así que un mismo
+# texto puede dar hallazgos de varios tipos (p. ej. un correo dentro de un token).
+# El orden es el de los hallazgos que empiezan en la misma posición.
+# "X(?<!\w.)" equivale a "\bX" cuando X es un carácter de palabra, pero al empezar
+# por una clase de caracteres el motor salta directamente a los candidatos
 DICT_PATTERNS = {
+   "JWT": r'\beyJ[A-Za-z0-9_-]{5,}\.eyJ[A-Za-z0-9_-]{5,}\.[A-Za-z0-9_-]{10,}',
+   "Clave de acceso AWS": r'\b(?:AKIA|ASIA|ABIA|ACCA)[0-9A-Z]{16}\b',
    "Correo electrónico": r'[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+',
-   "Dirección IP": r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b',
-   "UUID": r'\b[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}\b',
-   "Token/Clave": r'(?i)(api|auth|token|key|clave)[^\s]{5,}'
+   "UUID": r'[a-fA-F0-9](?<!\w.)[a-fA-F0-9]{7}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{4}-[a-fA-F0-9]{12}\b',
+   "Tarjeta de crédito": r'[0-9](?<!\w.)[ -]?(?:[0-9][ -]?){11,17}[0-9]\b',
+   "Dirección IPv6": r'(?<![\w:])(?:[0-9a-fA-F]{0,4}:){2,7}[0-9a-fA-F]{0,4}(?![\w:])',
+   "Dirección IP": r'[0-9](?<!\w.)[0-9]{0,2}\.(?:[0-9]{1,3}\.){2}[0-9]{1,3}\b',
+   "Token/Clave": r'(?i:api|auth|token|key|clave)[^\s]{5,}'
+}
+
+# Prefiltro: condición necesaria (y mucho más barata que la expresión regular)
+# para que el patrón pueda dar un hallazgo válido; recibe el valor y el valor en
+# minúsculas. Solo se ejecutan los patrones cuyo prefiltro se cumple. Un patrón
+# sin entrada se ejecuta siempre
+BYTES_DIGITS = b"0123456789"
+DICT_PATTERN_TRIGGERS = {
+   "JWT": lambda sValue, sLower: "eyJ" in sValue,
+   "Clave de acceso AWS": lambda sValue, sLower: ("AKIA" in sValue or "ASIA" in sValue
+                                                  or "ABIA" in sValue or "ACCA" in sValue),
+   "Correo electrónico": lambda sValue, sLower: "@" in sValue,
+   "UUID": lambda sValue, sLower: sValue.count("-") >= 4,
+   # Al menos 13 dígitos (contados sobre bytes, que se borran en C sin recorrer el texto en Python)
+   "Tarjeta de crédito": lambda sValue, sLower: fCountDigits(sValue) >= 13,
+   # Una IPv6 válida lleva "::" o sus 7 separadores (las horas "12:30:45" no pasan)
+   "Dirección IPv6": lambda sValue, sLower: "::" in sValue or sValue.count(":") >= 7,
+   "Dirección IP": lambda sValue, sLower: sValue.count(".") >= 3,
+   "Token/Clave": lambda sValue, sLower: ("api" in sLower or "auth" in sLower or "token" in sLower
+                                          or "key" in sLower or "clave" in sLower),
 }
 
 STR_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Output")
 
+# Buscar datos sensibles también en el contenido (texto de PDF y DOCX), no solo en los metadatos
+BOOL_SCAN_CONTENT = False
+# Hallazgos por documento a partir de los cuales se deja de leer el contenido (0 = sin límite)
+INT_MAX_CONTENT_FINDINGS = 100
+# Páginas leídas con un mismo PdfReader: al recrearlo se libera su caché de objetos ya leídos
+INT_PDF_PAGES_PER_READER = 200
+# Etiquetas de WordprocessingML (word/document.xml)
+STR_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+# Extraer los metadatos leyendo solo las cabeceras (Info y raíz del árbol de
+# páginas del PDF, docProps/*.xml del DOCX) en lugar del documento completo
+BOOL_LAZY_METADATA = True
+# Propiedades de docProps/core.xml con el mismo nombre que en python-docx (core_properties)
+STR_CP_NS = "{http://schemas.openxmlformats.org/package/2006/metadata/core-properties}"
+STR_DC_NS = "{http://purl.org/dc/elements/1.1/}"
+STR_DCTERMS_NS = "{http://purl.org/dc/terms/}"
+DICT_DOCX_CORE_PROPERTIES = {
+   "author": STR_DC_NS + "creator",
+   "category": STR_CP_NS + "category",
+   "comments": STR_DC_NS + "description",
+   "content_status": STR_CP_NS + "contentStatus",
+   "created": STR_DCTERMS_NS + "created",
+   "identifier": STR_DC_NS + "identifier",
+   "keywords": STR_CP_NS + "keywords",
+   "language": STR_DC_NS + "language",
+   "last_modified_by": STR_CP_NS + "lastModifiedBy",
+   "last_printed": STR_CP_NS + "lastPrinted",
+   "modified": STR_DCTERMS_NS + "modified",
+   "revision": STR_CP_NS + "revision",
+   "subject": STR_DC_NS + "subject",
+   "title": STR_DC_NS + "title",
+   "version": STR_CP_NS + "version",
+}
+SET_DOCX_DATE_PROPERTIES = {"created", "last_printed", "modified"}
+# Propiedades de docProps/app.xml (aplicación, empresa, páginas, palabras...)
+STR_APP_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/extended-properties}"
+
+# Leer el EXIF de las imágenes con mmap: en JPEG solo se copia el segmento
+# APP1, y en TIFF/PNG exifread lee de la proyección las páginas de los IFD
+BOOL_MMAP_EXIF = True
+# Decodificar también MakerNote, SubIFDs y miniatura (lento y rara vez necesario)
+BOOL_EXIF_DETAILS = False
+
+# Bytes leídos del principio de cada archivo para detectar su tipo por la
+# firma. El extractor los reutiliza (el segmento APP1 de un JPEG suele caber)
+INT_HEADER_BYTES = 64 * 1024
+# Modo por lotes: analizar todos los archivos y no solo los de extensiones
+# conocidas (evidencias renombradas o sin extensión)
+BOOL_BATCH_ALL_FILES = False
+# Nombres de miembros que se listan en los metadatos de un ZIP
+INT_ZIP_LIST_MEMBERS = 50
+# Bytes leídos como mucho de un campo de texto de MP4/MOV o PNG
+INT_MAX_TEXT_FIELD = 64 * 1024
+# Metadatos de OpenDocument (meta.xml)
+STR_ODF_OFFICE_NS = "{urn:oasis:names:tc:opendocument:xmlns:office:1.0}"
+STR_ODF_META_NS = "{urn:oasis:names:tc:opendocument:xmlns:meta:1.0}"
+# Átomos de texto de MP4/MOV (udta de QuickTime o ilst de iTunes)
+DICT_MP4_TEXT_ATOMS = {
+   b"\xa9xyz": "Location",
+   b"\xa9day": "Date",
+   b"\xa9mak": "Make",
+   b"\xa9mod": "Model",
+   b"\xa9too": "Encoder",
+   b"\xa9swr": "Software",
+   b"\xa9nam": "Title",
+   b"\xa9ART": "Artist",
+   b"\xa9cmt": "Comment",
+}
+# Segundos entre la época de MP4 (1904-01-01) y la de Unix
+INT_MP4_EPOCH_OFFSET = 2082844800
+
+# Recorrer los ZIP y TAR (también anidados) y analizar sus miembros en
+# memoria, sin extraerlos a disco. Se informan como "archivo!miembro"
+BOOL_SCAN_ARCHIVES = True
+STR_ARCHIVE_SEPARATOR = "!"
+# Niveles de archivos anidados que se recorren (1 = solo los miembros del archivo analizado)
+INT_ARCHIVE_MAX_DEPTH = 3
+# Tamaño máximo de un miembro (se lee entero en memoria)
+INT_ARCHIVE_MAX_MEMBER = 256 * 1024 * 1024
+# Límites por archivo, incluidos los anidados (protegen de las bombas ZIP)
+INT_ARCHIVE_MAX_TOTAL = 2 * 1024 * 1024 * 1024
+INT_ARCHIVE_MAX_MEMBERS = 10000
+
+# Modo por lotes: procesos de análisis (None = uno por núcleo de CPU)
+INT_BATCH_WORKERS = None
+# Archivos enviados al pool por cada proceso (limita la memoria con árboles enormes)
+INT_PENDING_PER_WORKER = 4
+# Tiempo máximo de análisis de un archivo en segundos (solo en sistemas con SIGALRM)
+INT_FILE_TIMEOUT = 60
+# Cada cuántos segundos se muestra el progreso del lote
+FL_PROGRESS_INTERVAL = 2.0
+# Formato de la salida consolidada del lote: "jsonl" (JSON Lines) o "sqlite"
+STR_BATCH_OUTPUT_FORMAT = "jsonl"
+# Búfer de escritura de la salida JSON Lines en bytes (sin open/close ni fsync por archivo)
+INT_SINK_BUFFER = 1024 * 1024
+# Resultados insertados por transacción en la salida SQLite
+INT_SINK_BATCH = 1000
+
+# Reunir las coordenadas GPS del lote en un índice espacial en memoria y
+# exportarlas a un único GeoJSON (en modo por lotes nunca se abre el navegador)
+BOOL_GPS_AGGREGATE = True
+# Tamaño de celda del índice espacial en grados (0.01° ≈ 1,1 km de latitud)
+FL_GPS_CELL_DEGREES = 0.01
+# Tamaño de celda de los clústeres en grados (0.1° ≈ 11 km de latitud)
+FL_GPS_CLUSTER_DEGREES = 0.1
+# Archivos de ejemplo que se guardan por clúster
+INT_GPS_CLUSTER_SAMPLES = 5
+# Abrir en el navegador la ubicación GPS al analizar una imagen suelta (False en servidores sin entorno gráfico)
+BOOL_GPS_OPEN_BROWSER = True
+# Radio medio de la Tierra en km (distancia haversine)
+FL_EARTH_RADIUS_KM = 6371.0088
+
+# Caché persistente de metadatos (SQLite) para no reanalizar archivos sin cambios
+STR_CACHE_FILE = os.path.join(STR_OUTPUT_DIR, "metadata_cache.sqlite3")
+# Calcular el hash BLAKE2 de los archivos nuevos o modificados para extraer los duplicados una sola vez
+BOOL_CACHE_HASH = False
+# Tamaño de bloque al calcular el hash
+INT_HASH_CHUNK = 1024 * 1024
+# Escrituras en la caché agrupadas por transacción
+INT_CACHE_COMMIT_EVERY = 1000
+# Errores que no se guardan en la caché porque pueden no repetirse
+TUPLE_TRANSIENT_ERRORS = ("TimeoutError", "BrokenProcessPool")
+
 # -----------------------
 # Funciones de utilidad
 # -----------------------
-def fDetectSensitiveData(dMetadata: Dict[str, str]) -> None:
+def fCountDigits(sValue: str) -> int:
+   """Número de dígitos ASCII de un texto."""
+   bValue = sValue.encode("utf-8", "ignore")
+   return len(bValue) - len(bValue.translate(None, BYTES_DIGITS))
+
+class SensitiveFinding(NamedTuple):
+   """Posible dato sensible encontrado en un metadato."""
+   sType: str
+   sKey: str
+   tSpan: Tuple[int, int]
+   sValue: str
+
+def fLuhnCheck(sNumber: str) -> bool:
+   """
+   Comprueba el dígito de control (algoritmo de Luhn) de un número de tarjeta.
+   
+   Args:
+      sNumber: Número con o sin espacios/guiones
+      
+   Returns:
+      bool: True si el número es válido
+   """
+   list_digits = [int(c) for c in sNumber if c.isdigit()]
+   if not 13 <= len(list_digits) <= 19:
+      return False
+   iSum = 0
+   for iIndex, iDigit in enumerate(reversed(list_digits)):
+      if iIndex % 2 == 1:
+         iDigit *= 2
+         if iDigit > 9:
+            iDigit -= 9
+      iSum += iDigit
+   return iSum % 10 == 0
+
+def fIsValidIpv4(sValue: str) -> bool:
+   return all(int(sOctet) <= 255 for sOctet in sValue.split("."))
+
+def fIsValidIpv6(sValue: str) -> bool:
+   # Descarta "::" y horas como "12:30:45", que el patrón también acepta
+   try:
+      return len(sValue) > 2 and ipaddress.IPv6Address(sValue) is not None
+   except ValueError:
+      return False
+
+# Validación adicional de cada coincidencia (descarta falsos positivos)
+DICT_VALIDATORS = {
+   "Tarjeta de crédito": fLuhnCheck,
+   "Dirección IPv6": fIsValidIpv6,
+   "Dirección IP": fIsValidIpv4,
+}
+
+class SensitiveDataDetector:
+   """
+   Detector de datos sensibles con los patrones compilados una sola vez. Un
+   prefiltro muy barato (DICT_PATTERN_TRIGGERS) descarta los patrones que no
+   pueden coincidir en cada valor, y cada patrón restante se recorre con su
+   propio finditer: así una coincidencia de un tipo (o una descartada por su
+   validación) no oculta las de otros tipos en el mismo texto.
+   """
+
+   def __init__(self, dPatterns: Dict[str, str] = DICT_PATTERNS,
+                dValidators: Optional[Dict[str, Callable[[str], bool]]] = None,
+                dTriggers: Optional[Dict[str, Callable[[str, str], bool]]] = None):
+      self.dPatterns = dict(dPatterns)
+      self.dValidators = DICT_VALIDATORS if dValidators is None else dValidators
+      dTriggers = DICT_PATTERN_TRIGGERS if dTriggers is None else dTriggers
+      # (tipo, prefiltro, finditer de la expresión compilada, validador), en el orden de dPatterns
+      self.list_patterns = [(sType, dTriggers.get(sType), re.compile(sRegex).finditer, self.dValidators.get(sType))
+                            for sType, sRegex in self.dPatterns.items()]
+
+   def fScanValue(self, sKey: str, sValue: str) -> List[SensitiveFinding]:
+      """
+      Busca datos sensibles en un valor.
+      
+      Returns:
+         list: Hallazgos en orden de aparición
+      """
+      sLower = sValue.lower()
+      list_findings = []
+      for sType, fnTrigger, fnFinditer, fnValidator in self.list_patterns:
+         if fnTrigger is not None and not fnTrigger(sValue, sLower):
+            continue
+         for oMatch in fnFinditer(sValue):
+            sMatch = oMatch.group()
+            if fnValidator is not None and not fnValidator(sMatch):
+               continue
+            list_findings.append(SensitiveFinding(sType, sKey, oMatch.span(), sMatch))
+      # Orden de aparición (sort es estable: a igual posición, el orden de los patrones)
+      if len(list_findings) > 1:
+         list_findings.sort(key=lambda oFinding: oFinding.tSpan[0])
+      return list_findings
+
+   def fScan(self, dMetadata: Dict[str, Any]) -> List[SensitiveFinding]:
+      """
+      Busca datos sensibles en todos los valores de texto de los metadatos.
+      
+      Returns:
+         list: Hallazgos (tipo, clave, posición dentro del valor, valor)
+      """
+      list_findings = []
+      for sKey, sValue in dMetadata.items():
+         if isinstance(sValue, str):
+            list_findings.extend(self.fScanValue(sKey, sValue))
+      return list_findings
+
+O_SENSITIVE_DETECTOR = SensitiveDataDetector()
+
+def fDetectSensitiveData(dMetadata: Dict[str, str]) -> List[SensitiveFinding]:
    """
    Analiza los valores de metadatos para detectar información sensible
-   como correos, IPs, tokens, UUIDs, etc.
+   como correos, IPs, tokens, UUIDs, tarjetas, claves de AWS, JWT, etc.
    
    Args:
       dMetadata: Diccionario con los metadatos extraídos
+      
+   Returns:
+      list: Hallazgos estructurados (ver fPrintFindings para mostrarlos)
    """
-   print("\nINFO    - Buscando posibles datos sensibles...")
-   
-   # Verificar si hay metadatos para analizar
    if not dMetadata:
-      print("INFO    - No hay metadatos para analizar.")
-      return
-      
-   bFound = False
+      return []
+   return O_SENSITIVE_DETECTOR.fScan(dMetadata)
+
+def fPrintFindings(list_findings: List[SensitiveFinding], sSource: str = "los metadatos") -> None:
+   """
+   Muestra por consola los posibles datos sensibles encontrados.
    
-   # Recorrer cada par clave-valor en los metadatos
-   for sKey, sValue in dMetadata.items():
-      if not isinstance(sValue, str):
-         continue
-         
-      # Buscar patrones en cada valor
-      for sTipo, sRegex in DICT_PATTERNS.items():
-         list_matches = re.findall(sRegex, sValue)
-         for sMatch in list_matches:
-            print(f"ALERTA  - Posible {sTipo}: {sMatch}")
-            bFound = True
-   
-   if not bFound:
+   Args:
+      list_findings: Hallazgos devueltos por fDetectSensitiveData o fScanDocumentContent
+      sSource: Dónde se han buscado (para el encabezado)
+   """
+   print(f"\nINFO    - Buscando posibles datos sensibles en {sSource}...")
+   for oFinding in list_findings:
+      print(f"ALERTA  - Posible {oFinding.sType} en {oFinding.sKey}: {oFinding.sValue}")
+   if not list_findings:
       print("INFO    - No se encontraron datos sensibles.")
 
 def fDmsToDecimal(tuple_dms, sRef: str) -> Optional[float]:
@@ -84,6 +357,42 @@ def fDmsToDecimal(tuple_dms, sRef: str) -> Optional[float]:
       print(f"ERROR   - Error al convertir coordenadas DMS: {e}")
       return None
 
+def fGetGpsCoordinates(dExifData: Dict[str, Any]) -> Optional[Tuple[Optional[float], Optional[float]]]:
+   """
+   Convierte las etiquetas GPS de exifread a latitud y longitud decimales.
+   
+   Args:
+      dExifData: Diccionario con datos EXIF de la imagen (etiquetas de exifread)
+      
+   Returns:
+      tuple: (latitud, longitud), con None si alguna no es válida, o None si faltan etiquetas
+   """
+   oLat = dExifData.get("GPS GPSLatitude")
+   oLatRef = dExifData.get("GPS GPSLatitudeRef")
+   oLon = dExifData.get("GPS GPSLongitude")
+   oLonRef = dExifData.get("GPS GPSLongitudeRef")
+   if not all([oLat, oLon, oLatRef, oLonRef]):
+      return None
+   return fDmsToDecimal(oLat.values, oLatRef.values), fDmsToDecimal(oLon.values, oLonRef.values)
+
+def fGetMetadataCoordinates(dMetadata: Dict[str, str]) -> Optional[Tuple[float, float]]:
+   """
+   Latitud y longitud decimales que los extractores guardan en los
+   metadatos (GPS Latitude/GPS Longitude, calculadas con fDmsToDecimal en
+   las imágenes o leídas de la ubicación ISO 6709 en los vídeos).
+   
+   Returns:
+      tuple: (latitud, longitud), o None si faltan o no son válidas
+   """
+   try:
+      flLat = float(dMetadata["GPS Latitude"])
+      flLon = float(dMetadata["GPS Longitude"])
+   except (KeyError, TypeError, ValueError):
+      return None
+   if not (-90.0 <= flLat <= 90.0 and -180.0 <= flLon <= 180.0):
+      return None
+   return flLat, flLon
+
 def fShowGpsInMap(dExifData: Dict[str, Any]) -> None:
    """
    Extrae las coordenadas GPS del diccionario EXIF y abre Google Maps si las encuentra.
@@ -92,20 +401,18 @@ def fShowGpsInMap(dExifData: Dict[str, Any]) -> None:
       dExifData: Diccionario con datos EXIF de la imagen
    """
    try:
-      # Obtener datos de latitud y longitud
-      oLat = dExifData.get("GPS GPSLatitude")
-      oLatRef = dExifData.get("GPS GPSLatitudeRef")
-      oLon = dExifData.get("GPS GPSLongitude")
-      oLonRef = dExifData.get("GPS GPSLongitudeRef")
+      tCoordinates = fGetGpsCoordinates(dExifData)
 
       # Verificar que existen todos los datos necesarios
-      if all([oLat, oLon, oLatRef, oLonRef]):
-         flLat = fDmsToDecimal(oLat.values, oLatRef.values)
-         flLon = fDmsToDecimal(oLon.values, oLonRef.values)
+      if tCoordinates is not None:
+         flLat, flLon = tCoordinates
          
          if flLat is not None and flLon is not None:
             sUrl = f"https://www.google.com/maps?q={flLat},{flLon}"
             print(f"\nINFO    - Coordenadas GPS detectadas: {flLat}, {flLon}")
+            if not BOOL_GPS_OPEN_BROWSER:
+               print(f"INFO    - Ubicación: {sUrl}")
+               return
             print("INFO    - Abriendo ubicación en el navegador...")
             webbrowser.open(sUrl)
          else:
@@ -115,15 +422,61 @@ def fShowGpsInMap(dExifData: Dict[str, Any]) -> None:
    except Exception as e:
       print(f"ERROR   - No se pudo mostrar la ubicación GPS: {e}")
 
+def fOpenSource(oSource: Union[str, BinaryIO]) -> BinaryIO:
+   """
+   Abre en binario el origen de un extractor: una ruta, o un archivo ya
+   abierto (p. ej. un miembro de un ZIP/TAR leído en memoria), que se
+   rebobina y no se cierra al salir del with.
+   
+   Args:
+      oSource: Ruta o archivo abierto en binario
+      
+   Returns:
+      Archivo abierto, para usar con with
+   """
+   if isinstance(oSource, (str, os.PathLike)):
+      return open(oSource, 'rb')
+   oSource.seek(0)
+   return contextlib.nullcontext(oSource)
+
+@contextlib.contextmanager
+def fMapSource(oSource: Union[str, BinaryIO]) -> Iterator[Optional[Tuple[Any, Any]]]:
+   """
+   Proyecta en memoria el origen de un extractor sin copiarlo.
+   
+   Args:
+      oSource: Ruta o archivo abierto en binario
+      
+   Returns:
+      tuple: (datos indexables, lector con read/seek) sobre el mismo
+      contenido: el mmap de la ruta o la memoria del miembro. None si está vacío
+   """
+   if isinstance(oSource, (str, os.PathLike)):
+      with open(oSource, 'rb') as file_obj:
+         # mmap no admite archivos vacíos
+         if not os.fstat(file_obj.fileno()).st_size:
+            yield None
+            return
+         with mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ) as oData:
+            yield oData, oData
+      return
+   if not isinstance(oSource, io.BytesIO):
+      oSource.seek(0)
+      oSource = io.BytesIO(oSource.read())
+   with oSource.getbuffer() as oData:
+      yield (oData, oSource) if len(oData) else None
+
 # -----------------------
 # Funciones de extracción
 # -----------------------
-def fExtractPdfMetadata(sFilePath: str) -> Dict[str, str]:
+def fExtractPdfMetadata(sFilePath: str, bVerbose: bool = True) -> Dict[str, str]:
    """
    Extrae metadatos de un archivo PDF usando PyPDF2
    
    Args:
       sFilePath: Ruta al archivo PDF
+      bVerbose: Mostrar los metadatos por consola. En modo silencioso
+         (lotes) los errores se propagan al llamador
       
    Returns:
       dict: Diccionario con los metadatos del PDF
@@ -135,33 +488,40 @@ def fExtractPdfMetadata(sFilePath: str) -> Dict[str, str]:
       oReader = PdfReader(sFilePath)
       dRawMetadata = oReader.metadata or {}
       
-      print(f"\nINFO    - PDF Metadata: {sFilePath}")
+      if bVerbose:
+         print(f"\nINFO    - PDF Metadata: {sFilePath}")
       
       # Convertir todos los valores a string para consistencia
       for sKey, oValue in dRawMetadata.items():
          # Eliminar el prefijo "/" que PyPDF2 agrega a las claves
          sCleanKey = sKey.strip("/") if sKey.startswith("/") else sKey
          sValue = str(oValue)
-         print(f"INFO    - {sCleanKey}: {sValue}")
+         if bVerbose:
+            print(f"INFO    - {sCleanKey}: {sValue}")
          dMetadata[sCleanKey] = sValue
          
       # Extraer información adicional si está disponible
       if oReader.pages:
          iPageCount = len(oReader.pages)
-         print(f"INFO    - Páginas: {iPageCount}")
+         if bVerbose:
+            print(f"INFO    - Páginas: {iPageCount}")
          dMetadata["PageCount"] = str(iPageCount)
          
       return dMetadata
    except Exception as e:
+      if not bVerbose:
+         raise
       print(f"ERROR   - Error leyendo PDF: {e}")
       return {}
 
-def fExtractDocxMetadata(sFilePath: str) -> Dict[str, str]:
+def fExtractDocxMetadata(sFilePath: str, bVerbose: bool = True) -> Dict[str, str]:
    """
    Extrae metadatos de un documento Word (.docx) usando python-docx
    
    Args:
       sFilePath: Ruta al archivo DOCX
+      bVerbose: Mostrar los metadatos por consola. En modo silencioso
+         (lotes) los errores se propagan al llamador
       
    Returns:
       dict: Diccionario con los metadatos del documento
@@ -173,7 +533,8 @@ def fExtractDocxMetadata(sFilePath: str) -> Dict[str, str]:
       oDoc = Document(sFilePath)
       oProps = oDoc.core_properties
       
-      print(f"\nINFO    - Word Metadata: {sFilePath}")
+      if bVerbose:
+         print(f"\nINFO    - Word Metadata: {sFilePath}")
       
       # Extraer propiedades del documento
       for sAttr in dir(oProps):
@@ -184,27 +545,180 @@ def fExtractDocxMetadata(sFilePath: str) -> Dict[str, str]:
             # Mostrar solo propiedades con valores
             if oValue is not None:
                sValue = str(oValue)
-               print(f"INFO    - {sAttr}: {sValue}")
+               if bVerbose:
+                  print(f"INFO    - {sAttr}: {sValue}")
                dMetadata[sAttr] = sValue
       
       # Agregar información adicional si está disponible
       if oDoc.paragraphs:
          iParagraphCount = len(oDoc.paragraphs)
-         print(f"INFO    - Párrafos: {iParagraphCount}")
+         if bVerbose:
+            print(f"INFO    - Párrafos: {iParagraphCount}")
          dMetadata["ParagraphCount"] = str(iParagraphCount)
          
       return dMetadata
    except Exception as e:
+      if not bVerbose:
+         raise
       print(f"ERROR   - Error leyendo Word: {e}")
       return {}
 
+def fGetPdfPageCount(oReader: PdfReader) -> int:
+   """
+   Número de páginas leído de /Count en la raíz del árbol de páginas, sin
+   recorrerlo entero como hace len(oReader.pages). Si falta o no es válido
+   se cuenta el árbol.
+   """
+   try:
+      return int(oReader.trailer["/Root"]["/Pages"]["/Count"])
+   except (KeyError, TypeError, ValueError):
+      return len(oReader.pages)
+
+def fExtractPdfMetadataLazy(sFilePath: str, bVerbose: bool = True) -> Dict[str, str]:
+   """
+   Como fExtractPdfMetadata, pero leyendo solo el diccionario Info del
+   trailer y el número de páginas de la raíz del árbol. El archivo se pasa
+   abierto a PdfReader para que no lo cargue entero en memoria.
+   
+   Args:
+      sFilePath: Ruta al archivo PDF
+      bVerbose: Mostrar los metadatos por consola. En modo silencioso
+         (lotes) los errores se propagan al llamador
+      
+   Returns:
+      dict: Diccionario con los metadatos del PDF
+   """
+   dMetadata = {}
+   
+   try:
+      with fOpenSource(sFilePath) as file_obj:
+         oReader = PdfReader(file_obj)
+         dRawMetadata = oReader.metadata or {}
+         
+         if bVerbose:
+            print(f"\nINFO    - PDF Metadata: {sFilePath}")
+         
+         for sKey, oValue in dRawMetadata.items():
+            sCleanKey = sKey.strip("/") if sKey.startswith("/") else sKey
+            sValue = str(oValue)
+            if bVerbose:
+               print(f"INFO    - {sCleanKey}: {sValue}")
+            dMetadata[sCleanKey] = sValue
+         
+         iPageCount = fGetPdfPageCount(oReader)
+         if iPageCount:
+            if bVerbose:
+               print(f"INFO    - Páginas: {iPageCount}")
+            dMetadata["PageCount"] = str(iPageCount)
+         
+      return dMetadata
+   except Exception as e:
+      if not bVerbose:
+         raise
+      print(f"ERROR   - Error leyendo PDF: {e}")
+      return {}
+
+def fParseW3cdtf(sValue: str) -> Union[datetime.datetime, str]:
+   """Fecha de docProps/core.xml en UTC (como python-docx); el texto original si no se reconoce."""
+   try:
+      oDate = datetime.datetime.fromisoformat(sValue.replace("Z", "+00:00"))
+   except ValueError:
+      return sValue
+   if oDate.tzinfo is None:
+      return oDate.replace(tzinfo=datetime.timezone.utc)
+   return oDate.astimezone(datetime.timezone.utc)
+
+def fExtractDocxMetadataLazy(sFilePath: str, bVerbose: bool = True) -> Dict[str, str]:
+   """
+   Como fExtractDocxMetadata, pero leyendo solo docProps/core.xml y
+   docProps/app.xml del zip, sin cargar el cuerpo del documento. El número
+   de párrafos es el que guarda la aplicación en app.xml.
+   
+   Args:
+      sFilePath: Ruta al archivo DOCX
+      bVerbose: Mostrar los metadatos por consola. En modo silencioso
+         (lotes) los errores se propagan al llamador
+      
+   Returns:
+      dict: Diccionario con los metadatos del documento
+   """
+   return fExtractOoxmlMetadata(sFilePath, bVerbose, "Word")
+
+def fExtractOoxmlMetadata(sFilePath: str, bVerbose: bool = True, sLabel: str = "Office") -> Dict[str, str]:
+   """
+   Propiedades de un documento Office Open XML (DOCX, XLSX, PPTX) leídas
+   de docProps/core.xml y docProps/app.xml.
+   
+   Args:
+      sFilePath: Ruta al documento
+      bVerbose: Mostrar los metadatos por consola. En modo silencioso
+         (lotes) los errores se propagan al llamador
+      sLabel: Nombre del formato en los mensajes (Word, Excel...)
+      
+   Returns:
+      dict: Diccionario con los metadatos del documento
+   """
+   dMetadata = {}
+   
+   try:
+      with zipfile.ZipFile(sFilePath) as oZip:
+         set_names = set(oZip.namelist())
+         oCore = ET.fromstring(oZip.read("docProps/core.xml")) if "docProps/core.xml" in set_names else None
+         oApp = ET.fromstring(oZip.read("docProps/app.xml")) if "docProps/app.xml" in set_names else None
+      
+      if bVerbose:
+         print(f"\nINFO    - {sLabel} Metadata: {sFilePath}")
+      
+      # Mismos valores por defecto que python-docx: texto vacío, revisión 0 y fechas ausentes
+      for sAttr, sTag in DICT_DOCX_CORE_PROPERTIES.items():
+         oNode = oCore.find(sTag) if oCore is not None else None
+         sText = (oNode.text or "").strip() if oNode is not None else ""
+         if sAttr in SET_DOCX_DATE_PROPERTIES:
+            if not sText:
+               continue
+            oValue = fParseW3cdtf(sText)
+         elif sAttr == "revision":
+            oValue = int(sText) if sText.isdigit() else 0
+         else:
+            oValue = sText
+         sValue = str(oValue)
+         if bVerbose:
+            print(f"INFO    - {sAttr}: {sValue}")
+         dMetadata[sAttr] = sValue
+      
+      if oApp is not None:
+         for oNode in oApp:
+            # Solo propiedades simples (se omiten vectores como HeadingPairs)
+            if len(oNode) or not (oNode.text or "").strip():
+               continue
+            sName = oNode.tag.replace(STR_APP_NS, "")
+            sValue = oNode.text.strip()
+            if sName == "Paragraphs":
+               if sValue == "0":
+                  continue
+               sName = "ParagraphCount"
+               if bVerbose:
+                  print(f"INFO    - Párrafos: {sValue}")
+            elif bVerbose:
+               print(f"INFO    - {sName}: {sValue}")
+            dMetadata[sName] = sValue
+      
+      return dMetadata
+   except Exception as e:
+      if not bVerbose:
+         raise
+      print(f"ERROR   - Error leyendo {sLabel}: {e}")
+      return {}
+
 
-def fExtractImageMetadata(sFilePath: str) -> Dict[str, str]:
+def fExtractImageMetadata(sFilePath: str, bVerbose: bool = True) -> Dict[str, str]:
    """
    Extrae metadatos EXIF de una imagen JPEG usando exifread.
    
    Args:
       sFilePath: Ruta al archivo de imagen
+      bVerbose: Mostrar los metadatos por consola y abrir el mapa GPS. En
+         modo silencioso (lotes) los errores se propagan al llamador
       
    Returns:
       dict: Diccionario con los metadatos EXIF
@@ -212,9 +726,10 @@ def fExtractImageMetadata(sFilePath: str) -> Dict[str, str]:
    dMetadata = {}
    
    try:
-      print(f"\nINFO    - Imagen Metadata: {sFilePath}")
+      if bVerbose:
+         print(f"\nINFO    - Imagen Metadata: {sFilePath}")
       
-      with open(sFilePath, 'rb') as file_obj:
+      with fOpenSource(sFilePath) as file_obj:
          # Procesar el archivo EXIF con detalles
          dTags = exifread.process_file(file_obj, details=True)
 
@@ -222,19 +737,487 @@ def fExtractImageMetadata(sFilePath: str) -> Dict[str, str]:
             # Convertir todos los valores a string para consistencia
             for sTag in sorted(dTags.keys()):
                sValue = str(dTags[sTag])
-               print(f"INFO    - {sTag}: {sValue}")
+               if bVerbose:
+                  print(f"INFO    - {sTag}: {sValue}")
                dMetadata[sTag] = sValue
 
             # Intentar mostrar mapa si hay coordenadas GPS
-            fShowGpsInMap(dTags)
-         else:
+            if bVerbose:
+               fShowGpsInMap(dTags)
+         elif bVerbose:
             print("INFO    - No se encontraron metadatos EXIF.")
                
       return dMetadata
    except Exception as e:
+      if not bVerbose:
+         raise
       print(f"ERROR   - Error leyendo imagen: {e}")
       return {}
 
+def fFindJpegExif(oData: Union[bytes, mmap.mmap]) -> Optional[Tuple[int, int]]:
+   """
+   Recorre las cabeceras de segmento de un JPEG hasta el inicio de los
+   datos de imagen (SOS) y localiza el bloque TIFF del segmento APP1 Exif.
+   
+   Args:
+      oData: Contenido del archivo (proyección en memoria) o solo su cabecera
+      
+   Returns:
+      tuple: (inicio, fin) del bloque TIFF (como mucho 64 KB), o None si no
+      hay EXIF. Si los datos se acaban antes (solo se pasó la cabecera), el
+      fin queda más allá de len(oData)
+   """
+   iPos = 2
+   iSize = len(oData)
+   while iPos + 4 <= iSize:
+      if oData[iPos] != 0xFF:
+         return None
+      iMarker = oData[iPos + 1]
+      if iMarker == 0xFF:
+         # Bytes de relleno entre segmentos
+         iPos += 1
+         continue
+      if iMarker in (0xDA, 0xD9):
+         return None
+      if iMarker == 0x01 or 0xD0 <= iMarker <= 0xD7:
+         # Marcadores sin longitud
+         iPos += 2
+         continue
+      iLength = int.from_bytes(oData[iPos + 2:iPos + 4], "big")
+      if iMarker == 0xE1 and oData[iPos + 4:iPos + 10] == b"Exif\x00\x00":
+         return iPos + 10, iPos + 2 + iLength
+      iPos += 2 + iLength
+   return iSize, iSize + 1
+
+def fAddExifTags(dTags: Dict[str, Any], dMetadata: Dict[str, str], bVerbose: bool) -> None:
+   """
+   Añade a dMetadata las etiquetas de exifread como texto y, si hay GPS,
+   la latitud y longitud decimales (GPS Latitude/GPS Longitude).
+   """
+   for sTag in sorted(dTags.keys()):
+      oTag = dTags[sTag]
+      # Las miniaturas son bytes; el resto son IfdTag con el texto ya calculado
+      sValue = oTag.printable if hasattr(oTag, "printable") else str(oTag)
+      if bVerbose:
+         print(f"INFO    - {sTag}: {sValue}")
+      dMetadata[sTag] = sValue
+
+   tCoordinates = fGetGpsCoordinates(dTags)
+   if tCoordinates is not None and None not in tCoordinates:
+      dMetadata["GPS Latitude"], dMetadata["GPS Longitude"] = (str(flValue) for flValue in tCoordinates)
+      if bVerbose:
+         fShowGpsInMap(dTags)
+
+def fExtractImageMetadataMmap(sFilePath: str, bVerbose: bool = True,
+                              bDetails: bool = BOOL_EXIF_DETAILS, bHeader: bytes = b"") -> Dict[str, str]:
+   """
+   Como fExtractImageMetadata, pero proyectando el archivo en memoria y
+   leyendo solo las regiones con EXIF: en un JPEG se pasa a exifread
+   únicamente el bloque TIFF del segmento APP1, y en TIFF/PNG la propia
+   proyección, de la que solo se leen las páginas de los IFD. Sin bDetails
+   no se decodifican MakerNote ni miniatura. Las coordenadas GPS se añaden
+   en decimal (GPS Latitude/GPS Longitude).
+   
+   Args:
+      sFilePath: Ruta al archivo de imagen (o archivo abierto, que se lee de memoria)
+      bVerbose: Mostrar los metadatos por consola y abrir el mapa GPS. En
+         modo silencioso (lotes) los errores se propagan al llamador
+      bDetails: Decodificar también MakerNote, SubIFDs y miniatura
+      bHeader: Principio del archivo ya leído (fDetectFileType). Si el
+         segmento APP1 de un JPEG cabe en él, el archivo no se vuelve a abrir
+      
+   Returns:
+      dict: Diccionario con los metadatos EXIF
+   """
+   dMetadata = {}
+   
+   try:
+      if bVerbose:
+         print(f"\nINFO    - Imagen Metadata: {sFilePath}")
+      
+      dTags = {}
+      bJpegHeader = bHeader[:2] == b"\xff\xd8"
+      tSpan = fFindJpegExif(bHeader) if bJpegHeader else None
+      if tSpan is not None and tSpan[1] <= len(bHeader):
+         dTags = exifread.process_file(io.BytesIO(bHeader[tSpan[0]:tSpan[1]]),
+                                       details=bDetails, extract_thumbnail=bDetails)
+      elif not bJpegHeader or tSpan is not None:
+         # Sin cabecera, formato sin APP1 (TIFF, HEIC...) o APP1 que no cabe en la cabecera
+         with fMapSource(sFilePath) as tMapped:
+            if tMapped is not None:
+               oData, oSource = tMapped
+               if oData[:2] == b"\xff\xd8":
+                  tSpan = fFindJpegExif(oData)
+                  bFound = tSpan is not None and tSpan[1] <= len(oData)
+                  oSource = io.BytesIO(oData[tSpan[0]:tSpan[1]]) if bFound else None
+               if oSource is not None:
+                  dTags = exifread.process_file(oSource, details=bDetails, extract_thumbnail=bDetails)
+
+      if dTags:
+         fAddExifTags(dTags, dMetadata, bVerbose)
+      elif bVerbose:
+         print("INFO    - No se encontraron metadatos EXIF.")
+      
+      return dMetadata
+   except Exception as e:
+      if not bVerbose:
+         raise
+      print(f"ERROR   - Error leyendo imagen: {e}")
+      return {}
+
+def fExtractPngMetadata(sFilePath: str, bVerbose: bool = True) -> Dict[str, str]:
+   """
+   Extrae los metadatos de un PNG recorriendo sus chunks: dimensiones
+   (IHDR), textos (tEXt, zTXt, iTXt), fecha (tIME) y EXIF (eXIf, con
+   exifread). Los datos de imagen se saltan sin leerlos.
+   
+   Args:
+      sFilePath: Ruta al archivo PNG
+      bVerbose: Mostrar los metadatos por consola. En modo silencioso
+         (lotes) los errores se propagan al llamador
+      
+   Returns:
+      dict: Diccionario con los metadatos del PNG
+   """
+   dMetadata = {}
+   
+   try:
+      if bVerbose:
+         print(f"\nINFO    - PNG Metadata: {sFilePath}")
+      
+      dTexts = {}
+      with fOpenSource(sFilePath) as file_obj:
+         file_obj.seek(8)
+         while True:
+            bHead = file_obj.read(8)
+            if len(bHead) < 8:
+               break
+            iLength, bType = struct.unpack(">I4s", bHead)
+            if bType == b"IEND":
+               break
+            if bType not in (b"IHDR", b"tEXt", b"zTXt", b"iTXt", b"tIME", b"eXIf") or iLength > INT_MAX_TEXT_FIELD:
+               file_obj.seek(iLength + 4, 1)
+               continue
+            bData = file_obj.read(iLength)
+            file_obj.seek(4, 1)
+
+            if bType == b"IHDR":
+               iWidth, iHeight, iDepth, iColor = struct.unpack(">IIBB", bData[:10])
+               dTexts.update({"PNG Width": str(iWidth), "PNG Height": str(iHeight),
+                              "PNG BitDepth": str(iDepth), "PNG ColorType": str(iColor)})
+            elif bType == b"tIME":
+               iYear, iMonth, iDay, iHour, iMinute, iSecond = struct.unpack(">HBBBBB", bData[:7])
+               dTexts["PNG ModifyTime"] = f"{iYear:04d}-{iMonth:02d}-{iDay:02d} {iHour:02d}:{iMinute:02d}:{iSecond:02d}"
+            elif bType == b"eXIf":
+               fAddExifTags(exifread.process_file(io.BytesIO(bData), details=BOOL_EXIF_DETAILS,
+                                                  extract_thumbnail=BOOL_EXIF_DETAILS), dMetadata, bVerbose)
+            else:
+               bKeyword, _, bRest = bData.partition(b"\x00")
+               if bType == b"tEXt":
+                  sText = bRest.decode("latin-1")
+               elif bType == b"zTXt":
+                  sText = zlib.decompress(bRest[1:]).decode("latin-1")
+               else:
+                  # iTXt: compresión, método, idioma y palabra clave traducida antes del texto UTF-8
+                  iCompressed = bRest[0]
+                  bText = bRest[2:].split(b"\x00", 2)[-1]
+                  sText = (zlib.decompress(bText) if iCompressed else bText).decode("utf-8", "replace")
+               dTexts[f"PNG {bKeyword.decode('latin-1')}"] = sText
+
+      for sKey, sValue in dTexts.items():
+         if bVerbose:
+            print(f"INFO    - {sKey}: {sValue}")
+         dMetadata[sKey] = sValue
+      
+      return dMetadata
+   except Exception as e:
+      if not bVerbose:
+         raise
+      print(f"ERROR   - Error leyendo PNG: {e}")
+      return {}
+
+def fExtractOdfMetadata(sFilePath: str, bVerbose: bool = True) -> Dict[str, str]:
+   """
+   Extrae los metadatos de un documento OpenDocument (ODT, ODS, ODP) de
+   su meta.xml: autor, fechas, aplicación, estadísticas y campos propios.
+   
+   Args:
+      sFilePath: Ruta al documento
+      bVerbose: Mostrar los metadatos por consola. En modo silencioso
+         (lotes) los errores se propagan al llamador
+      
+   Returns:
+      dict: Diccionario con los metadatos del documento
+   """
+   dMetadata = {}
+   
+   try:
+      if bVerbose:
+         print(f"\nINFO    - OpenDocument Metadata: {sFilePath}")
+      
+      with zipfile.ZipFile(sFilePath) as oZip:
+         oMeta = ET.fromstring(oZip.read("meta.xml")).find(STR_ODF_OFFICE_NS + "meta")
+      
+      for oNode in (oMeta if oMeta is not None else []):
+         sName = oNode.tag.rsplit("}", 1)[-1]
+         if sName == "document-statistic":
+            # Recuentos como atributos: page-count, paragraph-count...
+            for sAttr, sValue in oNode.attrib.items():
+               dMetadata[sAttr.rsplit("}", 1)[-1]] = sValue
+            continue
+         if sName == "user-defined":
+            sName = oNode.get(STR_ODF_META_NS + "name", sName)
+         sValue = (oNode.text or "").strip()
+         if not sValue:
+            continue
+         # meta:keyword se repite una vez por palabra clave
+         dMetadata[sName] = f"{dMetadata[sName]}, {sValue}" if sName in dMetadata else sValue
+      
+      if bVerbose:
+         for sKey, sValue in dMetadata.items():
+            print(f"INFO    - {sKey}: {sValue}")
+      
+      return dMetadata
+   except Exception as e:
+      if not bVerbose:
+         raise
+      print(f"ERROR   - Error leyendo OpenDocument: {e}")
+      return {}
+
+def fIterMp4Boxes(file_obj, iStart: int, iEnd: int) -> Iterator[Tuple[bytes, int, int]]:
+   """
+   Recorre las cajas (átomos) de MP4/MOV entre iStart e iEnd leyendo solo
+   sus cabeceras.
+   
+   Returns:
+      Iterator: (tipo, inicio de los datos, fin de la caja)
+   """
+   iPos = iStart
+   while iPos + 8 <= iEnd:
+      file_obj.seek(iPos)
+      bHead = file_obj.read(8)
+      if len(bHead) < 8:
+         return
+      iSize, bType = struct.unpack(">I4s", bHead)
+      iHeader = 8
+      if iSize == 1:
+         iSize = struct.unpack(">Q", file_obj.read(8))[0]
+         iHeader = 16
+      elif iSize == 0:
+         # La caja llega hasta el final del contenedor
+         iSize = iEnd - iPos
+      if iSize < iHeader:
+         return
+      yield bType, iPos + iHeader, min(iPos + iSize, iEnd)
+      iPos += iSize
+
+def fParseIso6709(sValue: str) -> Optional[Tuple[float, float]]:
+   """Latitud y longitud de una ubicación ISO 6709 como "+40.4168-003.7038/"."""
+   oMatch = re.match(r'([+-]\d+(?:\.\d+)?)([+-]\d+(?:\.\d+)?)', sValue)
+   return (float(oMatch.group(1)), float(oMatch.group(2))) if oMatch else None
+
+def fExtractMp4Metadata(sFilePath: str, bVerbose: bool = True) -> Dict[str, str]:
+   """
+   Extrae los metadatos de un vídeo MP4/MOV recorriendo el árbol de cajas
+   sin leer los datos multimedia: marca (ftyp), fechas y duración (mvhd),
+   número de pistas y textos de udta/ilst (fecha, cámara, software y
+   ubicación GPS).
+   
+   Args:
+      sFilePath: Ruta al vídeo
+      bVerbose: Mostrar los metadatos por consola. En modo silencioso
+         (lotes) los errores se propagan al llamador
+      
+   Returns:
+      dict: Diccionario con los metadatos del vídeo
+   """
+   dMetadata = {}
+
+   def fReadText(file_obj, iStart, iEnd):
+      file_obj.seek(iStart)
+      return file_obj.read(min(iEnd - iStart, INT_MAX_TEXT_FIELD))
+
+   def fMetaStart(file_obj, iData):
+      # En MP4 meta lleva versión y flags; en QuickTime empieza directamente con hdlr
+      return iData if fReadText(file_obj, iData + 4, iData + 8) == b"hdlr" else iData + 4
+
+   def fAddTextAtoms(file_obj, iStart, iEnd):
+      for bType, iData, iBoxEnd in fIterMp4Boxes(file_obj, iStart, iEnd):
+         sKey = DICT_MP4_TEXT_ATOMS.get(bType)
+         if bType == b"meta":
+            fAddTextAtoms(file_obj, fMetaStart(file_obj, iData), iBoxEnd)
+         elif bType == b"ilst":
+            fAddTextAtoms(file_obj, iData, iBoxEnd)
+         elif sKey is not None:
+            bValue = None
+            for bChild, iChildData, iChildEnd in fIterMp4Boxes(file_obj, iData, iBoxEnd):
+               if bChild == b"data":
+                  # Estilo iTunes: caja data con tipo y configuración regional antes del texto
+                  bValue = fReadText(file_obj, iChildData + 8, iChildEnd)
+               break
+            if bValue is None:
+               # Estilo QuickTime: longitud e idioma antes del texto
+               bRaw = fReadText(file_obj, iData, iBoxEnd)
+               bValue = bRaw[4:4 + struct.unpack(">H", bRaw[:2])[0]] if len(bRaw) >= 4 else b""
+            dMetadata[sKey] = bValue.decode("utf-8", "replace").strip("\x00 ")
+
+   try:
+      if bVerbose:
+         print(f"\nINFO    - Vídeo Metadata: {sFilePath}")
+      
+      with fOpenSource(sFilePath) as file_obj:
+         iFileSize = file_obj.seek(0, os.SEEK_END)
+         for bType, iData, iEnd in fIterMp4Boxes(file_obj, 0, iFileSize):
+            if bType == b"ftyp":
+               dMetadata["Brand"] = fReadText(file_obj, iData, iData + 4).decode("latin-1").strip()
+            elif bType == b"moov":
+               iTracks = 0
+               for bChild, iChildData, iChildEnd in fIterMp4Boxes(file_obj, iData, iEnd):
+                  if bChild == b"mvhd":
+                     bBox = fReadText(file_obj, iChildData, iChildEnd)
+                     if bBox[0] == 1:
+                        iCreated, iModified, iTimescale, iDuration = struct.unpack(">QQIQ", bBox[4:32])
+                     else:
+                        iCreated, iModified, iTimescale, iDuration = struct.unpack(">IIII", bBox[4:20])
+                     for sKey, iSeconds in (("CreationTime", iCreated), ("ModificationTime", iModified)):
+                        if iSeconds:
+                           dMetadata[sKey] = str(datetime.datetime.fromtimestamp(
+                              iSeconds - INT_MP4_EPOCH_OFFSET, datetime.timezone.utc))
+                     if iTimescale:
+                        dMetadata["Duration"] = f"{iDuration / iTimescale:.3f}"
+                  elif bChild == b"trak":
+                     iTracks += 1
+                  elif bChild == b"udta":
+                     fAddTextAtoms(file_obj, iChildData, iChildEnd)
+                  elif bChild == b"meta":
+                     fAddTextAtoms(file_obj, fMetaStart(file_obj, iChildData), iChildEnd)
+               dMetadata["TrackCount"] = str(iTracks)
+      
+      tCoordinates = fParseIso6709(dMetadata.get("Location", ""))
+      if tCoordinates is not None:
+         dMetadata["GPS Latitude"], dMetadata["GPS Longitude"] = (str(flValue) for flValue in tCoordinates)
+      
+      if bVerbose:
+         for sKey, sValue in dMetadata.items():
+            print(f"INFO    - {sKey}: {sValue}")
+      
+      return dMetadata
+   except Exception as e:
+      if not bVerbose:
+         raise
+      print(f"ERROR   - Error leyendo vídeo: {e}")
+      return {}
+
+def fExtractZipMetadata(sFilePath: str, bVerbose: bool = True) -> Dict[str, str]:
+   """
+   Extrae los metadatos de un ZIP desde su directorio central, sin
+   descomprimir nada: número y tamaño de los miembros, cifrados, fechas
+   extremas, comentario y los primeros nombres.
+   
+   Args:
+      sFilePath: Ruta al archivo ZIP
+      bVerbose: Mostrar los metadatos por consola. En modo silencioso
+         (lotes) los errores se propagan al llamador
+      
+   Returns:
+      dict: Diccionario con los metadatos del ZIP
+   """
+   dMetadata = {}
+   
+   try:
+      if bVerbose:
+         print(f"\nINFO    - ZIP Metadata: {sFilePath}")
+      
+      with zipfile.ZipFile(sFilePath) as oZip:
+         list_infos = oZip.infolist()
+         bComment = oZip.comment
+      
+      list_files = [oInfo for oInfo in list_infos if not oInfo.is_dir()]
+      dMetadata["MemberCount"] = str(len(list_files))
+      dMetadata["UncompressedSize"] = str(sum(oInfo.file_size for oInfo in list_files))
+      dMetadata["CompressedSize"] = str(sum(oInfo.compress_size for oInfo in list_files))
+      dMetadata["EncryptedMembers"] = str(sum(1 for oInfo in list_files if oInfo.flag_bits & 0x1))
+      if list_files:
+         list_dates = sorted(oInfo.date_time for oInfo in list_files)
+         dMetadata["OldestMember"] = str(datetime.datetime(*list_dates[0]))
+         dMetadata["NewestMember"] = str(datetime.datetime(*list_dates[-1]))
+         sMembers = "; ".join(oInfo.filename for oInfo in list_files[:INT_ZIP_LIST_MEMBERS])
+         if len(list_files) > INT_ZIP_LIST_MEMBERS:
+            sMembers += f"; ... (+{len(list_files) - INT_ZIP_LIST_MEMBERS})"
+         dMetadata["Members"] = sMembers
+      if bComment:
+         dMetadata["Comment"] = bComment.decode("utf-8", "replace")
+      
+      if bVerbose:
+         for sKey, sValue in dMetadata.items():
+            print(f"INFO    - {sKey}: {sValue}")
+      
+      return dMetadata
+   except Exception as e:
+      if not bVerbose:
+         raise
+      print(f"ERROR   - Error leyendo ZIP: {e}")
+      return {}
+
+def fExtractTarMetadata(sFilePath: str, bVerbose: bool = True) -> Dict[str, str]:
+   """
+   Extrae los metadatos de un TAR (también comprimido con gzip, bzip2 o
+   xz) leyendo en streaming las cabeceras de sus miembros, sin extraerlos:
+   número y tamaño de los miembros, fechas extremas, propietarios y los
+   primeros nombres.
+   
+   Args:
+      sFilePath: Ruta al archivo TAR
+      bVerbose: Mostrar los metadatos por consola. En modo silencioso
+         (lotes) los errores se propagan al llamador
+      
+   Returns:
+      dict: Diccionario con los metadatos del TAR
+   """
+   dMetadata = {}
+   
+   try:
+      if bVerbose:
+         print(f"\nINFO    - TAR Metadata: {sFilePath}")
+      
+      iMembers = iSize = 0
+      iOldest = iNewest = None
+      list_names = []
+      set_owners = set()
+      with fOpenSource(sFilePath) as file_obj, tarfile.open(fileobj=file_obj, mode="r|*") as oTar:
+         for oInfo in oTar:
+            if not oInfo.isfile():
+               continue
+            iMembers += 1
+            iSize += oInfo.size
+            iOldest = oInfo.mtime if iOldest is None else min(iOldest, oInfo.mtime)
+            iNewest = oInfo.mtime if iNewest is None else max(iNewest, oInfo.mtime)
+            set_owners.add(f"{oInfo.uname or oInfo.uid}:{oInfo.gname or oInfo.gid}")
+            if len(list_names) < INT_ZIP_LIST_MEMBERS:
+               list_names.append(oInfo.name)
+      
+      dMetadata["MemberCount"] = str(iMembers)
+      dMetadata["UncompressedSize"] = str(iSize)
+      if iMembers:
+         for sKey, iSeconds in (("OldestMember", iOldest), ("NewestMember", iNewest)):
+            dMetadata[sKey] = str(datetime.datetime.fromtimestamp(int(iSeconds), datetime.timezone.utc))
+         dMetadata["Owners"] = ", ".join(sorted(set_owners))
+         sMembers = "; ".join(list_names)
+         if iMembers > INT_ZIP_LIST_MEMBERS:
+            sMembers += f"; ... (+{iMembers - INT_ZIP_LIST_MEMBERS})"
+         dMetadata["Members"] = sMembers
+      
+      if bVerbose:
+         for sKey, sValue in dMetadata.items():
+            print(f"INFO    - {sKey}: {sValue}")
+      
+      return dMetadata
+   except Exception as e:
+      if not bVerbose:
+         raise
+      print(f"ERROR   - Error leyendo TAR: {e}")
+      return {}
+
 
 def fSaveMetadataJson(dMetadata: Dict[str, str], sFilePath: str) -> Optional[str]:
    """
@@ -251,9 +1234,11 @@ def fSaveMetadataJson(dMetadata: Dict[str, str], sFilePath: str) -> Optional[str
       # Crear directorio de salida si no existe
       os.makedirs(STR_OUTPUT_DIR, exist_ok=True)
       
-      # Crear nombre de archivo basado en el nombre original
+      # Crear nombre de archivo basado en el nombre original y en su ruta
+      # completa, para que archivos homónimos de otras carpetas no se sobrescriban
       sBaseName = os.path.splitext(os.path.basename(sFilePath))[0]
-      sJsonFile = os.path.join(STR_OUTPUT_DIR, f"{sBaseName}_metadata.json")
+      sPathId = hashlib.blake2b(os.path.abspath(sFilePath).encode("utf-8"), digest_size=4).hexdigest()
+      sJsonFile = os.path.join(STR_OUTPUT_DIR, f"{sBaseName}_{sPathId}_metadata.json")
       
       # Guardar metadatos en formato JSON
       with open(sJsonFile, 'w', encoding='utf-8') as file_out:
@@ -266,10 +1251,1226 @@ def fSaveMetadataJson(dMetadata: Dict[str, str], sFilePath: str) -> Optional[str
       return None
 
 
+# -----------------------
+# Detección del tipo y registro de extractores
+# -----------------------
+def fExtractImage(sFilePath: str, bVerbose: bool, bHeader: bytes) -> Dict[str, str]:
+   if BOOL_MMAP_EXIF:
+      return fExtractImageMetadataMmap(sFilePath, bVerbose, bHeader=bHeader)
+   return fExtractImageMetadata(sFilePath, bVerbose)
+
+# Extractores por tipo de archivo: fnExtract(ruta, bVerbose, cabecera) -> metadatos.
+# En lugar de la ruta pueden recibir un archivo abierto (miembro de un ZIP/TAR
+# en memoria), así que lo abren con fOpenSource. Se amplía con fRegisterExtractor
+# sin tocar fExtractMetadata
+DICT_EXTRACTORS: Dict[str, Callable[[str, bool, bytes], Dict[str, str]]] = {
+   "pdf": lambda sFilePath, bVerbose, bHeader:
+      (fExtractPdfMetadataLazy if BOOL_LAZY_METADATA else fExtractPdfMetadata)(sFilePath, bVerbose),
+   "docx": lambda sFilePath, bVerbose, bHeader:
+      (fExtractDocxMetadataLazy if BOOL_LAZY_METADATA else fExtractDocxMetadata)(sFilePath, bVerbose),
+   "xlsx": lambda sFilePath, bVerbose, bHeader: fExtractOoxmlMetadata(sFilePath, bVerbose, "Excel"),
+   "pptx": lambda sFilePath, bVerbose, bHeader: fExtractOoxmlMetadata(sFilePath, bVerbose, "PowerPoint"),
+   "odt": lambda sFilePath, bVerbose, bHeader: fExtractOdfMetadata(sFilePath, bVerbose),
+   "ods": lambda sFilePath, bVerbose, bHeader: fExtractOdfMetadata(sFilePath, bVerbose),
+   "odp": lambda sFilePath, bVerbose, bHeader: fExtractOdfMetadata(sFilePath, bVerbose),
+   "jpeg": fExtractImage,
+   "tiff": fExtractImage,
+   "heic": fExtractImage,
+   "png": lambda sFilePath, bVerbose, bHeader: fExtractPngMetadata(sFilePath, bVerbose),
+   "mp4": lambda sFilePath, bVerbose, bHeader: fExtractMp4Metadata(sFilePath, bVerbose),
+   "zip": lambda sFilePath, bVerbose, bHeader: fExtractZipMetadata(sFilePath, bVerbose),
+   "tar": lambda sFilePath, bVerbose, bHeader: fExtractTarMetadata(sFilePath, bVerbose),
+}
+
+# Firmas (desplazamiento, bytes, tipo) en orden de prioridad. Desplazamiento
+# None = en cualquier punto del primer KB (los PDF pueden llevar basura delante)
+LIST_SIGNATURES: List[Tuple[Optional[int], bytes, str]] = [
+   (0, b"\xff\xd8\xff", "jpeg"),
+   (0, b"\x89PNG\r\n\x1a\n", "png"),
+   (0, b"II*\x00", "tiff"),
+   (0, b"MM\x00*", "tiff"),
+   (8, b"heic", "heic"),
+   (8, b"heix", "heic"),
+   (8, b"mif1", "heic"),
+   (4, b"ftyp", "mp4"),
+   (4, b"moov", "mp4"),
+   (4, b"wide", "mp4"),
+   (0, b"PK\x03\x04", "zip"),
+   (257, b"ustar", "tar"),
+   (None, b"%PDF-", "pdf"),
+   # gzip, bzip2 y xz: solo son "tar" si lo que contienen es un TAR (fDetectTarType)
+   (0, b"\x1f\x8b", "tar"),
+   (0, b"BZh", "tar"),
+   (0, b"\xfd7zXZ\x00", "tar"),
+]
+
+# Formatos basados en ZIP: miembro que los identifica -> tipo
+DICT_ZIP_MARKERS = {
+   "word/document.xml": "docx",
+   "xl/workbook.xml": "xlsx",
+   "ppt/presentation.xml": "pptx",
+}
+# OpenDocument: el primer miembro es "mimetype", sin comprimir, con el tipo
+DICT_ODF_MIMETYPES = {
+   "application/vnd.oasis.opendocument.text": "odt",
+   "application/vnd.oasis.opendocument.spreadsheet": "ods",
+   "application/vnd.oasis.opendocument.presentation": "odp",
+}
+
+# Extensión -> tipo esperado (filtro del modo por lotes y aviso si no coincide con el contenido)
+DICT_EXTENSION_TYPES = {
+   ".pdf": "pdf", ".docx": "docx", ".xlsx": "xlsx", ".pptx": "pptx",
+   ".odt": "odt", ".ods": "ods", ".odp": "odp",
+   ".jpg": "jpeg", ".jpeg": "jpeg", ".png": "png", ".tif": "tiff", ".tiff": "tiff", ".heic": "heic",
+   ".mp4": "mp4", ".m4v": "mp4", ".mov": "mp4",
+   ".zip": "zip",
+   ".tar": "tar", ".tgz": "tar", ".gz": "tar", ".tbz2": "tar", ".bz2": "tar", ".txz": "tar", ".xz": "tar",
+}
+
+def fRegisterExtractor(sType: str, fnExtract: Callable[[str, bool, bytes], Dict[str, str]],
+                       list_signatures: Iterable[Tuple[Optional[int], bytes]] = (),
+                       list_extensions: Iterable[str] = (), list_zip_markers: Iterable[str] = ()) -> None:
+   """
+   Añade (o reemplaza) el extractor de un tipo de archivo. Sus firmas
+   tienen prioridad sobre las existentes. En el modo por lotes hay que
+   registrarlo antes de crear el pool de procesos.
+   
+   Args:
+      sType: Nombre del tipo
+      fnExtract: Función (ruta, bVerbose, cabecera) -> metadatos
+      list_signatures: Firmas (desplazamiento, bytes) que lo identifican
+      list_extensions: Extensiones habituales (con punto)
+      list_zip_markers: Miembros que lo identifican si es un formato basado en ZIP
+   """
+   DICT_EXTRACTORS[sType] = fnExtract
+   LIST_SIGNATURES[:0] = [(iOffset, bMagic, sType) for iOffset, bMagic in list_signatures]
+   DICT_EXTENSION_TYPES.update((sExt.lower(), sType) for sExt in list_extensions)
+   DICT_ZIP_MARKERS.update((sMarker, sType) for sMarker in list_zip_markers)
+
+def fDetectZipType(sFilePath: str, bHeader: bytes) -> str:
+   """Distingue los formatos basados en ZIP (OpenDocument, DOCX, XLSX...) de un ZIP normal."""
+   # OpenDocument: nombre "mimetype" en la cabecera local (byte 30) y su contenido en el 38
+   if bHeader[30:38] == b"mimetype":
+      for sMimetype, sType in DICT_ODF_MIMETYPES.items():
+         if bHeader.startswith(sMimetype.encode("ascii"), 38):
+            return sType
+   try:
+      with zipfile.ZipFile(sFilePath) as oZip:
+         set_names = set(oZip.namelist())
+   except zipfile.BadZipFile:
+      return "zip"
+   for sMarker, sType in DICT_ZIP_MARKERS.items():
+      if sMarker in set_names:
+         return sType
+   return "zip"
+
+def fDetectTarType(sFilePath: str, bHeader: bytes) -> Optional[str]:
+   """Un archivo comprimido es "tar" si su primer miembro es una cabecera TAR válida."""
+   if bHeader.startswith(b"ustar", 257):
+      return "tar"
+   try:
+      with fOpenSource(sFilePath) as file_obj, tarfile.open(fileobj=file_obj, mode="r|*") as oTar:
+         oTar.next()
+   except (tarfile.TarError, EOFError, OSError):
+      return None
+   return "tar"
+
+def fDetectFileType(sFilePath: str) -> Tuple[Optional[str], bytes]:
+   """
+   Detecta el tipo de archivo por su firma (magic bytes), sin fiarse de la
+   extensión. Se lee una sola vez el principio del archivo y se devuelve
+   para que el extractor lo reutilice.
+   
+   Args:
+      sFilePath: Ruta al archivo o archivo abierto en binario
+      
+   Returns:
+      tuple: (tipo o None si no se reconoce, primeros INT_HEADER_BYTES bytes)
+   """
+   with fOpenSource(sFilePath) as file_obj:
+      bHeader = file_obj.read(INT_HEADER_BYTES)
+   for iOffset, bMagic, sType in LIST_SIGNATURES:
+      if bHeader.startswith(bMagic, iOffset) if iOffset is not None else bMagic in bHeader[:1024]:
+         if sType == "zip":
+            sType = fDetectZipType(sFilePath, bHeader)
+         elif sType == "tar":
+            sType = fDetectTarType(sFilePath, bHeader)
+         return sType, bHeader
+   return None, bHeader
+
+def fExtractMetadata(sFilePath: str, bVerbose: bool = True, sType: Optional[str] = None,
+                     bHeader: Optional[bytes] = None) -> Dict[str, str]:
+   """
+   Selecciona el extractor adecuado según el tipo detectado por la firma.
+   
+   Args:
+      sFilePath: Ruta al archivo
+      bVerbose: Se pasa al extractor (False = sin salida y con excepciones)
+      sType: Tipo ya detectado con fDetectFileType (None = detectarlo)
+      bHeader: Cabecera devuelta por fDetectFileType junto con sType
+      
+   Returns:
+      dict: Metadatos extraídos (vacío si el tipo no está soportado)
+   """
+   if sType is None:
+      sType, bHeader = fDetectFileType(sFilePath)
+   fnExtract = DICT_EXTRACTORS.get(sType)
+   if fnExtract is None:
+      return {}
+   return fnExtract(sFilePath, bVerbose, bHeader or b"")
+
+# -----------------------
+# Análisis del contenido
+# -----------------------
+def fIterPdfText(sFilePath: str) -> Iterator[Tuple[str, str]]:
+   """
+   Devuelve el texto del PDF página a página, sin acumularlo. PdfReader
+   guarda en caché los objetos que va leyendo, así que se recrea cada
+   INT_PDF_PAGES_PER_READER páginas para que la memoria no crezca con el
+   tamaño del documento.
+   
+   Args:
+      sFilePath: Ruta al archivo PDF
+      
+   Returns:
+      Iterator: Pares ("Página N", texto)
+   """
+   with fOpenSource(sFilePath) as file_obj:
+      oReader = PdfReader(file_obj)
+      for iPage in range(len(oReader.pages)):
+         if iPage and iPage % INT_PDF_PAGES_PER_READER == 0:
+            oReader = PdfReader(file_obj)
+         yield f"Página {iPage + 1}", oReader.pages[iPage].extract_text() or ""
+
+def fIterDocxText(sFilePath: str) -> Iterator[Tuple[str, str]]:
+   """
+   Devuelve el texto del DOCX párrafo a párrafo (incluidos los de las
+   tablas) leyendo word/document.xml en streaming con iterparse, sin
+   construir el documento completo como hace Document().
+   
+   Args:
+      sFilePath: Ruta al archivo DOCX
+      
+   Returns:
+      Iterator: Pares ("Párrafo N" o "Tabla N", texto)
+   """
+   sParagraphTag, sTableTag, sTextTag = (STR_WORD_NS + sTag for sTag in ("p", "tbl", "t"))
+   with zipfile.ZipFile(sFilePath) as oZip, oZip.open("word/document.xml") as file_xml:
+      list_stack = []
+      iParagraph = iTable = iTableDepth = 0
+      for sEvent, oElem in ET.iterparse(file_xml, events=("start", "end")):
+         if sEvent == "start":
+            list_stack.append(oElem)
+            if oElem.tag == sTableTag:
+               iTableDepth += 1
+               if iTableDepth == 1:
+                  iTable += 1
+            continue
+
+         list_stack.pop()
+         if oElem.tag == sParagraphTag:
+            iParagraph += 1
+            sText = "".join(oNode.text or "" for oNode in oElem.iter(sTextTag))
+            if sText:
+               yield (f"Tabla {iTable}" if iTableDepth else f"Párrafo {iParagraph}"), sText
+         elif oElem.tag == sTableTag:
+            iTableDepth -= 1
+         # Soltar los bloques del cuerpo ya leídos (la pila es [document, body])
+         if len(list_stack) == 2:
+            list_stack[-1].remove(oElem)
+
+# Lectores de contenido por tipo de archivo
+DICT_CONTENT_READERS = {
+   "pdf": fIterPdfText,
+   "docx": fIterDocxText,
+}
+
+def fHasContent(sFilePath: str, sType: Optional[str] = None) -> bool:
+   """Indica si hay un lector de contenido para el tipo de archivo (sin sType, el de su extensión)."""
+   if sType is None:
+      sType = DICT_EXTENSION_TYPES.get(os.path.splitext(sFilePath)[1].lower())
+   return sType in DICT_CONTENT_READERS
+
+def fScanDocumentContent(sFilePath: str, iMaxFindings: int = INT_MAX_CONTENT_FINDINGS,
+                         bVerbose: bool = True, sType: Optional[str] = None) -> List[SensitiveFinding]:
+   """
+   Busca datos sensibles en el texto del documento, leyéndolo por páginas
+   o párrafos para que la memoria no dependa de su tamaño. Deja de leer al
+   llegar a iMaxFindings hallazgos.
+   
+   Args:
+      sFilePath: Ruta al documento (PDF o DOCX)
+      iMaxFindings: Límite de hallazgos (0 = leer el documento completo)
+      bVerbose: Avisar por consola. En modo silencioso (lotes) los errores
+         se propagan al llamador
+      sType: Tipo detectado con fDetectFileType (None = el de la extensión)
+      
+   Returns:
+      list: Hallazgos; la clave indica la página, párrafo o tabla
+   """
+   if sType is None:
+      sType = DICT_EXTENSION_TYPES.get(os.path.splitext(sFilePath)[1].lower())
+   fnReader = DICT_CONTENT_READERS.get(sType)
+   if fnReader is None:
+      return []
+
+   list_findings = []
+   iterText = fnReader(sFilePath)
+   try:
+      for sKey, sText in iterText:
+         list_findings.extend(O_SENSITIVE_DETECTOR.fScanValue(sKey, sText))
+         if iMaxFindings and len(list_findings) >= iMaxFindings:
+            del list_findings[iMaxFindings:]
+            if bVerbose:
+               print(f"INFO    - Alcanzado el límite de {iMaxFindings} hallazgos: se deja de leer el contenido")
+            break
+   except Exception as e:
+      if not bVerbose:
+         raise
+      print(f"ERROR   - Error leyendo el contenido: {e}")
+   finally:
+      iterText.close()
+   return list_findings
+
+# -----------------------
+# Archivos comprimidos (ZIP y TAR)
+# -----------------------
+def fIterZipMembers(sFilePath: str) -> Iterator[Tuple[str, int, Callable[[int], bytes]]]:
+   """
+   Miembros de un ZIP desde su directorio central.
+   
+   Returns:
+      Iterator: (nombre, tamaño declarado, función que lee como mucho N bytes)
+   """
+   with fOpenSource(sFilePath) as file_obj, zipfile.ZipFile(file_obj) as oZip:
+      for oInfo in oZip.infolist():
+         if oInfo.is_dir():
+            continue
+
+         def fRead(iMax: int, oInfo: zipfile.ZipInfo = oInfo) -> bytes:
+            with oZip.open(oInfo) as file_member:
+               return file_member.read(iMax)
+         yield oInfo.filename, oInfo.file_size, fRead
+
+def fIterTarMembers(sFilePath: str) -> Iterator[Tuple[str, int, Callable[[int], bytes]]]:
+   """
+   Miembros de un TAR (comprimido o no) leído en streaming: cada miembro
+   hay que leerlo antes de pasar al siguiente.
+   
+   Returns:
+      Iterator: (nombre, tamaño declarado, función que lee como mucho N bytes)
+   """
+   with fOpenSource(sFilePath) as file_obj, tarfile.open(fileobj=file_obj, mode="r|*") as oTar:
+      for oInfo in oTar:
+         if not oInfo.isfile():
+            continue
+         yield oInfo.name, oInfo.size, lambda iMax, oInfo=oInfo: oTar.extractfile(oInfo).read(iMax)
+
+# Lectores de miembros por tipo de archivo comprimido
+DICT_ARCHIVE_READERS = {
+   "zip": fIterZipMembers,
+   "tar": fIterTarMembers,
+}
+
+def fAnalyzeSource(sFilePath: Union[str, BinaryIO], bScanContent: bool = False, sType: Optional[str] = None,
+                   bHeader: Optional[bytes] = None) -> Tuple[Optional[str], Dict[str, str], Optional[List[Dict[str, Any]]]]:
+   """
+   Detecta el tipo, extrae los metadatos y, si se pide, busca datos
+   sensibles en el contenido, sin salida por consola. Los errores se
+   propagan al llamador.
+   
+   Args:
+      sFilePath: Ruta al archivo o archivo abierto en binario
+      bScanContent: Buscar también datos sensibles en el texto (PDF y DOCX)
+      sType: Tipo ya detectado con fDetectFileType (sin bHeader = detectarlo)
+      bHeader: Cabecera devuelta por fDetectFileType junto con sType
+      
+   Returns:
+      tuple: (tipo o None, metadatos, hallazgos del contenido o None si no se analizó)
+   """
+   if bHeader is None:
+      sType, bHeader = fDetectFileType(sFilePath)
+   dMetadata = fExtractMetadata(sFilePath, False, sType, bHeader) if sType is not None else {}
+   list_content_findings = None
+   if bScanContent and sType in DICT_CONTENT_READERS:
+      list_content_findings = [oFinding._asdict() for oFinding in
+                               fScanDocumentContent(sFilePath, bVerbose=False, sType=sType)]
+   return sType, dMetadata, list_content_findings
+
+def fIterArchiveResults(sFilePath: Union[str, BinaryIO], sArchivePath: str, sType: str,
+                        bScanContent: bool = False, bAllFiles: bool = BOOL_BATCH_ALL_FILES,
+                        iDepth: int = 1, dict_budget: Optional[Dict[str, int]] = None) -> Iterator[Dict[str, Any]]:
+   """
+   Analiza los miembros de un ZIP o TAR sin extraerlos a disco: cada uno
+   se lee en memoria y se pasa abierto a su extractor. Los ZIP y TAR
+   anidados se recorren hasta INT_ARCHIVE_MAX_DEPTH niveles. Un miembro de
+   más de INT_ARCHIVE_MAX_MEMBER bytes se marca como error sin leerlo, y al
+   superar INT_ARCHIVE_MAX_TOTAL bytes o INT_ARCHIVE_MAX_MEMBERS miembros
+   (contando los anidados) se deja de recorrer el archivo.
+   
+   Args:
+      sFilePath: Ruta al archivo comprimido o archivo abierto en binario
+      sArchivePath: Ruta con la que se informan sus miembros ("archivo!miembro")
+      sType: Tipo del archivo comprimido ("zip" o "tar")
+      bScanContent: Buscar también datos sensibles en el texto de los documentos
+      bAllFiles: Analizar todos los miembros, no solo los de extensiones conocidas
+      iDepth: Nivel de anidamiento del archivo (1 = el analizado)
+      dict_budget: Bytes y miembros ya leídos en este árbol (uso interno)
+      
+   Returns:
+      Iterator: Resultados con el mismo formato que fBatchWorker. Si el
+      archivo no se puede recorrer hasta el final, el último resultado es
+      un error con la ruta "archivo!"
+   """
+   if dict_budget is None:
+      dict_budget = {"iBytes": 0, "iMembers": 0, "bExhausted": False}
+
+   def fResult(sPath, sMemberType=None, dMetadata=None, sError=None, flSeconds=None,
+               list_content_findings=None, sHash=None):
+      return {"file": sPath, "type": sMemberType, "metadata": dMetadata or {}, "error": sError,
+              "seconds": flSeconds, "content_findings": list_content_findings, "hash": sHash}
+
+   try:
+      for sName, iSize, fnRead in DICT_ARCHIVE_READERS[sType](sFilePath):
+         if dict_budget["bExhausted"]:
+            return
+         sMemberPath = f"{sArchivePath}{STR_ARCHIVE_SEPARATOR}{sName}"
+         sExt = os.path.splitext(sName)[1].lower()
+         if not bAllFiles and sExt not in DICT_EXTENSION_TYPES:
+            continue
+         if dict_budget["iMembers"] >= INT_ARCHIVE_MAX_MEMBERS or dict_budget["iBytes"] >= INT_ARCHIVE_MAX_TOTAL:
+            dict_budget["bExhausted"] = True
+            yield fResult(sMemberPath, sError=f"ArchiveLimit: superado el límite de {INT_ARCHIVE_MAX_MEMBERS} "
+                                              f"miembros o {INT_ARCHIVE_MAX_TOTAL} bytes; no se sigue leyendo")
+            return
+         dict_budget["iMembers"] += 1
+         if iSize > INT_ARCHIVE_MAX_MEMBER:
+            yield fResult(sMemberPath, sError=f"ArchiveLimit: miembro de {iSize} bytes "
+                                              f"(límite {INT_ARCHIVE_MAX_MEMBER})")
+            continue
+
+         flStart = time.perf_counter()
+         fRearmTimeout()
+         sMemberType = None
+         sHash = None
+         try:
+            # El tamaño declarado puede mentir: nunca se lee más del límite
+            bData = fnRead(INT_ARCHIVE_MAX_MEMBER + 1)
+            dict_budget["iBytes"] += len(bData)
+            if len(bData) > INT_ARCHIVE_MAX_MEMBER:
+               yield fResult(sMemberPath, sError=f"ArchiveLimit: miembro de más de {INT_ARCHIVE_MAX_MEMBER} bytes")
+               continue
+            sHash = hashlib.blake2b(bData).hexdigest()
+            oMember = io.BytesIO(bData)
+            # El tipo se detecta aparte para conservarlo aunque falle la extracción
+            sMemberType, bHeader = fDetectFileType(oMember)
+            _, dMetadata, list_content_findings = fAnalyzeSource(oMember, bScanContent, sMemberType, bHeader)
+         except Exception as e:
+            # Miembro cifrado, corrupto o que agota el tiempo: se informa y se sigue con el resto
+            yield fResult(sMemberPath, sMemberType, sError=f"{type(e).__name__}: {e}", sHash=sHash)
+            continue
+         yield fResult(sMemberPath, sMemberType, dMetadata, None, round(time.perf_counter() - flStart, 4),
+                       list_content_findings, sHash)
+
+         if sMemberType in DICT_ARCHIVE_READERS and iDepth < INT_ARCHIVE_MAX_DEPTH:
+            yield from fIterArchiveResults(oMember, sMemberPath, sMemberType, bScanContent, bAllFiles,
+                                           iDepth + 1, dict_budget)
+   except Exception as e:
+      yield fResult(sArchivePath + STR_ARCHIVE_SEPARATOR, sError=f"{type(e).__name__}: {e}")
+
+# -----------------------
+# Caché de metadatos
+# -----------------------
+def fHashFile(sFilePath: str) -> str:
+   """
+   Calcula el hash BLAKE2b del contenido de un archivo leyendo por bloques.
+   
+   Args:
+      sFilePath: Ruta al archivo
+      
+   Returns:
+      str: Hash en hexadecimal
+   """
+   oHash = hashlib.blake2b()
+   with open(sFilePath, 'rb') as file_obj:
+      for bChunk in iter(lambda: file_obj.read(INT_HASH_CHUNK), b""):
+         oHash.update(bChunk)
+   return oHash.hexdigest()
+
+class MetadataCache:
+   """
+   Caché persistente (SQLite) de los metadatos ya extraídos, indexada por
+   (ruta, tamaño, fecha de modificación). Un archivo que no ha cambiado no
+   se vuelve a analizar, y si se guarda el hash del contenido los
+   duplicados se resuelven sin analizarlos. Los miembros de un ZIP/TAR se
+   guardan como "archivo!miembro" con el tamaño y la fecha del archivo.
+   Cada entrada guarda también el tipo detectado por la firma, que es el
+   que decide si le falta el análisis del contenido o de los miembros.
+   """
+
+   def __init__(self, sDbPath: str = STR_CACHE_FILE):
+      sDir = os.path.dirname(os.path.abspath(sDbPath))
+      os.makedirs(sDir, exist_ok=True)
+      self.sDbPath = sDbPath
+      self.oConn = sqlite3.connect(sDbPath)
+      self.oConn.execute("PRAGMA journal_mode=WAL")
+      self.oConn.execute("PRAGMA synchronous=NORMAL")
+      self.oConn.execute(
+         "CREATE TABLE IF NOT EXISTS files ("
+         " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+         " hash TEXT, metadata TEXT NOT NULL, error TEXT, content_findings TEXT, member_count INTEGER, type TEXT)")
+      # Cachés creadas antes del análisis del contenido, de los miembros de los archivos comprimidos
+      # o del tipo detectado
+      set_columns = {tRow[1] for tRow in self.oConn.execute("PRAGMA table_info(files)")}
+      if "content_findings" not in set_columns:
+         self.oConn.execute("ALTER TABLE files ADD COLUMN content_findings TEXT")
+      if "member_count" not in set_columns:
+         self.oConn.execute("ALTER TABLE files ADD COLUMN member_count INTEGER")
+      if "type" not in set_columns:
+         self.oConn.execute("ALTER TABLE files ADD COLUMN type TEXT")
+      self.oConn.execute("CREATE INDEX IF NOT EXISTS idx_files_hash ON files(hash)")
+      self.oConn.commit()
+      self.iPendingWrites = 0
+
+   def fGet(self, sFilePath: str, iSize: int, iMtimeNs: int) -> Optional[Dict[str, Any]]:
+      """
+      Devuelve el resultado guardado si el archivo no ha cambiado.
+      
+      Returns:
+         dict: Metadatos, error, hash, hallazgos del contenido (None si no
+         se analizó), número de miembros (None si no se recorrieron) y tipo
+         (None si no se reconoció o la entrada es anterior a guardarlo)
+         guardados, o None si no hay entrada válida
+      """
+      tRow = self.oConn.execute(
+         "SELECT metadata, error, hash, content_findings, member_count, type FROM files"
+         " WHERE path = ? AND size = ? AND mtime_ns = ?",
+         (sFilePath, iSize, iMtimeNs)).fetchone()
+      if tRow is None:
+         return None
+      return {"metadata": json.loads(tRow[0]), "error": tRow[1], "hash": tRow[2],
+              "content_findings": json.loads(tRow[3]) if tRow[3] is not None else None,
+              "member_count": tRow[4], "type": tRow[5]}
+
+   def fGetMembers(self, sArchivePath: str, iSize: int, iMtimeNs: int) -> List[Dict[str, Any]]:
+      """
+      Resultados guardados de los miembros (también anidados) de un archivo
+      comprimido sin cambios, con el mismo formato que fGet más su ruta.
+      """
+      # Rango de claves "archivo!..." (el carácter siguiente a "!" es '"'), resuelto con el índice
+      sPrefix = sArchivePath + STR_ARCHIVE_SEPARATOR
+      sEnd = sArchivePath + chr(ord(STR_ARCHIVE_SEPARATOR) + 1)
+      list_rows = self.oConn.execute(
+         "SELECT path, metadata, error, hash, content_findings, type FROM files"
+         " WHERE path >= ? AND path < ? AND size = ? AND mtime_ns = ? ORDER BY path",
+         (sPrefix, sEnd, iSize, iMtimeNs)).fetchall()
+      return [{"file": tRow[0], "metadata": json.loads(tRow[1]), "error": tRow[2], "hash": tRow[3],
+               "content_findings": json.loads(tRow[4]) if tRow[4] is not None else None, "type": tRow[5]}
+              for tRow in list_rows]
+
+   def fGetByHash(self, sHash: str, bContent: bool = False) -> Optional[Dict[str, Any]]:
+      """
+      Busca un archivo con el mismo contenido ya analizado sin errores.
+      
+      Args:
+         sHash: Hash del contenido
+         bContent: Exigir que también se haya analizado su contenido
+      
+      Returns:
+         dict: Metadatos, hallazgos del contenido y tipo del duplicado, o None si no hay ninguno
+      """
+      sQuery = "SELECT metadata, content_findings, type FROM files WHERE hash = ? AND error IS NULL"
+      if bContent:
+         sQuery += " AND content_findings IS NOT NULL"
+      tRow = self.oConn.execute(sQuery + " LIMIT 1", (sHash,)).fetchone()
+      if tRow is None:
+         return None
+      return {"metadata": json.loads(tRow[0]),
+              "content_findings": json.loads(tRow[1]) if tRow[1] is not None else None, "type": tRow[2]}
+
+   def fPut(self, sFilePath: str, iSize: int, iMtimeNs: int, dMetadata: Dict[str, str],
+            sError: Optional[str] = None, sHash: Optional[str] = None,
+            list_content_findings: Optional[List[Dict[str, Any]]] = None, iMemberCount: Optional[int] = None,
+            sType: Optional[str] = None) -> None:
+      """Guarda (o reemplaza) el resultado de un archivo. Las escrituras se agrupan en transacciones."""
+      sContent = json.dumps(list_content_findings, ensure_ascii=False) if list_content_findings is not None else None
+      self.oConn.execute(
+         "INSERT OR REPLACE INTO files (path, size, mtime_ns, hash, metadata, error, content_findings, member_count,"
+         " type) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+         (sFilePath, iSize, iMtimeNs, sHash, json.dumps(dMetadata, ensure_ascii=False), sError, sContent,
+          iMemberCount, sType))
+      self.iPendingWrites += 1
+      if self.iPendingWrites >= INT_CACHE_COMMIT_EVERY:
+         self.fCommit()
+
+   def fCommit(self) -> None:
+      self.oConn.commit()
+      self.iPendingWrites = 0
+
+   def fClose(self) -> None:
+      self.fCommit()
+      self.oConn.close()
+
+   def __enter__(self) -> "MetadataCache":
+      return self
+
+   def __exit__(self, *tExc) -> None:
+      self.fClose()
+
+# -----------------------
+# Salida consolidada del lote
+# -----------------------
+class JsonlSink:
+   """
+   Salida del lote en un único archivo JSON Lines: un resultado por línea,
+   con la ruta completa y el hash del archivo como claves. Las líneas se
+   acumulan en un búfer grande, sin abrir, cerrar ni sincronizar un archivo
+   por cada resultado.
+   """
+
+   def __init__(self, sPath: str, iBuffer: int = INT_SINK_BUFFER):
+      self.sPath = sPath
+      self.file_out = open(sPath, 'w', encoding='utf-8', buffering=iBuffer)
+
+   def fWrite(self, dResult: Dict[str, Any]) -> None:
+      self.file_out.write(json.dumps(dResult, ensure_ascii=False) + "\n")
+
+   def fClose(self) -> None:
+      self.file_out.close()
+
+   def __enter__(self) -> "JsonlSink":
+      return self
+
+   def __exit__(self, *tExc) -> None:
+      self.fClose()
+
+class SqliteSink:
+   """
+   Salida del lote en una base de datos SQLite para consultar casos grandes:
+   la tabla results guarda un resultado por ruta completa (con índice por
+   hash) y la tabla metadata cada campo como (ruta, clave, valor), indexada
+   por clave y valor, p. ej. para buscar todos los documentos de un autor.
+   Los resultados se insertan en bloque, INT_SINK_BATCH por transacción.
+   Volver a analizar un archivo reemplaza su resultado anterior.
+   """
+
+   def __init__(self, sPath: str, iBatch: int = INT_SINK_BATCH):
+      self.sPath = sPath
+      self.iBatch = iBatch
+      self.list_pending = []
+      self.oConn = sqlite3.connect(sPath)
+      self.oConn.execute("PRAGMA journal_mode=WAL")
+      self.oConn.execute("PRAGMA synchronous=NORMAL")
+      self.oConn.execute(
+         "CREATE TABLE IF NOT EXISTS results ("
+         " path TEXT PRIMARY KEY, hash TEXT, type TEXT, error TEXT, seconds REAL, cached INTEGER NOT NULL,"
+         " metadata TEXT NOT NULL, findings TEXT NOT NULL, content_findings TEXT)")
+      self.oConn.execute("CREATE TABLE IF NOT EXISTS metadata (path TEXT NOT NULL, key TEXT NOT NULL, value)")
+      self.oConn.execute("CREATE INDEX IF NOT EXISTS idx_results_hash ON results(hash)")
+      self.oConn.execute("CREATE INDEX IF NOT EXISTS idx_metadata_path ON metadata(path)")
+      self.oConn.execute("CREATE INDEX IF NOT EXISTS idx_metadata_key ON metadata(key, value)")
+      self.oConn.commit()
+
+   def fWrite(self, dResult: Dict[str, Any]) -> None:
+      self.list_pending.append(dResult)
+      if len(self.list_pending) >= self.iBatch:
+         self.fFlush()
+
+   def fFlush(self) -> None:
+      """Inserta los resultados pendientes en una sola transacción."""
+      if not self.list_pending:
+         return
+      list_rows = []
+      list_values = []
+      for dResult in self.list_pending:
+         sContent = dResult.get("content_findings")
+         list_rows.append((
+            dResult["file"], dResult.get("hash"), dResult.get("type"), dResult["error"], dResult["seconds"],
+            int(bool(dResult.get("cached"))), json.dumps(dResult["metadata"], ensure_ascii=False),
+            json.dumps(dResult.get("findings") or [], ensure_ascii=False),
+            json.dumps(sContent, ensure_ascii=False) if sContent is not None else None))
+         for sKey, oValue in dResult["metadata"].items():
+            if oValue is not None and not isinstance(oValue, (str, int, float)):
+               oValue = json.dumps(oValue, ensure_ascii=False, default=str)
+            list_values.append((dResult["file"], sKey, oValue))
+
+      with self.oConn:
+         self.oConn.executemany("DELETE FROM metadata WHERE path = ?", [(tRow[0],) for tRow in list_rows])
+         self.oConn.executemany(
+            "INSERT OR REPLACE INTO results (path, hash, type, error, seconds, cached, metadata, findings,"
+            " content_findings) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", list_rows)
+         self.oConn.executemany("INSERT INTO metadata (path, key, value) VALUES (?, ?, ?)", list_values)
+      self.list_pending.clear()
+
+   def fClose(self) -> None:
+      self.fFlush()
+      self.oConn.close()
+
+   def __enter__(self) -> "SqliteSink":
+      return self
+
+   def __exit__(self, *tExc) -> None:
+      self.fClose()
+
+# Salida del lote según la extensión del archivo
+DICT_SINKS = {".jsonl": JsonlSink, ".sqlite": SqliteSink, ".sqlite3": SqliteSink, ".db": SqliteSink}
+
+def fOpenSink(sOutputFile: str) -> Union[JsonlSink, SqliteSink]:
+   """
+   Abre la salida consolidada del lote: SQLite para .sqlite, .sqlite3 y .db,
+   JSON Lines para el resto.
+
+   Args:
+      sOutputFile: Ruta del archivo de salida
+
+   Returns:
+      JsonlSink o SqliteSink
+   """
+   sDir = os.path.dirname(os.path.abspath(sOutputFile))
+   os.makedirs(sDir, exist_ok=True)
+   return DICT_SINKS.get(os.path.splitext(sOutputFile)[1].lower(), JsonlSink)(sOutputFile)
+
+# -----------------------
+# Agregación de coordenadas GPS
+# -----------------------
+def fHaversineKm(flLat1: float, flLon1: float, flLat2: float, flLon2: float) -> float:
+   """Distancia en km sobre la esfera terrestre entre dos coordenadas decimales."""
+   flDLat = math.radians(flLat2 - flLat1)
+   flDLon = math.radians(flLon2 - flLon1)
+   flA = (math.sin(flDLat / 2) ** 2
+          + math.cos(math.radians(flLat1)) * math.cos(math.radians(flLat2)) * math.sin(flDLon / 2) ** 2)
+   return 2 * FL_EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(flA)))
+
+class GpsIndex:
+   """
+   Índice espacial en memoria de las coordenadas GPS de un lote: cada punto
+   (archivo, latitud, longitud) se guarda en la celda de una rejilla de
+   flCellDegrees grados, así que las búsquedas por caja o por radio solo
+   miran las celdas que las cubren. Agrupa los puntos en clústeres por
+   celdas mayores y los exporta a un único GeoJSON.
+   """
+
+   def __init__(self, flCellDegrees: float = FL_GPS_CELL_DEGREES):
+      self.flCellDegrees = flCellDegrees
+      self.dict_cells: Dict[Tuple[int, int], List[Tuple[str, float, float]]] = {}
+      self.iPoints = 0
+
+   def fCellOf(self, flLat: float, flLon: float) -> Tuple[int, int]:
+      return math.floor(flLat / self.flCellDegrees), math.floor(flLon / self.flCellDegrees)
+
+   def fAdd(self, sFile: str, flLat: float, flLon: float) -> None:
+      self.dict_cells.setdefault(self.fCellOf(flLat, flLon), []).append((sFile, flLat, flLon))
+      self.iPoints += 1
+
+   def fAddMetadata(self, sFile: str, dMetadata: Dict[str, str]) -> bool:
+      """Añade el punto de un resultado si sus metadatos tienen coordenadas. Devuelve si se añadió."""
+      tCoordinates = fGetMetadataCoordinates(dMetadata)
+      if tCoordinates is None:
+         return False
+      self.fAdd(sFile, *tCoordinates)
+      return True
+
+   def fIterPoints(self) -> Iterator[Tuple[str, float, float]]:
+      for list_points in self.dict_cells.values():
+         yield from list_points
+
+   def fQueryBox(self, flMinLat: float, flMinLon: float, flMaxLat: float,
+                 flMaxLon: float) -> List[Tuple[str, float, float]]:
+      """
+      Puntos dentro de una caja. Si flMinLon > flMaxLon la caja cruza el
+      antimeridiano (p. ej. de 170 a -170).
+      
+      Returns:
+         list: (archivo, latitud, longitud)
+      """
+      if flMinLon > flMaxLon:
+         return (self.fQueryBox(flMinLat, flMinLon, flMaxLat, 180.0)
+                 + self.fQueryBox(flMinLat, -180.0, flMaxLat, flMaxLon))
+      iMinLat, iMinLon = self.fCellOf(flMinLat, flMinLon)
+      iMaxLat, iMaxLon = self.fCellOf(flMaxLat, flMaxLon)
+      if (iMaxLat - iMinLat + 1) * (iMaxLon - iMinLon + 1) > len(self.dict_cells):
+         # Caja con más celdas que las ocupadas: es más barato recorrer solo estas
+         iterCells = (list_points for (iLat, iLon), list_points in self.dict_cells.items()
+                      if iMinLat <= iLat <= iMaxLat and iMinLon <= iLon <= iMaxLon)
+      else:
+         iterCells = (self.dict_cells.get((iLat, iLon), ()) for iLat in range(iMinLat, iMaxLat + 1)
+                      for iLon in range(iMinLon, iMaxLon + 1))
+      return [tPoint for list_points in iterCells for tPoint in list_points
+              if flMinLat <= tPoint[1] <= flMaxLat and flMinLon <= tPoint[2] <= flMaxLon]
+
+   def fQueryRadius(self, flLat: float, flLon: float, flRadiusKm: float) -> List[Tuple[str, float, float, float]]:
+      """
+      Puntos a menos de flRadiusKm km de (flLat, flLon), del más cercano al
+      más lejano. Se buscan en la caja que contiene el círculo y se filtran
+      por la distancia haversine.
+      
+      Returns:
+         list: (archivo, latitud, longitud, distancia en km)
+      """
+      flDLat = math.degrees(flRadiusKm / FL_EARTH_RADIUS_KM)
+      flMinLat, flMaxLat = max(flLat - flDLat, -90.0), min(flLat + flDLat, 90.0)
+      # Los meridianos se juntan hacia los polos: el ancho se mide en la latitud más extrema de la caja
+      flCos = math.cos(math.radians(max(abs(flMinLat), abs(flMaxLat))))
+      if flCos <= 1e-9 or flDLat / flCos >= 180.0:
+         flMinLon, flMaxLon = -180.0, 180.0
+      else:
+         flDLon = flDLat / flCos
+         flMinLon = (flLon - flDLon + 180.0) % 360.0 - 180.0
+         flMaxLon = (flLon + flDLon + 180.0) % 360.0 - 180.0
+      list_found = []
+      for sFile, flPointLat, flPointLon in self.fQueryBox(flMinLat, flMinLon, flMaxLat, flMaxLon):
+         flKm = fHaversineKm(flLat, flLon, flPointLat, flPointLon)
+         if flKm <= flRadiusKm:
+            list_found.append((sFile, flPointLat, flPointLon, flKm))
+      return sorted(list_found, key=lambda tPoint: tPoint[3])
+
+   def fClusters(self, flCellDegrees: float = FL_GPS_CLUSTER_DEGREES,
+                 iMinPoints: int = 1) -> List[Dict[str, Any]]:
+      """
+      Agrupa los puntos por celdas de flCellDegrees grados.
+      
+      Args:
+         flCellDegrees: Tamaño de la celda de cada clúster
+         iMinPoints: Puntos mínimos para devolver un clúster
+      
+      Returns:
+         list: Clústeres de mayor a menor, con su centroide, número de
+         puntos, caja [lon mín, lat mín, lon máx, lat máx] y archivos de ejemplo
+      """
+      dict_clusters = {}
+      for sFile, flLat, flLon in self.fIterPoints():
+         tKey = (math.floor(flLat / flCellDegrees), math.floor(flLon / flCellDegrees))
+         dCluster = dict_clusters.get(tKey)
+         if dCluster is None:
+            dCluster = dict_clusters[tKey] = {"count": 0, "flLatSum": 0.0, "flLonSum": 0.0,
+                                              "bbox": [flLon, flLat, flLon, flLat], "files": []}
+         dCluster["count"] += 1
+         dCluster["flLatSum"] += flLat
+         dCluster["flLonSum"] += flLon
+         list_bbox = dCluster["bbox"]
+         list_bbox[:] = [min(list_bbox[0], flLon), min(list_bbox[1], flLat),
+                         max(list_bbox[2], flLon), max(list_bbox[3], flLat)]
+         if len(dCluster["files"]) < INT_GPS_CLUSTER_SAMPLES:
+            dCluster["files"].append(sFile)
+
+      list_clusters = []
+      for dCluster in dict_clusters.values():
+         if dCluster["count"] < iMinPoints:
+            continue
+         list_clusters.append({"latitude": dCluster.pop("flLatSum") / dCluster["count"],
+                               "longitude": dCluster.pop("flLonSum") / dCluster["count"], **dCluster})
+      return sorted(list_clusters, key=lambda dCluster: dCluster["count"], reverse=True)
+
+   def fExportGeoJson(self, sPath: str, flClusterDegrees: float = FL_GPS_CLUSTER_DEGREES) -> str:
+      """
+      Exporta los puntos y sus clústeres a un único GeoJSON
+      (FeatureCollection). Los clústeres llevan la propiedad "cluster".
+      
+      Returns:
+         str: Ruta del archivo creado
+      """
+      list_features = [{"type": "Feature", "geometry": {"type": "Point", "coordinates": [flLon, flLat]},
+                        "properties": {"file": sFile}} for sFile, flLat, flLon in self.fIterPoints()]
+      for dCluster in self.fClusters(flClusterDegrees):
+         list_features.append({
+            "type": "Feature", "bbox": dCluster["bbox"],
+            "geometry": {"type": "Point", "coordinates": [dCluster["longitude"], dCluster["latitude"]]},
+            "properties": {"cluster": True, "count": dCluster["count"], "files": dCluster["files"]}})
+      os.makedirs(os.path.dirname(os.path.abspath(sPath)), exist_ok=True)
+      with open(sPath, 'w', encoding='utf-8', buffering=INT_SINK_BUFFER) as file_out:
+         json.dump({"type": "FeatureCollection", "features": list_features}, file_out, ensure_ascii=False)
+      return sPath
+
+# -----------------------
+# Modo por lotes
+# -----------------------
+def fIterFiles(sRootDir: str, bAllFiles: bool = BOOL_BATCH_ALL_FILES) -> Iterator[str]:
+   """
+   Recorre el árbol de directorios con os.scandir (sin cargar la lista
+   completa en memoria) y devuelve las rutas de los archivos soportados.
+   Los directorios ilegibles se avisan y se omiten; no se siguen enlaces
+   simbólicos para evitar ciclos.
+   
+   Args:
+      sRootDir: Directorio raíz del lote
+      bAllFiles: Devolver todos los archivos; el tipo se detecta después
+         por su firma (para evidencias renombradas o sin extensión)
+      
+   Returns:
+      Iterator: Rutas de los archivos a analizar
+   """
+   list_pending_dirs = [sRootDir]
+   while list_pending_dirs:
+      sDir = list_pending_dirs.pop()
+      try:
+         with os.scandir(sDir) as iterEntries:
+            for oEntry in iterEntries:
+               try:
+                  if oEntry.is_dir(follow_symlinks=False):
+                     list_pending_dirs.append(oEntry.path)
+                  elif oEntry.is_file(follow_symlinks=False) and \
+                        (bAllFiles or os.path.splitext(oEntry.name)[1].lower() in DICT_EXTENSION_TYPES):
+                     yield oEntry.path
+               except OSError:
+                  continue
+      except OSError as e:
+         print(f"WARNING - No se pudo leer el directorio {sDir}: {e}")
+
+def fOnFileTimeout(iSignal, oFrame) -> None:
+   raise TimeoutError(f"análisis de más de {INT_FILE_TIMEOUT} s")
+
+def fRearmTimeout() -> None:
+   """Reinicia el tiempo máximo de análisis (p. ej. por cada miembro de un archivo comprimido) si está activo."""
+   if hasattr(signal, "SIGALRM") and signal.getsignal(signal.SIGALRM) is fOnFileTimeout:
+      signal.alarm(INT_FILE_TIMEOUT)
+
+def fInitBatchWorker() -> None:
+   """
+   Inicializa cada proceso del pool: el Ctrl-C lo gestiona el proceso
+   principal y, si el sistema lo permite, se limita el tiempo por archivo.
+   """
+   signal.signal(signal.SIGINT, signal.SIG_IGN)
+   if hasattr(signal, "SIGALRM"):
+      signal.signal(signal.SIGALRM, fOnFileTimeout)
+
+def fBatchWorker(sFilePath: str, bScanContent: bool = False, bHash: bool = False,
+                 bScanArchives: bool = False, bAllFiles: bool = BOOL_BATCH_ALL_FILES) -> Dict[str, Any]:
+   """
+   Analiza un archivo dentro de un proceso del pool. Nunca lanza
+   excepciones: un archivo corrupto se devuelve como error.
+   
+   Args:
+      sFilePath: Ruta al archivo
+      bScanContent: Buscar también datos sensibles en el texto (PDF y DOCX)
+      bHash: Calcular también el hash del contenido
+      bScanArchives: Analizar también los miembros si es un ZIP o TAR
+      bAllFiles: Analizar todos los miembros, no solo los de extensiones conocidas
+      
+   Returns:
+      dict: Ruta, tipo detectado (None si no se reconoce), metadatos, error
+      (o None), segundos de análisis, hallazgos del contenido (None si no
+      se analizó), hash (None si no se calculó) y resultados de los
+      miembros (None si no se recorrieron)
+   """
+   flStart = time.perf_counter()
+   bAlarm = hasattr(signal, "SIGALRM")
+   if bAlarm:
+      signal.alarm(INT_FILE_TIMEOUT)
+   sType = None
+   dMetadata = {}
+   list_content_findings = None
+   sHash = None
+   list_members = None
+   sError = None
+   flSeconds = None
+   try:
+      if bHash:
+         sHash = fHashFile(sFilePath)
+      # El tipo se detecta aparte para conservarlo aunque falle la extracción
+      sType, bHeader = fDetectFileType(sFilePath)
+      _, dMetadata, list_content_findings = fAnalyzeSource(sFilePath, bScanContent, sType, bHeader)
+      flSeconds = round(time.perf_counter() - flStart, 4)
+      if bScanArchives and sType in DICT_ARCHIVE_READERS:
+         # Cada miembro tiene su propio tiempo máximo (fRearmTimeout)
+         list_members = []
+         for dMember in fIterArchiveResults(sFilePath, sFilePath, sType, bScanContent, bAllFiles):
+            list_members.append(dMember)
+   except Exception as e:
+      sError = f"{type(e).__name__}: {e}"
+   finally:
+      if bAlarm:
+         signal.alarm(0)
+   return {"file": sFilePath, "type": sType, "metadata": dMetadata, "error": sError,
+           "seconds": flSeconds if flSeconds is not None else round(time.perf_counter() - flStart, 4),
+           "content_findings": list_content_findings, "hash": sHash, "members": list_members}
+
+def fIterBatchResults(iterFiles: Iterable[str], iWorkers: Optional[int] = None, bScanContent: bool = False,
+                      bHash: bool = False, bScanArchives: bool = False,
+                      bAllFiles: bool = BOOL_BATCH_ALL_FILES) -> Iterator[Dict[str, Any]]:
+   """
+   Reparte los archivos entre un pool de procesos (el análisis es
+   intensivo en CPU) y devuelve los resultados en orden de finalización.
+   Solo hay unos pocos archivos en vuelo por proceso, así que el recorrido
+   del árbol y el análisis se solapan sin acumular la lista entera. Si un
+   proceso muere (p. ej. por falta de memoria), el pool se recrea y los
+   archivos que estaban en vuelo se reintentan de uno en uno: el que vuelva
+   a tumbar el pool estando solo se marca como error.
+   
+   Args:
+      iterFiles: Rutas de los archivos a analizar (p. ej. fIterFiles)
+      iWorkers: Procesos de análisis (None = uno por núcleo de CPU)
+      bScanContent: Buscar también datos sensibles en el texto de los documentos
+      bHash: Calcular el hash de cada archivo en el proceso que lo analiza
+      bScanArchives: Analizar también los miembros de los ZIP y TAR
+      bAllFiles: Analizar todos los miembros, no solo los de extensiones conocidas
+      
+   Returns:
+      Iterator: Resultados de fBatchWorker
+   """
+   iWorkers = iWorkers or INT_BATCH_WORKERS or os.cpu_count() or 1
+   iMaxPending = iWorkers * INT_PENDING_PER_WORKER
+   tArgs = (bScanContent, bHash, bScanArchives, bAllFiles)
+   iterFiles = iter(iterFiles)
+   list_suspects = []
+   dict_pending = {}
+   oExecutor = ProcessPoolExecutor(max_workers=iWorkers, initializer=fInitBatchWorker)
+
+   try:
+      while True:
+         # Archivos en vuelo durante una caída: se analizan solos (el pool está vacío)
+         bIsolated = bool(list_suspects)
+         list_lost = []
+         try:
+            if bIsolated:
+               sFilePath = list_suspects.pop()
+               dict_pending[oExecutor.submit(fBatchWorker, sFilePath, *tArgs)] = sFilePath
+            else:
+               # Mantener el pool alimentado sin adelantar todo el árbol
+               while len(dict_pending) < iMaxPending:
+                  sFilePath = next(iterFiles, None)
+                  if sFilePath is None:
+                     break
+                  dict_pending[oExecutor.submit(fBatchWorker, sFilePath, *tArgs)] = sFilePath
+         except BrokenProcessPool:
+            # El pool cayó antes de recibir el archivo: no es sospechoso
+            bIsolated = False
+            list_lost.append(sFilePath)
+         if not dict_pending and not list_lost:
+            break
+
+         if not list_lost:
+            setDone, _ = wait(dict_pending, return_when=FIRST_COMPLETED)
+            for oFuture in setDone:
+               sFilePath = dict_pending.pop(oFuture)
+               try:
+                  yield oFuture.result()
+               except BrokenProcessPool:
+                  list_lost.append(sFilePath)
+
+         if list_lost:
+            # Lo que seguía en vuelo se perdió con el pool (salvo lo ya terminado): recrearlo
+            for oFuture, sFilePath in dict_pending.items():
+               if oFuture.done() and oFuture.exception() is None:
+                  yield oFuture.result()
+               else:
+                  list_lost.append(sFilePath)
+            dict_pending.clear()
+            oExecutor.shutdown(wait=False, cancel_futures=True)
+            oExecutor = ProcessPoolExecutor(max_workers=iWorkers, initializer=fInitBatchWorker)
+            if bIsolated:
+               yield {"file": list_lost[0], "metadata": {},
+                      "error": "BrokenProcessPool: el proceso de análisis terminó inesperadamente", "seconds": None,
+                      "type": None,
+                      "content_findings": None, "hash": None, "members": None}
+            else:
+               list_suspects.extend(list_lost)
+   finally:
+      oExecutor.shutdown(wait=False, cancel_futures=True)
+
+def fAnalyzeDirectory(sRootDir: str, iWorkers: Optional[int] = None, sOutputFile: Optional[str] = None,
+                      oCache: Optional[MetadataCache] = None, bHash: bool = BOOL_CACHE_HASH,
+                      bScanContent: bool = BOOL_SCAN_CONTENT, bAllFiles: bool = BOOL_BATCH_ALL_FILES,
+                      bScanArchives: bool = BOOL_SCAN_ARCHIVES, bGps: bool = BOOL_GPS_AGGREGATE,
+                      oGpsIndex: Optional[GpsIndex] = None) -> Dict[str, int]:
+   """
+   Modo por lotes: analiza todos los archivos soportados de un árbol de
+   directorios en paralelo y escribe cada resultado en una salida
+   consolidada (JSON Lines o SQLite, ver fOpenSink) en cuanto termina,
+   mostrando el progreso y la velocidad en archivos/s. Cada resultado se
+   identifica por la ruta completa del archivo y su hash. Con caché, los
+   archivos sin cambios (mismo tamaño y fecha) se resuelven con un stat()
+   y, con bHash, los duplicados por contenido se analizan una vez.
+   Con bScanContent también se busca en el texto de los PDF y DOCX, y con
+   bScanArchives se analizan los miembros de los ZIP y TAR sin extraerlos
+   (ruta "archivo!miembro"). Con bGps las coordenadas de las imágenes y
+   vídeos se reúnen en un índice espacial y se exportan al final a un
+   GeoJSON junto a la salida, sin abrir nunca el navegador.
+   
+   Args:
+      sRootDir: Directorio raíz del lote
+      iWorkers: Procesos de análisis (None = uno por núcleo de CPU)
+      sOutputFile: Archivo de salida, .jsonl o .sqlite3
+         (None = Output/<directorio>_metadata con la extensión de STR_BATCH_OUTPUT_FORMAT)
+      oCache: Caché de metadatos (None = analizar siempre todos los archivos)
+      bHash: Calcular el hash de los archivos nuevos o modificados (sin caché,
+         el de todos los archivos, en los procesos de análisis)
+      bScanContent: Buscar datos sensibles también en el contenido de los documentos
+      bAllFiles: Analizar todos los archivos, no solo los de extensiones conocidas
+      bScanArchives: Analizar también los miembros de los ZIP y TAR (también anidados)
+      bGps: Reunir las coordenadas GPS y exportarlas a <salida>.geojson
+      oGpsIndex: Índice donde se reúnen (None = uno nuevo); permite consultarlo después del lote
+      
+   Returns:
+      dict: Archivos analizados (incluidos los miembros), con metadatos, con
+      error, obtenidos de la caché, miembros de archivos comprimidos y con
+      coordenadas GPS
+   """
+   if not os.path.isdir(sRootDir):
+      print(f"ERROR   - El directorio no existe: {sRootDir}")
+      return {}
+
+   # Rutas completas: son la clave de cada resultado en la salida y en la caché
+   sRootDir = os.path.abspath(sRootDir)
+   if sOutputFile is None:
+      sBaseName = os.path.basename(os.path.normpath(sRootDir)) or "lote"
+      sExtension = ".sqlite3" if STR_BATCH_OUTPUT_FORMAT == "sqlite" else ".jsonl"
+      sOutputFile = os.path.join(STR_OUTPUT_DIR, f"{sBaseName}_metadata{sExtension}")
+
+   if bGps and oGpsIndex is None:
+      oGpsIndex = GpsIndex()
+
+   dict_stats = {"iFiles": 0, "iWithMetadata": 0, "iErrors": 0, "iCached": 0, "iFindings": 0, "iMembers": 0,
+                 "iGpsPoints": 0}
+   flStart = time.perf_counter()
+   flLastProgress = flStart
+   # Archivos enviados al pool: ruta -> (tamaño, fecha de modificación, hash)
+   dict_sent = {}
+   # Duplicados que esperan al análisis del primer archivo con su mismo hash
+   dict_hash_waiters = {}
+
+   def fPrintProgress() -> None:
+      flElapsed = max(time.perf_counter() - flStart, 1e-6)
+      print(f"INFO    - Progreso: {dict_stats['iFiles']} archivos ({dict_stats['iCached']} de la caché, "
+            f"{dict_stats['iErrors']} con error) | {dict_stats['iFiles'] / flElapsed:.1f} archivos/s")
+
+   def fEmit(dResult: Dict[str, Any], bMember: bool = False) -> None:
+      nonlocal flLastProgress
+      list_findings = fDetectSensitiveData(dResult["metadata"])
+      dResult["findings"] = [oFinding._asdict() for oFinding in list_findings]
+      dResult.setdefault("hash", None)
+      oSink.fWrite(dResult)
+      dict_stats["iFiles"] += 1
+      dict_stats["iMembers"] += bMember
+      dict_stats["iFindings"] += len(list_findings) + len(dResult.get("content_findings") or [])
+      if dResult.get("cached"):
+         dict_stats["iCached"] += 1
+      if dResult["error"]:
+         dict_stats["iErrors"] += 1
+         print(f"WARNING - {dResult['file']}: {dResult['error']}")
+      elif dResult["metadata"]:
+         dict_stats["iWithMetadata"] += 1
+         if oGpsIndex is not None and oGpsIndex.fAddMetadata(dResult["file"], dResult["metadata"]):
+            dict_stats["iGpsPoints"] += 1
+
+      if time.perf_counter() - flLastProgress >= FL_PROGRESS_INTERVAL:
+         fPrintProgress()
+         flLastProgress = time.perf_counter()
+
+   def fIterToExtract() -> Iterator[str]:
+      # Solo llegan al pool los archivos que la caché no puede resolver
+      for sFilePath in fIterFiles(sRootDir, bAllFiles):
+         if oCache is None:
+            yield sFilePath
+            continue
+         sHash = None
+         try:
+            oStat = os.stat(sFilePath)
+            dCached = oCache.fGet(sFilePath, oStat.st_size, oStat.st_mtime_ns)
+            # Tipo por la firma, como en el análisis: el de la caché o, en las entradas que no lo
+            # tienen y en los archivos que se pueden resolver como duplicados, el de la cabecera
+            sType = dCached["type"] if dCached is not None else None
+            if sType is None and (bScanContent or bScanArchives) and (dCached is not None or bHash):
+               sType = fDetectFileType(sFilePath)[0]
+            # Una entrada sin el análisis del contenido o de los miembros no sirve si ahora se pide
+            bNeedsContent = bScanContent and sType in DICT_CONTENT_READERS
+            bNeedsMembers = bScanArchives and sType in DICT_ARCHIVE_READERS
+            if dCached is not None and (dCached["error"] is not None or (
+                  (not bNeedsContent or dCached["content_findings"] is not None)
+                  and (not bNeedsMembers or dCached["member_count"] is not None))):
+               fEmit({"file": sFilePath, "type": dCached["type"], "metadata": dCached["metadata"],
+                      "error": dCached["error"], "seconds": None, "cached": True,
+                      "content_findings": dCached["content_findings"], "hash": dCached["hash"]})
+               if bScanArchives and dCached["member_count"] is not None:
+                  for dMember in oCache.fGetMembers(sFilePath, oStat.st_size, oStat.st_mtime_ns):
+                     fEmit({**dMember, "seconds": None, "cached": True}, bMember=True)
+               continue
+            if bHash:
+               sHash = fHashFile(sFilePath)
+         except OSError as e:
+            fEmit({"file": sFilePath, "metadata": {}, "error": f"{type(e).__name__}: {e}", "seconds": None,
+                   "content_findings": None})
+            continue
+
+         # Los miembros de un duplicado no están en la caché con su ruta: se recorre de nuevo
+         if sHash is not None and not bNeedsMembers:
+            dByHash = oCache.fGetByHash(sHash, bNeedsContent)
+            if dByHash is not None:
+               oCache.fPut(sFilePath, oStat.st_size, oStat.st_mtime_ns, dByHash["metadata"], None, sHash,
+                           dByHash["content_findings"], sType=dByHash["type"])
+               fEmit({"file": sFilePath, "type": dByHash["type"], "metadata": dByHash["metadata"], "error": None,
+                      "seconds": None, "cached": True, "content_findings": dByHash["content_findings"],
+                      "hash": sHash})
+               continue
+            if sHash in dict_hash_waiters:
+               dict_hash_waiters[sHash].append((sFilePath, oStat.st_size, oStat.st_mtime_ns))
+               continue
+            dict_hash_waiters[sHash] = []
+         dict_sent[sFilePath] = (oStat.st_size, oStat.st_mtime_ns, sHash)
+         yield sFilePath
+
+   try:
+      with fOpenSink(sOutputFile) as oSink:
+         # Con caché, el hash se calcula antes de enviar el archivo (para resolver duplicados)
+         for dResult in fIterBatchResults(fIterToExtract(), iWorkers, bScanContent, bHash and oCache is None,
+                                          bScanArchives, bAllFiles):
+            list_members = dResult.pop("members")
+            if oCache is not None:
+               iSize, iMtimeNs, sHash = dict_sent.pop(dResult["file"])
+               dResult["hash"] = sHash
+            fEmit(dResult)
+            for dMember in list_members or []:
+               fEmit(dMember, bMember=True)
+            if oCache is None:
+               continue
+            sError = dResult["error"]
+            list_content_findings = dResult["content_findings"]
+            # Un error transitorio, también en un miembro, no se guarda para reintentarlo en el siguiente lote
+            bCacheable = not any(dItem["error"] and dItem["error"].startswith(TUPLE_TRANSIENT_ERRORS)
+                                 for dItem in [dResult, *(list_members or [])])
+            if bCacheable:
+               # Los miembros se guardan con el tamaño y la fecha del archivo que los contiene
+               for dMember in list_members or []:
+                  oCache.fPut(dMember["file"], iSize, iMtimeNs, dMember["metadata"], dMember["error"],
+                              dMember["hash"], dMember["content_findings"], sType=dMember["type"])
+               oCache.fPut(dResult["file"], iSize, iMtimeNs, dResult["metadata"], sError, sHash,
+                           list_content_findings, len(list_members) if list_members is not None else None,
+                           dResult["type"])
+            # Los duplicados comparten el resultado del primer archivo con el mismo contenido
+            for sDupPath, iDupSize, iDupMtimeNs in dict_hash_waiters.pop(sHash, []):
+               if bCacheable:
+                  oCache.fPut(sDupPath, iDupSize, iDupMtimeNs, dResult["metadata"], sError, sHash,
+                              list_content_findings, sType=dResult["type"])
+               fEmit({"file": sDupPath, "type": dResult["type"], "metadata": dResult["metadata"], "error": sError,
+                      "seconds": None, "cached": True, "content_findings": list_content_findings,
+                      "hash": sHash})
+   except KeyboardInterrupt:
+      print("\nWARNING - Lote interrumpido: los resultados ya obtenidos están guardados")
+   finally:
+      if oCache is not None:
+         oCache.fCommit()
+
+   fPrintProgress()
+   print(f"INFO    - {dict_stats['iWithMetadata']} archivos con metadatos, {dict_stats['iErrors']} con error, "
+         f"{dict_stats['iCached']} sin reanalizar (caché)")
+   if dict_stats["iMembers"]:
+      print(f"INFO    - {dict_stats['iMembers']} de ellos son miembros de archivos comprimidos")
+   print(f"INFO    - Posibles datos sensibles: {dict_stats['iFindings']}")
+   print(f"INFO    - Resultados exportados a: {sOutputFile}")
+   if dict_stats["iGpsPoints"]:
+      sGeoJsonFile = oGpsIndex.fExportGeoJson(os.path.splitext(sOutputFile)[0] + ".geojson")
+      list_clusters = oGpsIndex.fClusters()
+      print(f"INFO    - {dict_stats['iGpsPoints']} archivos con coordenadas GPS en {len(list_clusters)} zonas "
+            f"de {FL_GPS_CLUSTER_DEGREES}°, exportados a: {sGeoJsonFile}")
+      for dCluster in list_clusters[:3]:
+         print(f"INFO    -    {dCluster['count']} archivos cerca de "
+               f"{dCluster['latitude']:.5f}, {dCluster['longitude']:.5f}")
+   return dict_stats
+
 # -----------------------
 # Función principal
 # -----------------------
-def fAnalyzeFile(sFilePath: str, bExportToJson: bool = True) -> Dict[str, str]:
+def fAnalyzeFile(sFilePath: str, bExportToJson: bool = True, oCache: Optional[MetadataCache] = None,
+                 bScanContent: bool = BOOL_SCAN_CONTENT, bScanArchives: bool = BOOL_SCAN_ARCHIVES) -> Dict[str, str]:
    """
    Controlador principal: selecciona el tipo de archivo y extrae sus metadatos.
    También permite exportarlos a JSON y buscar datos sensibles.
@@ -277,6 +2478,9 @@ def fAnalyzeFile(sFilePath: str, bExportToJson: bool = True) -> Dict[str, str]:
    Args:
       sFilePath: Ruta al archivo que se va a analizar
       bExportToJson: Indica si se debe exportar a JSON
+      oCache: Caché de metadatos (si el archivo no ha cambiado no se reanaliza)
+      bScanContent: Buscar datos sensibles también en el texto del documento
+      bScanArchives: Si es un ZIP o TAR, analizar también sus miembros sin extraerlos
       
    Returns:
       dict: Diccionario con los metadatos extraídos
@@ -286,20 +2490,31 @@ def fAnalyzeFile(sFilePath: str, bExportToJson: bool = True) -> Dict[str, str]:
       print(f"ERROR   - El archivo no existe: {sFilePath}")
       return {}
 
-   # Determinar el tipo de archivo por su extensión
+   # Determinar el tipo de archivo por su firma, no por la extensión
    sExt = os.path.splitext(sFilePath)[1].lower()
-   dMetadata = {}
+   try:
+      sType, bHeader = fDetectFileType(sFilePath)
+   except OSError as e:
+      print(f"ERROR   - No se pudo leer el archivo: {e}")
+      return {}
+   if sType not in DICT_EXTRACTORS:
+      print(f"ERROR   - Tipo de archivo no soportado: {sExt or 'sin extensión'}")
+      return {}
+   if DICT_EXTENSION_TYPES.get(sExt) != sType:
+      print(f"WARNING - La extensión '{sExt}' no corresponde al contenido: se analiza como {sType}")
 
-   # Seleccionar el extractor adecuado según la extensión
-   if sExt == ".pdf":
-      dMetadata = fExtractPdfMetadata(sFilePath)
-   elif sExt == ".docx":
-      dMetadata = fExtractDocxMetadata(sFilePath)
-   elif sExt in [".jpg", ".jpeg", ".png", ".tiff", ".tif"]:
-      dMetadata = fExtractImageMetadata(sFilePath)
+   # Reutilizar el resultado de la caché si el archivo no ha cambiado
+   oStat = os.stat(sFilePath)
+   dCached = oCache.fGet(sFilePath, oStat.st_size, oStat.st_mtime_ns) if oCache is not None else None
+   if dCached is not None and dCached["error"] is None:
+      print(f"\nINFO    - Metadatos obtenidos de la caché: {sFilePath}")
+      dMetadata = dCached["metadata"]
    else:
-      print(f"ERROR   - Tipo de archivo no soportado: {sExt}")
-      return {}
+      # Seleccionar el extractor adecuado según el tipo detectado
+      dMetadata = fExtractMetadata(sFilePath, True, sType, bHeader)
+      if oCache is not None and dMetadata:
+         oCache.fPut(sFilePath, oStat.st_size, oStat.st_mtime_ns, dMetadata, sType=sType)
+         oCache.fCommit()
 
    # Verificar si se obtuvieron metadatos
    if not dMetadata:
@@ -311,7 +2526,24 @@ def fAnalyzeFile(sFilePath: str, bExportToJson: bool = True) -> Dict[str, str]:
       fSaveMetadataJson(dMetadata, sFilePath)
 
    # Buscar datos sensibles en los metadatos
-   fDetectSensitiveData(dMetadata)
+   fPrintFindings(fDetectSensitiveData(dMetadata))
+
+   # Buscar datos sensibles en el texto del documento
+   if bScanContent and fHasContent(sFilePath, sType):
+      fPrintFindings(fScanDocumentContent(sFilePath, sType=sType), "el contenido")
+
+   # Analizar los miembros de un ZIP o TAR (también anidados) en memoria
+   if bScanArchives and sType in DICT_ARCHIVE_READERS:
+      for dMember in fIterArchiveResults(sFilePath, sFilePath, sType, bScanContent):
+         print(f"\nINFO    - Miembro: {dMember['file']}")
+         if dMember["error"]:
+            print(f"WARNING - {dMember['error']}")
+            continue
+         for sKey, sValue in dMember["metadata"].items():
+            print(f"INFO    - {sKey}: {sValue}")
+         fPrintFindings(fDetectSensitiveData(dMember["metadata"]))
+         if dMember["content_findings"] is not None:
+            fPrintFindings([SensitiveFinding(**dFinding) for dFinding in dMember["content_findings"]], "el contenido")
    
    return dMetadata
 
@@ -322,17 +2554,23 @@ if __name__ == "__main__":
    # Cargar el archivo .env
    load_dotenv()
    # Obtener la ruta desde el archivo .env
-   # Ruta del archivo que queremos analizar
+   # Ruta del archivo (o directorio, para el modo por lotes) que queremos analizar
    sTEST_FILE_PATH = os.getenv('sTEST_FILE_PATH')
    
    print("="*50)
    print("EXTRACTOR DE METADATOS")
    print("="*50)
-   print(f"INFO    - Archivo a analizar: {sTEST_FILE_PATH}")
-   print("INFO    - Extrayendo metadatos...")
    
-   # Ejecutar el análisis
-   dResult = fAnalyzeFile(sTEST_FILE_PATH, bExportToJson=True)
+   # Ejecutar el análisis (los resultados se guardan en la caché para no repetirlos)
+   with MetadataCache() as oCache:
+      if sTEST_FILE_PATH and os.path.isdir(sTEST_FILE_PATH):
+         print(f"INFO    - Directorio a analizar: {sTEST_FILE_PATH}")
+         print("INFO    - Extrayendo metadatos en modo por lotes...")
+         dResult = fAnalyzeDirectory(sTEST_FILE_PATH, oCache=oCache)
+      else:
+         print(f"INFO    - Archivo a analizar: {sTEST_FILE_PATH}")
+         print("INFO    - Extrayendo metadatos...")
+         dResult = fAnalyzeFile(sTEST_FILE_PATH, bExportToJson=True, oCache=oCache)
    
    print("\nINFO    - Análisis completado.")
    print("="*50)
\ No newline at end of file
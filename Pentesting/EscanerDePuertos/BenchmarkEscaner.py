@@ -0,0 +1,381 @@
+import io
+import os
+import sys
+import json
+import math
+import time
+import socket
+import asyncio
+import selectors
+import threading
+import multiprocessing
+from contextlib import redirect_stdout
+
+try:
+   import resource
+except ImportError:  # Windows
+   resource = None
+
+# El escáner está en el mismo directorio que este script
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import EscanerDePuertos as oEscaner
+
+
+# ==========================================
+# CONFIGURACIÓN DEL BENCHMARK
+# ==========================================
+# Dirección local donde se levantan los objetivos de prueba
+sBENCH_HOST = "127.0.0.1"
+
+# Número de puertos de cada tipo en el objetivo local
+iOPEN_PORTS = 20
+iSLOW_PORTS = 10
+iCLOSED_PORTS = 2000
+iDROPPED_PORTS = 200
+
+# Los puertos de aceptación lenta solo aceptan conexiones cada fSLOW_ACCEPT segundos
+fSLOW_ACCEPT = 2.0
+
+# Concurrencia del escáner durante el benchmark
+iBENCH_CONCURRENCY = 100
+
+# Modos del escáner a comparar: nombre, número de procesos y configuración a aplicar
+lBENCH_MODES = [
+   {"sName": "adaptativo (por defecto)", "iProcesses": 1, "dConfig": {}},
+   {"sName": "fijo sin reintentos", "iProcesses": 1, "dConfig": {"bAdaptiveTimeout": False, "iMaxRetries": 0}},
+   {"sName": "sin límite de tasa", "iProcesses": 1, "dConfig": {"fMaxRate": 1e9, "bCongestionControl": False}},
+   {"sName": "sin fingerprinting", "iProcesses": 1, "dConfig": {"bFingerprint": False}},
+   {"sName": "multiproceso x2", "iProcesses": 2, "dConfig": {}},
+]
+
+# Granja de servidores locales para medir el escalado multiproceso
+iFARM_HOSTS = 8          # 127.0.0.1 .. 127.0.0.N
+iFARM_OPEN = 10
+iFARM_CLOSED = 500
+lPROCESS_COUNTS = [1, 2, 4]
+
+# Fichero JSON donde guardar las métricas para comparar entre versiones (None = no guardar)
+sRESULTS_FILE = None
+
+# Intervalo de muestreo de los descriptores de fichero abiertos
+fFD_SAMPLE_INTERVAL = 0.01
+
+
+# ==========================================
+# OBJETIVO LOCAL DE PRUEBA
+# ==========================================
+class LocalTarget:
+   """
+   Objetivo local con puertos abiertos, de aceptación lenta, cerrados y
+   "filtrados". Los puertos filtrados son sockets en escucha con la cola de
+   aceptación llena (listen(0) + una conexión sin aceptar): el kernel
+   descarta los SYN siguientes y el cliente no recibe respuesta, igual que
+   tras un firewall. Los puertos lentos completan el handshake pero la
+   aplicación tarda fSLOW_ACCEPT segundos en aceptar y cerrar la conexión.
+   """
+
+   def __init__(self, iOpen, iClosed, iDropped, sHost=sBENCH_HOST, iSlow=0):
+      self.sHost = sHost
+      self.iOpen = iOpen
+      self.iSlow = iSlow
+      self.iClosed = iClosed
+      self.iDropped = iDropped
+      self.setOpen = set()
+      self.setSlow = set()
+      self.setClosed = set()
+      self.setDropped = set()
+      self.lSockets = []
+      self.lSlowSockets = []
+      self.oSelector = selectors.DefaultSelector()
+      self.bRunning = False
+      self.lThreads = []
+
+   def fListen(self, iBacklog):
+      oSocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+      oSocket.bind((self.sHost, 0))
+      oSocket.listen(iBacklog)
+      self.lSockets.append(oSocket)
+      return oSocket
+
+   def fStart(self):
+      # Puertos abiertos: se aceptan y cierran las conexiones en un hilo aparte
+      for _ in range(self.iOpen):
+         oSocket = self.fListen(128)
+         oSocket.setblocking(False)
+         self.oSelector.register(oSocket, selectors.EVENT_READ)
+         self.setOpen.add(oSocket.getsockname()[1])
+
+      # Puertos de aceptación lenta: las conexiones esperan en la cola del kernel
+      for _ in range(self.iSlow):
+         oSocket = self.fListen(128)
+         oSocket.setblocking(False)
+         self.lSlowSockets.append(oSocket)
+         self.setSlow.add(oSocket.getsockname()[1])
+
+      # Puertos filtrados: cola de aceptación llena
+      for _ in range(self.iDropped):
+         oSocket = self.fListen(0)
+         iPort = oSocket.getsockname()[1]
+         oFiller = socket.create_connection((self.sHost, iPort))
+         self.lSockets.append(oFiller)
+         self.setDropped.add(iPort)
+
+      # Puertos cerrados: puertos libres en los que nadie escucha
+      while len(self.setClosed) < self.iClosed:
+         oSocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+         oSocket.bind((self.sHost, 0))
+         iPort = oSocket.getsockname()[1]
+         oSocket.close()
+         if iPort not in self.setOpen | self.setSlow | self.setDropped:
+            self.setClosed.add(iPort)
+
+      self.bRunning = True
+      self.lThreads = [threading.Thread(target=self.fAcceptLoop, daemon=True),
+                       threading.Thread(target=self.fSlowAcceptLoop, daemon=True)]
+      for oThread in self.lThreads:
+         oThread.start()
+
+   def fAcceptLoop(self):
+      while self.bRunning:
+         for oKey, _ in self.oSelector.select(timeout=0.1):
+            try:
+               oConn, _ = oKey.fileobj.accept()
+               oConn.close()
+            except OSError:
+               pass
+
+   def fSlowAcceptLoop(self):
+      fNext = time.monotonic() + fSLOW_ACCEPT
+      while self.bRunning:
+         if time.monotonic() < fNext:
+            time.sleep(0.1)
+            continue
+         fNext = time.monotonic() + fSLOW_ACCEPT
+         for oSocket in self.lSlowSockets:
+            while True:
+               try:
+                  oConn, _ = oSocket.accept()
+               except OSError:
+                  break
+               oConn.close()
+
+   def fStop(self):
+      self.bRunning = False
+      for oThread in self.lThreads:
+         oThread.join()
+      self.oSelector.close()
+      for oSocket in self.lSockets:
+         oSocket.close()
+
+   @property
+   def lPorts(self):
+      return sorted(self.setOpen | self.setSlow | self.setClosed | self.setDropped)
+
+   @property
+   def dExpected(self):
+      """Estado que debe detectar el escáner en cada puerto."""
+      dStates = {iPort: "cerrado" for iPort in self.setClosed}
+      dStates.update({iPort: "filtrado" for iPort in self.setDropped})
+      dStates.update({iPort: "abierto" for iPort in self.setOpen | self.setSlow})
+      return dStates
+
+
+# ==========================================
+# MÉTRICAS DE RECURSOS
+# ==========================================
+def fCountFds(iPid):
+   """Descriptores abiertos por un proceso (solo Linux, None si no se puede leer)."""
+   try:
+      return len(os.listdir(f"/proc/{iPid}/fd"))
+   except OSError:
+      return None
+
+class FdSampler:
+   """
+   Hilo que muestrea periódicamente los descriptores abiertos por este
+   proceso y sus hijos (modo multiproceso) y guarda el pico.
+   """
+
+   def __init__(self, fInterval=fFD_SAMPLE_INTERVAL):
+      self.fInterval = fInterval
+      self.iPeak = None
+      self.oStop = threading.Event()
+      self.oThread = threading.Thread(target=self.fLoop, daemon=True)
+
+   def fLoop(self):
+      while not self.oStop.is_set():
+         iOwn = fCountFds(os.getpid())
+         if iOwn is None:
+            return
+         iTotal = iOwn + sum(fCountFds(oChild.pid) or 0 for oChild in multiprocessing.active_children())
+         self.iPeak = max(self.iPeak or 0, iTotal)
+         self.oStop.wait(self.fInterval)
+
+   def __enter__(self):
+      self.oThread.start()
+      return self
+
+   def __exit__(self, *tExc):
+      self.oStop.set()
+      self.oThread.join()
+
+def fPeakRssMb():
+   """Pico de memoria residente del proceso más el mayor de sus hijos, en MB."""
+   if resource is None:
+      return None
+   iSelf = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+   iChildren = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+   # ru_maxrss está en KB en Linux y en bytes en macOS
+   iDivisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+   return (iSelf + iChildren) / iDivisor
+
+
+# ==========================================
+# EJECUCIÓN DE LOS MODOS
+# ==========================================
+def fPercentile(lSorted, fPct):
+   """Percentil por rango más cercano sobre una lista ya ordenada."""
+   if not lSorted:
+      return 0.0
+   return lSorted[min(len(lSorted) - 1, max(0, math.ceil(fPct / 100 * len(lSorted)) - 1))]
+
+def fModeWorker(lHosts, lPorts, iProcesses, dConfig, oConn):
+   """
+   Proceso aislado que ejecuta un modo del escáner, de modo que el pico de
+   memoria y de descriptores de un modo no contamine las medidas del siguiente.
+   """
+   # Todos los estados deben llegar al benchmark para medir latencia y precisión
+   oOptions = oEscaner.ScanOptions(
+      sEngine="multiproceso" if iProcesses > 1 else "asyncio", iWorkerProcesses=iProcesses,
+      iMaxConcurrency=iBENCH_CONCURRENCY * len(lHosts), iMaxPerHost=iBENCH_CONCURRENCY,
+      bShowOnlyOpen=False, fStatusInterval=0, **dConfig)
+   oScanner = oEscaner.Scanner(lHosts, lPorts, oOptions)
+
+   async def fCollect():
+      return [(oResult.sHost, oResult.iPort, oResult.sState, oResult.fLatency) async for oResult in oScanner.fScan()]
+
+   with FdSampler() as oSampler, redirect_stdout(io.StringIO()):
+      fStart = time.perf_counter()
+      lResults = asyncio.run(fCollect())
+      fWall = time.perf_counter() - fStart
+
+   oConn.send({
+      "fWall": fWall,
+      "lResults": lResults,
+      "dStates": dict(oScanner.cStates),
+      "fPeakRss": fPeakRssMb(),
+      "iPeakFds": oSampler.iPeak,
+   })
+   oConn.close()
+
+def fRunMode(lTargets, dMode):
+   """
+   Escanea los objetivos locales con el modo indicado en un proceso aparte.
+
+   Returns:
+      dict: Tiempo, velocidad, latencias p50/p99, recursos y precisión del escaneo
+   """
+   lHosts = [oTarget.sHost for oTarget in lTargets]
+   lPorts = sorted(set().union(*(oTarget.lPorts for oTarget in lTargets)))
+
+   oContext = multiprocessing.get_context("spawn")
+   oParent, oChild = oContext.Pipe(duplex=False)
+   oProcess = oContext.Process(target=fModeWorker, args=(lHosts, lPorts, dMode["iProcesses"], dMode["dConfig"], oChild))
+   oProcess.start()
+   oChild.close()
+   dRes = oParent.recv()
+   oProcess.join()
+
+   # Precisión: puertos clasificados en su estado real (los no reportados cuentan como fallo)
+   dExpected = {(oTarget.sHost, iPort): sState for oTarget in lTargets for iPort, sState in oTarget.dExpected.items()}
+   dFound = {(sHost, iPort): sState for sHost, iPort, sState, _ in dRes["lResults"]}
+   iCorrect = sum(1 for tKey, sState in dExpected.items() if dFound.get(tKey) == sState)
+
+   lLatencies = sorted(fLatency for *_, fLatency in dRes["lResults"] if fLatency is not None)
+
+   iTotal = len(lHosts) * len(lPorts)
+   return {
+      "sName": dMode["sName"],
+      "iProcesses": dMode["iProcesses"],
+      "iTotal": iTotal,
+      "fWall": dRes["fWall"],
+      "fRate": iTotal / dRes["fWall"],
+      "fP50": fPercentile(lLatencies, 50) * 1000,
+      "fP99": fPercentile(lLatencies, 99) * 1000,
+      "fPeakRss": dRes["fPeakRss"],
+      "iPeakFds": dRes["iPeakFds"],
+      "dStates": dRes["dStates"],
+      "fAccuracy": iCorrect / len(dExpected),
+   }
+
+def fBenchModes():
+   """Compara los modos del escáner contra un objetivo local con todos los tipos de puerto."""
+   print(f"\n--- MODOS DEL ESCÁNER ---")
+   oTarget = LocalTarget(iOPEN_PORTS, iCLOSED_PORTS, iDROPPED_PORTS, iSlow=iSLOW_PORTS)
+   oTarget.fStart()
+   lResults = []
+   try:
+      print(f"INFO    - Objetivo local: {iOPEN_PORTS} abiertos, {iSLOW_PORTS} lentos, {iCLOSED_PORTS} cerrados, "
+            f"{iDROPPED_PORTS} filtrados (concurrencia {iBENCH_CONCURRENCY})\n")
+      fPrintHeader("MODO")
+      for dMode in lBENCH_MODES:
+         dRes = fRunMode([oTarget], dMode)
+         fPrintRow(dRes["sName"], dRes)
+         lResults.append(dRes)
+      print("-" * 118)
+   finally:
+      oTarget.fStop()
+   return lResults
+
+def fBenchProcesses():
+   """Mide el escalado del modo multiproceso contra una granja de servidores locales."""
+   print(f"\n--- ESCALADO MULTIPROCESO (CPUs disponibles: {os.cpu_count()}) ---")
+   lTargets = [LocalTarget(iFARM_OPEN, iFARM_CLOSED, 0, sHost=f"127.0.0.{i + 1}") for i in range(iFARM_HOSTS)]
+   lResults = []
+   try:
+      for oTarget in lTargets:
+         oTarget.fStart()
+      print(f"INFO    - Granja local: {iFARM_HOSTS} hosts con {iFARM_OPEN} abiertos y {iFARM_CLOSED} cerrados cada uno\n")
+      fPrintHeader("PROCESOS")
+      fBase = None
+      for iProcesses in lPROCESS_COUNTS:
+         dRes = fRunMode(lTargets, {"sName": f"granja x{iProcesses}", "iProcesses": iProcesses, "dConfig": {}})
+         fBase = fBase or dRes["fRate"]
+         fPrintRow(f"{iProcesses} ({dRes['fRate'] / fBase:.2f}x)", dRes)
+         lResults.append(dRes)
+      print("-" * 118)
+   finally:
+      for oTarget in lTargets:
+         oTarget.fStop()
+   return lResults
+
+def fPrintHeader(sFirst):
+   print(f"{sFirst:<26} {'PARES':>6} {'TIEMPO (s)':>10} {'PUERTOS/S':>10} {'P50 (ms)':>9} {'P99 (ms)':>9} "
+         f"{'RSS (MB)':>9} {'FDS':>6} {'ABI/CER/FIL':>15} {'PRECISIÓN':>10}")
+   print("-" * 118)
+
+def fPrintRow(sModo, dRes):
+   dStates = dRes["dStates"]
+   sRss = f"{dRes['fPeakRss']:.1f}" if dRes["fPeakRss"] is not None else "N/A"
+   sFds = str(dRes["iPeakFds"]) if dRes["iPeakFds"] is not None else "N/A"
+   sStates = f"{dStates.get('abierto', 0)}/{dStates.get('cerrado', 0)}/{dStates.get('filtrado', 0)}"
+   print(f"{sModo:<26} {dRes['iTotal']:>6} {dRes['fWall']:>10.2f} {dRes['fRate']:>10.0f} {dRes['fP50']:>9.2f} "
+         f"{dRes['fP99']:>9.1f} {sRss:>9} {sFds:>6} {sStates:>15} {dRes['fAccuracy'] * 100:>9.1f}%")
+
+
+if __name__ == "__main__":
+   print("=" * 118)
+   print("BENCHMARK DEL ESCÁNER DE PUERTOS")
+   print("=" * 118)
+
+   dResults = {
+      "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+      "cpus": os.cpu_count(),
+      "modes": fBenchModes(),
+      "processes": fBenchProcesses(),
+   }
+
+   if sRESULTS_FILE:
+      with open(sRESULTS_FILE, "w", encoding="utf-8") as fOut:
+         json.dump(dResults, fOut, indent=2, ensure_ascii=False)
+      print(f"\nINFO    - Métricas guardadas en {sRESULTS_FILE}")
@@ -1,33 +1,116 @@
 import os
+import re
+import argparse
+import csv
+import json
+import struct
+import time
+import random
 import socket
+import errno
+import asyncio
+import ipaddress
+import itertools
 import threading
+import multiprocessing
+import queue
+from functools import lru_cache, partial
+from collections import Counter
 from dotenv import load_dotenv
 from datetime import datetime
 
+try:
+   import resource
+except ImportError:
+   # El módulo 'resource' no existe en Windows
+   resource = None
+
 
 # ==========================================
 # CONFIGURACIÓN DEL ESCANEO
 # ==========================================
-# Objetivo a escanear (IP o dominio)
-sTarget = "127.0.0.1"  # Mi equipo: "127.0.0.1", Mi Router: "192.168.1.1", "google.com", "scanme.nmap.org"
+# Objetivo(s) a escanear, separados por comas. Se admite:
+#   - IP o dominio:      "127.0.0.1", "scanme.nmap.org"
+#   - Red CIDR:          "192.168.1.0/24"
+#   - Rango de IPs:      "192.168.1.10-50" o "192.168.1.10-192.168.1.50"
+#   - Archivo de hosts:  "@hosts.txt" (un objetivo por línea, '#' para comentarios)
+sTarget = "127.0.0.1"  # Mi equipo: "127.0.0.1", Mi Router: "192.168.1.1", "192.168.1.0/24", "google.com", "scanme.nmap.org"
 
 # Rango de puertos a escanear
 iStartPort = 1
 iEndPort = 5000 #1024
 
+# Escanear solo los N puertos más frecuentes en lugar del rango (0 = usar el rango). Ej.: 100, 1000
+iTopPorts = 0
+
+# Orden de escaneo de los puertos:
+#   "frecuencia": primero los puertos más habituales, después el resto en orden aleatorio
+#   "aleatorio":  permutación aleatoria del rango completo (reparte la carga)
+#   "lineal":     de iStartPort a iEndPort
+sPortOrder = "frecuencia"
+
 # Tiempo máximo de espera por puerto (en segundos)
 fTimeout = 1.0
 
+# Tiempo de espera adaptativo según el RTT medido de cada host (False = usar siempre fTimeout)
+bAdaptiveTimeout = True
+
+# Tiempo de espera mínimo en modo adaptativo (en segundos)
+fMinTimeout = 0.1
+
+# Reintentos para puertos sin respuesta (filtrados)
+iMaxRetries = 1
+
+# Máximo de conexiones simultáneas en vuelo (sockets abiertos a la vez)
+iMaxConcurrency = 2000
+
+# Máximo de conexiones simultáneas contra un mismo host
+iMaxPerHost = 256
+
+# Motor de escaneo: "asyncio" (un solo proceso) o "multiproceso" (iWorkerProcesses procesos)
+sEngine = "asyncio"
+
+# Procesos de escaneo en paralelo con el motor "multiproceso" (0 = uno por núcleo de CPU)
+iWorkerProcesses = 0
+
+# Límite global de intentos de conexión (SYN) por segundo (0 = sin límite)
+fMaxRate = 10000.0
+
+# Control de congestión AIMD: reduce la tasa si hay pérdidas/errores y la aumenta si no
+bCongestionControl = True
+
+# Tasa mínima a la que puede bajar el control de congestión (conexiones/s)
+fMinRate = 50.0
+
+# Proporción de pérdidas/errores (en cada ventana de intentos) a partir de la cual se frena
+fCongestionThreshold = 0.1
+
+# Cada cuántos segundos se muestra el estado en vivo (tasa, en vuelo, errores). 0 = nunca
+fStatusInterval = 5.0
+
 # Mostrar solo puertos abiertos (True = sí, False = mostrar todo)
 bShowOnlyOpen = True
 
-# Cargar el archivo .env
-load_dotenv()
-# Obtener la ruta desde el archivo .env
-# Ruta del archivo donde se guardarán los resultados
-sOUTPUT_FILE = os.getenv('OUTPUT_FILE')
+# Formato del archivo de resultados: "jsonl", "csv" o "txt" (None = según la extensión de OUTPUT_FILE)
+sOutputFormat = None
+
+# Guardar también puertos cerrados/filtrados en jsonl/csv (necesario para reanudar sin repetirlos)
+bRecordAllStates = True
+
+# Reanudar un escaneo interrumpido: se omiten los pares (host, puerto) ya guardados en OUTPUT_FILE
+bResumeScan = False
+
+# Identificar el servicio de los puertos abiertos enviando sondas (False = solo nombre por puerto)
+bFingerprint = True
+
+# Conexiones simultáneas dedicadas a identificar servicios (independientes del barrido)
+iFingerprintConcurrency = 64
+
+# Tiempo máximo de espera de la respuesta a cada sonda (en segundos)
+fProbeTimeout = 1.0
 
 # Diccionario con algunos servicios comunes y sus puertos
+# (nombre por defecto cuando ninguna sonda identifica el servicio)
 dCommonPorts = {
    20: "FTP Data",
    21: "FTP",
@@ -37,100 +120,1261 @@ dCommonPorts = {
    53: "DNS",
    80: "HTTP",
    110: "POP3",
+   135: "MSRPC",
+   139: "NetBIOS-SSN",
    143: "IMAP",
    443: "HTTPS",
+   445: "SMB",
+   465: "SMTPS",
+   587: "SMTP Submission",
+   993: "IMAPS",
+   995: "POP3S",
+   1433: "MSSQL",
    3306: "MySQL",
    3389: "RDP",
-   8080: "HTTP-alt"
+   5432: "PostgreSQL",
+   5900: "VNC",
+   6379: "Redis",
+   8080: "HTTP-alt",
+   8443: "HTTPS-alt",
+   27017: "MongoDB"
 }
 
 
+# ==========================================
+# BASE DE DATOS DE SONDAS
+# ==========================================
+def fBuildTlsClientHello():
+   """ClientHello TLS 1.2 mínimo (sin SNI) para provocar un ServerHello o una alerta."""
+   bCiphers = bytes.fromhex("c02fc030c02bc02c009c009d002f0035130113021303")
+   bExtensions = (
+      # supported_groups: x25519, secp256r1, secp384r1
+      struct.pack(">HHH", 0x000a, 8, 6) + bytes.fromhex("001d00170018")
+      # ec_point_formats: uncompressed
+      + struct.pack(">HHB", 0x000b, 2, 1) + b"\x00"
+      # signature_algorithms
+      + struct.pack(">HHH", 0x000d, 20, 18) + bytes.fromhex("040305030603080408050806040105010601")
+   )
+   bBody = (b"\x03\x03" + os.urandom(32) + b"\x00"
+            + struct.pack(">H", len(bCiphers)) + bCiphers + b"\x01\x00"
+            + struct.pack(">H", len(bExtensions)) + bExtensions)
+   bHandshake = b"\x01" + struct.pack(">I", len(bBody))[1:] + bBody
+   return b"\x16\x03\x01" + struct.pack(">H", len(bHandshake)) + bHandshake
+
+def fBuildSmbNegotiate():
+   """Negociación SMB1 que ofrece también SMB2 (los Windows actuales responden con SMB2)."""
+   bDialects = b"".join(b"\x02" + sDialect + b"\x00" for sDialect in (b"NT LM 0.12", b"SMB 2.002", b"SMB 2.???"))
+   bHeader = b"\xffSMB\x72" + b"\x00" * 4 + b"\x18\x01\x28" + b"\x00" * 22
+   bMessage = bHeader + b"\x00" + struct.pack("<H", len(bDialects)) + bDialects
+   return b"\x00" + struct.pack(">I", len(bMessage))[1:] + bMessage
+
+# Cada sonda: datos a enviar (b"" = solo escuchar), puertos donde es más probable,
+# si se prueba también en puertos no listados y las firmas de respuesta
+# (expresión regular, servicio, plantilla de versión con los grupos capturados).
+lSERVICE_PROBES = [
+   {
+      "sName": "NULL",
+      "bPayload": b"",
+      "lPorts": [21, 22, 23, 25, 110, 143, 587, 2121, 2222, 3306, 5900, 6667],
+      "bFallback": True,
+      "lMatches": [
+         (rb"^SSH-([\d.]+)-([^\r\n]+)", "SSH", r"\2"),
+         (rb"^220[ -][^\r\n]*?(ESMTP|SMTP|Postfix|Exim|Sendmail)[^\r\n]*", "SMTP", r"\1"),
+         (rb"^220[ -][^\r\n]*?(?i:ftp)[^\r\n]*", "FTP", ""),
+         (rb"^\+OK[^\r\n]*", "POP3", ""),
+         (rb"^\* OK[^\r\n]*", "IMAP", ""),
+         (rb"^.\x00\x00\x00\x0a([\d.]+[^\x00]*)\x00", "MySQL", r"\1"),
+         (rb"^.\x00\x00\x00\xff..(?:Host .* is not allowed to connect)", "MySQL", ""),
+         (rb"^RFB (\d{3}\.\d{3})", "VNC", r"RFB \1"),
+         (rb"^\xff[\xfb-\xfe]", "Telnet", ""),
+         (rb"^:[^\r\n]* NOTICE ", "IRC", ""),
+      ],
+   },
+   {
+      "sName": "HTTP",
+      "bPayload": b"GET / HTTP/1.0\r\n\r\n",
+      "lPorts": [80, 81, 591, 3000, 5000, 8000, 8008, 8080, 8081, 8888, 9000, 9200],
+      "bFallback": True,
+      "lMatches": [
+         (rb"^HTTP/1\.[01] \d{3}.*?\r\n(?i:server): *([^\r\n]+)", "HTTP", r"\1"),
+         (rb"^HTTP/1\.[01] \d{3}", "HTTP", ""),
+      ],
+   },
+   {
+      "sName": "TLS",
+      "bPayload": fBuildTlsClientHello(),
+      "lPorts": [443, 465, 636, 853, 990, 993, 995, 5061, 8443, 9443],
+      "bFallback": True,
+      "lMatches": [
+         (rb"^\x16\x03([\x00-\x04])..\x02", "TLS", ""),
+         (rb"^\x15\x03[\x00-\x04]\x00\x02", "TLS", "alerta"),
+      ],
+   },
+   {
+      "sName": "SMTP",
+      "bPayload": b"EHLO escaner\r\n",
+      "lPorts": [25, 587, 2525],
+      "bFallback": False,
+      "lMatches": [
+         (rb"^(?:220|250)[ -]([^\r\n]*)", "SMTP", r"\1"),
+      ],
+   },
+   {
+      "sName": "Redis",
+      "bPayload": b"*1\r\n$4\r\nPING\r\n",
+      "lPorts": [6379, 6380],
+      "bFallback": False,
+      "lMatches": [
+         (rb"^\+PONG", "Redis", ""),
+         (rb"^-(?:NOAUTH|DENIED Redis)", "Redis", "con autenticación"),
+      ],
+   },
+   {
+      "sName": "RDP",
+      "bPayload": bytes.fromhex("030000130ee000000000000100080003000000"),
+      "lPorts": [3389],
+      "bFallback": False,
+      "lMatches": [
+         (rb"^\x03\x00\x00[\x0b-\x13]\x0e\xd0", "RDP", ""),
+      ],
+   },
+   {
+      "sName": "SMB",
+      "bPayload": fBuildSmbNegotiate(),
+      "lPorts": [139, 445],
+      "bFallback": False,
+      "lMatches": [
+         (rb"^\x00...\xfeSMB", "SMB", "SMB2/3"),
+         (rb"^\x00...\xffSMB", "SMB", "SMB1"),
+      ],
+   },
+]
+
+# Puertos TCP ordenados por frecuencia de aparición (más habituales primero).
+# Los primeros 100 siguen el ranking de frecuencia de nmap-services; a
+# continuación, servicios actuales habituales (bases de datos, colas,
+# contenedores, administración remota, paneles web).
+lTOP_PORTS = [
+   80, 23, 443, 21, 22, 25, 3389, 110, 445, 139, 143, 53, 135, 3306, 8080, 1723, 111, 995, 993, 5900,
+   1025, 587, 8888, 199, 1720, 465, 548, 113, 81, 6001, 10000, 514, 5060, 179, 1026, 2000, 8443, 8000, 32768, 554,
+   26, 1433, 49152, 2001, 515, 8008, 49154, 1027, 5666, 646, 5000, 5631, 631, 49153, 8081, 2049, 88, 79, 5800, 106,
+   2121, 1110, 49155, 6000, 513, 990, 5357, 427, 49156, 543, 544, 5101, 144, 7, 389, 8009, 3128, 444, 9999, 5009,
+   7070, 5190, 3000, 5432, 1900, 3986, 13, 1029, 9, 5051, 6646, 49157, 1028, 873, 1755, 2717, 4899, 9100, 119, 37,
+   6379, 27017, 9200, 5601, 11211, 1521, 5984, 2375, 2376, 6443, 10250, 9092, 2181, 5672, 15672, 1883, 8883, 5985,
+   5986, 47001, 636, 989, 3268, 3269, 8086, 9418, 3690, 6667, 9042, 7001, 8091, 8983, 61616, 8161, 4848, 9090,
+   9443, 8880, 8181, 8082, 8088, 8089, 8444, 8800, 9000, 9001, 1080, 1194, 1812, 2082, 2083, 2086, 2087, 2095,
+   2096, 2222, 2525, 3030, 3050, 3260, 3299, 3333, 4000, 4040, 4443, 4444, 4567, 4711, 4712, 5002, 5003, 5004,
+   5222, 5269, 5353, 5555, 5556, 5678, 5938, 6002, 6080, 6660, 6661, 6662, 6663, 6664, 6665, 6666, 6668,
+   6669, 7000, 7002, 7443, 7777, 7778, 8001, 8002, 8003, 8005, 8010, 8020, 8069, 8083, 8084, 8085, 8090, 8098,
+   8099, 8100, 8200, 8222, 8280, 8281, 8300, 8333, 8400, 8500, 8600, 8686, 8834, 8887, 8899, 9080, 9091, 9160,
+   9300, 9500, 9502, 9503, 9600, 9876, 9943, 9944, 9998, 10001, 10443, 11000, 12345, 16992, 16993, 20000,
+   25565, 27015, 28017, 31337, 50000, 50070,
+]
+
+# Precompilar las firmas una sola vez
+for dProbe in lSERVICE_PROBES:
+   dProbe["lMatches"] = [(re.compile(sRegex, re.S), sService, sVersion)
+                         for sRegex, sService, sVersion in dProbe["lMatches"]]
+
+
 # ==========================================
 # FUNCIONES DEL ESCÁNER
 # ==========================================
-# Usamos una lista global para almacenar resultados
-lResults = []
+# Resultados que un proceso de escaneo agrupa antes de enviarlos al colector
+iRESULT_BATCH = 256
+
+# Margen de descriptores reservados para el propio proceso (stdout, archivo de salida, etc.)
+iFD_MARGIN = 64
 
-# Lock para evitar que múltiples hilos impriman al mismo tiempo
-print_lock = threading.Lock()
+def fAjustarConcurrencia(iConcurrency, iExtra=0):
+   """
+   Ajusta la concurrencia al límite de descriptores de archivo del sistema.
+   Intenta subir el límite blando (RLIMIT_NOFILE) y, si no es suficiente,
+   reduce la concurrencia para que nunca se agoten los descriptores.
+
+   Args:
+      iConcurrency: Concurrencia deseada
+      iExtra: Descriptores usados aparte del barrido (identificación de servicios)
+
+   Returns:
+      int: Concurrencia efectiva
+   """
+   if resource is None:
+      return iConcurrency
 
-# Función que escanea un solo puerto
-def fScanPort(iPort):
    try:
-      # Crear socket TCP
-      oSocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-      oSocket.settimeout(fTimeout)
+      iSoft, iHard = resource.getrlimit(resource.RLIMIT_NOFILE)
+      iReserved = iFD_MARGIN + iExtra
+      iNeeded = iConcurrency + iReserved
+      if iSoft != resource.RLIM_INFINITY and iSoft < iNeeded:
+         iNewSoft = iNeeded if iHard == resource.RLIM_INFINITY else min(iNeeded, iHard)
+         resource.setrlimit(resource.RLIMIT_NOFILE, (iNewSoft, iHard))
+         iSoft = iNewSoft
+      if iSoft != resource.RLIM_INFINITY:
+         return max(1, min(iConcurrency, iSoft - iReserved))
+   except (ValueError, OSError) as e:
+      print(f"WARNING - No se pudo ajustar el límite de descriptores: {e}")
+   return iConcurrency
+
+def fTopPorts(iCount):
+   """
+   Devuelve los iCount puertos más frecuentes. Si se piden más de los que
+   tiene la lista ordenada (p. ej. top 1000), se completan con el resto
+   de puertos en orden ascendente (los puertos bajos son los más usados).
+   """
+   lPorts = lTOP_PORTS[:iCount]
+   if len(lPorts) < iCount:
+      setRanked = set(lPorts)
+      iterRest = (iPort for iPort in range(1, 65536) if iPort not in setRanked)
+      lPorts += list(itertools.islice(iterRest, iCount - len(lPorts)))
+   return lPorts
+
+def fRandomPermutation(iCount, iSeed):
+   """
+   Genera una permutación pseudoaleatoria de 0..iCount-1 sin materializarla:
+   un generador congruencial lineal de periodo completo módulo la potencia de
+   dos siguiente (Hull-Dobell: c impar, a ≡ 1 mod 4) recorre todo el ciclo y
+   se descartan los valores fuera de rango (cycle walking). Memoria O(1).
+   """
+   if iCount <= 0:
+      return
+   iModulus = 1 << max(2, (iCount - 1).bit_length())
+   oRandom = random.Random(iSeed)
+   iMultiplier = oRandom.randrange(iModulus // 4) * 4 + 1
+   iIncrement = oRandom.randrange(iModulus // 2) * 2 + 1
+   iValue = oRandom.randrange(iModulus)
+   for _ in range(iModulus):
+      iValue = (iMultiplier * iValue + iIncrement) % iModulus
+      if iValue < iCount:
+         yield iValue
+
+class PortSequence:
+   """
+   Secuencia de puertos a escanear según la estrategia de orden elegida.
+   Se puede recorrer varias veces (mismo orden, semilla fija) y enviar a
+   otros procesos, ya que no guarda la lista completa de puertos.
+   """
+
+   def __init__(self, iStart, iEnd, sOrder="lineal", iTopPorts=0, iSeed=None):
+      if sOrder not in ("lineal", "aleatorio", "frecuencia"):
+         raise ValueError(f"Orden de puertos no válido: {sOrder}")
+      self.iStart = iStart
+      self.iEnd = iEnd
+      self.sOrder = sOrder
+      self.iSeed = random.randrange(1 << 30) if iSeed is None else iSeed
+      # Con top-N sí se guarda la lista (ya ordenada por frecuencia)
+      self.lTop = fTopPorts(iTopPorts) if iTopPorts > 0 else None
+
+   def __len__(self):
+      return len(self.lTop) if self.lTop is not None else max(0, self.iEnd - self.iStart + 1)
+
+   def __iter__(self):
+      if self.lTop is not None:
+         if self.sOrder == "aleatorio":
+            return (self.lTop[iIndex] for iIndex in fRandomPermutation(len(self.lTop), self.iSeed))
+         # "lineal" y "frecuencia": por orden de frecuencia
+         return iter(self.lTop)
+
+      if self.sOrder == "lineal":
+         return iter(range(self.iStart, self.iEnd + 1))
+      if self.sOrder == "aleatorio":
+         return (self.iStart + iIndex for iIndex in fRandomPermutation(len(self), self.iSeed))
+      return self.fFrequencyFirst()
 
-      # Intentar conectarse al puerto
-      iResult = oSocket.connect_ex((sTarget, iPort))
+   def fFrequencyFirst(self):
+      # Primero los puertos frecuentes que caen dentro del rango...
+      lRanked = [iPort for iPort in lTOP_PORTS if self.iStart <= iPort <= self.iEnd]
+      yield from lRanked
+      # ...y después el resto del rango en orden aleatorio
+      setRanked = set(lRanked)
+      for iIndex in fRandomPermutation(len(self), self.iSeed):
+         iPort = self.iStart + iIndex
+         if iPort not in setRanked:
+            yield iPort
 
-      # Si la conexión fue exitosa (puerto abierto)
-      if iResult == 0:
+   def __str__(self):
+      sOrigen = f"top {len(self)}" if self.lTop is not None else f"{self.iStart}-{self.iEnd}"
+      return f"{sOrigen}, orden {self.sOrder}"
+
+def fExpandTargets(sSpecs):
+   """
+   Expande la especificación de objetivos (CIDR, rangos, archivos y
+   nombres de host) en una lista de hosts sin duplicados.
+
+   Args:
+      sSpecs: Objetivos separados por comas
+
+   Returns:
+      list: Hosts (IPs o nombres) en el orden en que aparecen
+   """
+   lHosts = []
+   setSeen = set()
+
+   def fAdd(sHost):
+      if sHost not in setSeen:
+         setSeen.add(sHost)
+         lHosts.append(sHost)
+
+   def fExpand(sSpec):
+      sSpec = sSpec.strip()
+      if not sSpec or sSpec.startswith("#"):
+         return
+
+      # Archivo con un objetivo por línea
+      if sSpec.startswith("@"):
+         with open(sSpec[1:], "r", encoding="utf-8") as fIn:
+            for sLinea in fIn:
+               for sParte in sLinea.split(","):
+                  fExpand(sParte)
+         return
+
+      # Red en notación CIDR
+      if "/" in sSpec:
+         oNetwork = ipaddress.ip_network(sSpec, strict=False)
+         for oIp in oNetwork.hosts():
+            fAdd(str(oIp))
+         return
+
+      # Rango de IPs: "a.b.c.d-e" o "a.b.c.d-a.b.c.z"
+      if "-" in sSpec:
+         sStart, sEnd = sSpec.split("-", 1)
+         try:
+            oStart = ipaddress.ip_address(sStart.strip())
+         except ValueError:
+            # No es una IP: es un nombre de host con guion
+            fAdd(sSpec)
+            return
+         sEnd = sEnd.strip()
+         if sEnd.isdigit() and oStart.version == 4:
+            sEnd = sStart.strip().rsplit(".", 1)[0] + "." + sEnd
+         oEnd = ipaddress.ip_address(sEnd)
+         if oEnd.version != oStart.version or oEnd < oStart:
+            raise ValueError(f"Rango de IPs inválido: {sSpec}")
+         # Direcciones de la misma clase que el rango (un entero pequeño sería IPv4)
+         for iIp in range(int(oStart), int(oEnd) + 1):
+            fAdd(str(type(oStart)(iIp)))
+         return
+
+      # IP o nombre de host
+      fAdd(sSpec)
+
+   for sSpec in sSpecs.split(","):
+      fExpand(sSpec)
+   return lHosts
+
+async def fResolveTargets(lHosts, iConcurrency):
+   """
+   Resuelve todos los objetivos una sola vez antes del escaneo (en paralelo)
+   para no repetir la consulta DNS en cada conexión.
+
+   Returns:
+      list: Tuplas (nombre, familia de socket, dirección IP) de los hosts resueltos
+   """
+   oLoop = asyncio.get_running_loop()
+   oSemaphore = asyncio.Semaphore(max(1, min(iConcurrency, 64)))
+
+   async def fResolve(sHost):
+      # Las IPs literales no necesitan resolución
+      try:
+         oIp = ipaddress.ip_address(sHost)
+         return (sHost, socket.AF_INET6 if oIp.version == 6 else socket.AF_INET, sHost)
+      except ValueError:
+         pass
+      async with oSemaphore:
+         try:
+            lInfo = await oLoop.getaddrinfo(sHost, None, type=socket.SOCK_STREAM)
+            iFamily, _, _, _, tSockAddr = lInfo[0]
+            return (sHost, iFamily, tSockAddr[0])
+         except (socket.gaierror, OSError) as e:
+            print(f"WARNING - No se pudo resolver el objetivo {sHost}: {e}")
+            return None
+
+   lResolved = await asyncio.gather(*(fResolve(sHost) for sHost in lHosts))
+   return [tHost for tHost in lResolved if tHost is not None]
+
+def fWorkQueue(lHosts, iterPorts, setSkip=None):
+   """
+   Cola global de trabajo (host, puerto). Se recorre puerto a puerto,
+   alternando entre hosts, de forma que ningún host recibe ráfagas
+   de conexiones consecutivas. Es un generador: no se materializan
+   los pares aunque se escanee un /16 completo. Los pares de setSkip
+   (ya escaneados en una ejecución anterior) se omiten.
+   """
+   for iPort in iterPorts:
+      for tHost in lHosts:
+         if setSkip and (tHost[0], iPort) in setSkip:
+            continue
+         yield tHost, iPort
+
+class RttEstimator:
+   """
+   Estimador de RTT por host al estilo TCP (RFC 6298). Mantiene SRTT y
+   RTTVAR a partir de las respuestas del host (puerto abierto o cerrado)
+   y calcula el tiempo de espera (RTO) de las siguientes conexiones.
+   Hasta la primera respuesta se usa el tiempo de espera fijo.
+   """
+   ALPHA = 1 / 8
+   BETA = 1 / 4
+
+   def __init__(self, fMaxTimeout, fMinTimeout, bAdaptive=True):
+      self.fMaxTimeout = fMaxTimeout
+      self.fMinTimeout = min(fMinTimeout, fMaxTimeout)
+      self.bAdaptive = bAdaptive
+      self.fSrtt = None
+      self.fRttVar = None
+      self.fRto = fMaxTimeout
+
+   def fAddSample(self, fRtt):
+      """Incorpora una medida de RTT (solo de primeros intentos, algoritmo de Karn)."""
+      if not self.bAdaptive:
+         return
+      if self.fSrtt is None:
+         self.fSrtt = fRtt
+         self.fRttVar = fRtt / 2
+      else:
+         self.fRttVar = (1 - self.BETA) * self.fRttVar + self.BETA * abs(self.fSrtt - fRtt)
+         self.fSrtt = (1 - self.ALPHA) * self.fSrtt + self.ALPHA * fRtt
+      self.fRto = min(max(self.fSrtt + 4 * self.fRttVar, self.fMinTimeout), self.fMaxTimeout)
+
+   def fGetTimeout(self, iAttempt=0):
+      """Tiempo de espera para el intento indicado (se duplica en cada reintento)."""
+      if not self.bAdaptive:
+         return self.fMaxTimeout
+      return min(self.fRto * (2 ** iAttempt), self.fMaxTimeout)
+
+class TokenBucket:
+   """
+   Cubo de tokens para limitar los intentos de conexión por segundo.
+   Cada llamada reserva el siguiente hueco libre (una espera por intento,
+   sin sondeos), permitiendo ráfagas de hasta fBurst segundos de tasa.
+   """
+
+   def __init__(self, fRate, fBurst=0.1):
+      self.fRate = fRate
+      self.fBurst = fBurst
+      self.fNextSlot = time.monotonic()
+
+   async def fAcquire(self):
+      fNow = time.monotonic()
+      # Los huecos no usados se acumulan como máximo fBurst segundos
+      fSlot = max(self.fNextSlot, fNow - self.fBurst)
+      self.fNextSlot = fSlot + 1.0 / self.fRate
+      if fSlot > fNow:
+         await asyncio.sleep(fSlot - fNow)
+
+class CongestionController:
+   """
+   Limitador de tasa global con control de congestión AIMD: cada ventana de
+   iWindow intentos se calcula la proporción de pérdidas (intentos sin
+   respuesta cuyo reintento sí obtuvo respuesta) y errores locales; si
+   supera el umbral la tasa se reduce a la mitad (decremento multiplicativo)
+   y si no se incrementa en un 5% de la tasa máxima (incremento aditivo).
+   También lleva las métricas en vivo: tasa, conexiones en vuelo y errores.
+   """
+   iWindow = 100
+
+   def __init__(self, fMaxRate, fMinRate, fThreshold, bAimd=True):
+      self.fMaxRate = fMaxRate
+      self.fMinRate = min(fMinRate, fMaxRate) if fMaxRate > 0 else fMinRate
+      self.fThreshold = fThreshold
+      self.bAimd = bAimd and fMaxRate > 0
+      # Con AIMD se arranca a un cuarto de la tasa máxima y se sube si no hay errores
+      fInitialRate = max(self.fMinRate, fMaxRate / 4) if self.bAimd else fMaxRate
+      self.oBucket = TokenBucket(fInitialRate) if fMaxRate > 0 else None
+      self.iInFlight = 0
+      self.iAttempts = 0
+      self.iWindowAttempts = 0
+      self.iWindowErrors = 0
+      self.fErrorRate = 0.0
+      self.iLastAttempts = 0
+      self.fLastSnapshot = time.monotonic()
+
+   @property
+   def fRate(self):
+      return self.oBucket.fRate if self.oBucket else 0.0
+
+   async def fAcquire(self):
+      if self.oBucket:
+         await self.oBucket.fAcquire()
+      self.iInFlight += 1
+
+   def fRelease(self, bCongestion):
+      """Registra el resultado de un intento (bCongestion = pérdida o error local)."""
+      self.iInFlight -= 1
+      self.iAttempts += 1
+      self.iWindowAttempts += 1
+      self.iWindowErrors += bCongestion
+      if self.iWindowAttempts < self.iWindow:
+         return
+
+      self.fErrorRate = self.iWindowErrors / self.iWindowAttempts
+      self.iWindowAttempts = self.iWindowErrors = 0
+      if not self.bAimd:
+         return
+      if self.fErrorRate > self.fThreshold:
+         self.oBucket.fRate = max(self.fMinRate, self.oBucket.fRate / 2)
+      else:
+         self.oBucket.fRate = min(self.fMaxRate, self.oBucket.fRate + self.fMaxRate * 0.05)
+
+   def fSnapshot(self):
+      """Métricas en vivo desde la última llamada."""
+      fNow = time.monotonic()
+      fMeasured = (self.iAttempts - self.iLastAttempts) / max(fNow - self.fLastSnapshot, 1e-6)
+      self.iLastAttempts = self.iAttempts
+      self.fLastSnapshot = fNow
+      return {
+         "fRate": self.fRate,
+         "fMeasuredRate": fMeasured,
+         "iInFlight": self.iInFlight,
+         "fErrorRate": self.fErrorRate,
+         "iAttempts": self.iAttempts,
+      }
+
+def fPrintStatus(dStats):
+   """Muestra el estado en vivo del escaneo."""
+   sLimite = f"límite {dStats['fRate']:.0f}/s" if dStats["fRate"] else "sin límite"
+   print(f"INFO    - [estado] {dStats['iAttempts']} intentos | {dStats['fMeasuredRate']:.0f} conexiones/s ({sLimite}) "
+         f"| en vuelo {dStats['iInFlight']} | pérdidas/errores {dStats['fErrorRate'] * 100:.1f}%")
+
+# Errores locales que indican saturación (puertos efímeros, búferes o descriptores agotados)
+setLOCAL_CONGESTION_ERRNOS = {errno.EADDRNOTAVAIL, errno.ENOBUFS, errno.EAGAIN, errno.EMFILE, errno.ENFILE}
+
+# Función que escanea un solo puerto (conexión no bloqueante)
+async def fScanPort(tHost, iPort, oRtt, oControl, iRetries=1):
+   """
+   Escanea un puerto con hasta iRetries reintentos para los puertos sin respuesta.
+
+   Returns:
+      str: Estado del puerto ("abierto", "cerrado", "filtrado" o "error")
+   """
+   sHost, iFamily, sAddress = tHost
+   oLoop = asyncio.get_running_loop()
+   sState = "filtrado"
+   try:
+      for iAttempt in range(iRetries + 1):
+         # Respetar el límite de tasa global antes de cada intento
+         await oControl.fAcquire()
+         bCongestion = False
+         oSocket = None
          try:
-            # Intentar recibir información (banner del servicio)
-            sBanner = oSocket.recv(1024).decode(errors="ignore").strip()
-         except:
-            sBanner = "N/A"
-
-         # Obtener nombre del servicio si es conocido
-         sService = dCommonPorts.get(iPort, "Desconocido")
-
-         # Formar línea de resultado
-         sResult = f"INFO    - [+] Puerto {iPort} ABIERTO ({sService}) | Banner: {sBanner}"
-
-         # Imprimir y guardar el resultado (con control de concurrencia)
-         with print_lock:
-            print(sResult)
-            lResults.append(sResult)
-      elif not bShowOnlyOpen:
-         # Mostrar también puertos cerrados si se configuró así
-         sResult = f"INFO    - [-] Puerto {iPort} cerrado"
-         with print_lock:
-            print(sResult)
-
-      # Cerrar socket
-      oSocket.close()
+            # Crear socket TCP no bloqueante
+            oSocket = socket.socket(iFamily, socket.SOCK_STREAM)
+            oSocket.setblocking(False)
+
+            # Intentar conectarse al puerto
+            fStart = time.perf_counter()
+            try:
+               await asyncio.wait_for(oLoop.sock_connect(oSocket, (sAddress, iPort)), oRtt.fGetTimeout(iAttempt))
+               sState = "abierto"
+            except asyncio.TimeoutError:
+               # Sin respuesta: puerto filtrado, se reintenta
+               sState = "filtrado"
+               continue
+            except ConnectionRefusedError:
+               sState = "cerrado"
+            except OSError as e:
+               if e.errno in setLOCAL_CONGESTION_ERRNOS:
+                  # Recursos locales agotados: frenar y reintentar
+                  bCongestion = True
+                  sState = "error"
+                  continue
+               # Host o red inalcanzable: no aporta medida de RTT
+               sState = "cerrado"
+               break
+
+            # Solo se mide el RTT en el primer intento (algoritmo de Karn)
+            if iAttempt == 0:
+               oRtt.fAddSample(time.perf_counter() - fStart)
+            else:
+               # Un reintento con respuesta significa que el intento anterior se perdió:
+               # congestión o rate-limiting, no un puerto filtrado
+               bCongestion = True
+            break
+         finally:
+            # Cerrar socket (el banner se obtiene después, en la fase de identificación)
+            if oSocket is not None:
+               oSocket.close()
+            oControl.fRelease(bCongestion)
+
+      return sState
    except Exception as e:
       # Manejo de errores por puerto
-      with print_lock:
-         print(f"ERROR   - Error escaneando puerto {iPort}: {e}")
+      print(f"ERROR   - Error escaneando {sHost}:{iPort}: {e}")
+      return "error"
+
+@lru_cache(maxsize=None)
+def fProbesForPort(iPort):
+   """
+   Orden de sondas para un puerto: primero las que listan ese puerto,
+   después la sonda NULL (servicios que saludan primero) y por último
+   las genéricas. Las sondas específicas de otros puertos no se envían.
+   """
+   lSpecific = [dProbe for dProbe in lSERVICE_PROBES if iPort in dProbe["lPorts"]]
+   lFallback = [dProbe for dProbe in lSERVICE_PROBES if dProbe["bFallback"] and dProbe not in lSpecific]
+   lFallback.sort(key=lambda dProbe: dProbe["sName"] != "NULL")
+   return tuple(lSpecific + lFallback)
+
+def fMatchResponse(dProbe, bData):
+   """
+   Busca la primera firma de la sonda que coincide con la respuesta.
+
+   Returns:
+      str: Servicio (con versión si se conoce), o None si no hay coincidencia
+   """
+   for oRegex, sService, sVersion in dProbe["lMatches"]:
+      oMatch = oRegex.search(bData)
+      if oMatch:
+         sDetalle = oMatch.expand(sVersion.encode()).decode(errors="ignore").strip() if sVersion else ""
+         return f"{sService} ({sDetalle})" if sDetalle else sService
+   return None
+
+def fCleanBanner(bData):
+   """Banner legible: sin caracteres de control y limitado a 200 caracteres."""
+   # Respuestas binarias (TLS, SMB, RDP...): no tiene sentido mostrarlas como texto
+   iPrintable = sum(1 for iByte in bData[:256] if 32 <= iByte < 127 or iByte in (9, 10, 13))
+   if iPrintable < 0.7 * min(len(bData), 256):
+      return f"binario ({len(bData)} bytes)"
+   sBanner = bData.decode(errors="ignore")
+   sBanner = "".join(c if c.isprintable() else " " for c in sBanner)
+   return " ".join(sBanner.split())[:200] or "N/A"
+
+async def fFingerprint(tHost, iPort, fConnectTimeout=1.0, fReadTimeout=1.0):
+   """
+   Identifica el servicio de un puerto abierto enviando las sondas por
+   orden de probabilidad (una conexión por sonda) hasta que una firma
+   coincide. fReadTimeout es la espera máxima de la respuesta a cada sonda.
+
+   Returns:
+      tuple: (servicio, banner)
+   """
+   sHost, iFamily, sAddress = tHost
+   oLoop = asyncio.get_running_loop()
+   bFirstData = None
+
+   for dProbe in fProbesForPort(iPort):
+      oSocket = socket.socket(iFamily, socket.SOCK_STREAM)
+      oSocket.setblocking(False)
+      try:
+         await asyncio.wait_for(oLoop.sock_connect(oSocket, (sAddress, iPort)), fConnectTimeout)
+         if dProbe["bPayload"]:
+            await asyncio.wait_for(oLoop.sock_sendall(oSocket, dProbe["bPayload"]), fReadTimeout)
+         bData = await asyncio.wait_for(oLoop.sock_recv(oSocket, 4096), fReadTimeout)
+      except (asyncio.TimeoutError, OSError):
+         continue
+      finally:
+         oSocket.close()
+
+      if not bData:
+         continue
+      if bFirstData is None:
+         bFirstData = bData
+      sService = fMatchResponse(dProbe, bData)
+      if sService:
+         return sService, fCleanBanner(bData)
+
+   # Ninguna firma coincide: nombre por puerto y el primer banner recibido
+   return dCommonPorts.get(iPort, "Desconocido"), fCleanBanner(bFirstData) if bFirstData else "N/A"
+
+class ResultSink:
+   """
+   Destino de resultados en streaming: cada resultado se escribe en cuanto
+   llega (JSON Lines, CSV o texto), con escritura en búfer y volcado cada
+   iFlushEvery resultados o fFlushInterval segundos. Un fallo o un Ctrl-C
+   solo pierde lo que quede en el búfer, y en jsonl/csv el archivo sirve
+   para reanudar el escaneo.
+   """
+   lCSV_FIELDS = ["time", "host", "port", "state", "service", "banner", "latency_ms"]
+
+   def __init__(self, sPath, sFormat=None, bRecordAllStates=True, bResume=False,
+                iFlushEvery=100, fFlushInterval=1.0):
+      self.sPath = sPath
+      self.sFormat = sFormat or self.fFormatFromPath(sPath)
+      self.bRecordAllStates = bRecordAllStates and self.sFormat != "txt"
+      self.iFlushEvery = iFlushEvery
+      self.fFlushInterval = fFlushInterval
+      self.iPending = 0
+      self.fLastFlush = time.monotonic()
+      self.setDone = set()
+
+      bAppend = bResume and os.path.isfile(sPath) and os.path.getsize(sPath) > 0
+      if bAppend:
+         self.setDone = self.fLoadDone()
+         self.fEnsureNewline()
+      self.fOut = open(sPath, "a" if bAppend else "w", encoding="utf-8", newline="", buffering=64 * 1024)
+      self.oCsvWriter = None
+      if self.sFormat == "csv":
+         self.oCsvWriter = csv.writer(self.fOut)
+         if not bAppend:
+            self.oCsvWriter.writerow(self.lCSV_FIELDS)
+
+   @staticmethod
+   def fFormatFromPath(sPath):
+      sExt = os.path.splitext(sPath)[1].lower()
+      if sExt in (".jsonl", ".ndjson", ".json"):
+         return "jsonl"
+      if sExt == ".csv":
+         return "csv"
+      return "txt"
+
+   def fLoadDone(self):
+      """
+      Lee los pares (host, puerto) ya escaneados. Las líneas incompletas
+      (escritas a medias durante un fallo) se ignoran.
+      """
+      setDone = set()
+      if self.sFormat == "txt":
+         print("WARNING - El formato txt no permite reanudar: se repetirá el escaneo completo")
+         return setDone
+      with open(self.sPath, "r", encoding="utf-8", newline="") as fIn:
+         if self.sFormat == "jsonl":
+            for sLinea in fIn:
+               try:
+                  dRecord = json.loads(sLinea)
+                  setDone.add((dRecord["host"], int(dRecord["port"])))
+               except (ValueError, KeyError, TypeError):
+                  continue
+         else:
+            for dRecord in csv.DictReader(fIn):
+               try:
+                  setDone.add((dRecord["host"], int(dRecord["port"])))
+               except (ValueError, KeyError, TypeError):
+                  continue
+      return setDone
+
+   def fEnsureNewline(self):
+      # Si la última línea quedó a medias, empezar en una línea nueva
+      with open(self.sPath, "rb+") as fIn:
+         fIn.seek(-1, os.SEEK_END)
+         if fIn.read(1) != b"\n":
+            fIn.write(b"\n")
+
+   def fWrite(self, sHost, iPort, sState, sService, sBanner, fLatency=None):
+      if sState == "error" or (sState != "abierto" and not self.bRecordAllStates):
+         return
+      fLatencyMs = round(fLatency * 1000, 2) if fLatency is not None else None
+      if self.sFormat == "jsonl":
+         self.fOut.write(json.dumps({
+            "time": round(time.time(), 3), "host": sHost, "port": iPort, "state": sState,
+            "service": sService, "banner": sBanner, "latency_ms": fLatencyMs}, ensure_ascii=False) + "\n")
+      elif self.sFormat == "csv":
+         self.oCsvWriter.writerow([round(time.time(), 3), sHost, iPort, sState, sService or "", sBanner or "",
+                                   "" if fLatencyMs is None else fLatencyMs])
+      else:
+         self.fOut.write(f"INFO    - [+] {sHost}:{iPort} ABIERTO ({sService}) | Banner: {sBanner}\n")
+
+      self.iPending += 1
+      if self.iPending >= self.iFlushEvery or time.monotonic() - self.fLastFlush > self.fFlushInterval:
+         self.fFlush()
+
+   def fWriteText(self, sTexto):
+      """Cabecera/resumen legible; solo se escribe en formato txt."""
+      if self.sFormat == "txt":
+         self.fOut.write(sTexto)
+
+   def fFlush(self):
+      self.fOut.flush()
+      self.iPending = 0
+      self.fLastFlush = time.monotonic()
+
+   def fClose(self):
+      if not self.fOut.closed:
+         self.fFlush()
+         self.fOut.close()
+
+async def fRunScan(lHosts, iterPorts, oOptions, iConcurrency, iPerHost, fnOnResult, setSkip=None, cStates=None,
+                   fRate=None, fnOnStatus=None, bAllStates=True):
+   """
+   Motor asyncio: consume la cola global (host, puerto) con como máximo
+   iConcurrency conexiones en total e iPerHost por host. Las tareas se
+   crean a medida que se libera el semáforo global, por lo que la memoria
+   y los descriptores en uso se mantienen constantes sea cual sea el
+   número de objetivos. Cada puerto abierto (y, con bAllStates, también
+   los cerrados/filtrados) se entrega a fnOnResult
+   (host, puerto, estado, servicio, banner, latencia).
+   Si se pasa cStates, los contadores se actualizan sobre él (siguen
+   disponibles aunque el escaneo se interrumpa). fRate limita los intentos
+   por segundo (por defecto oOptions.fMaxRate) y fnOnStatus recibe
+   periódicamente las métricas en vivo.
+
+   Returns:
+      Counter: Número de puertos por estado
+   """
+   oSemaphore = asyncio.Semaphore(iConcurrency)
+   dHostSemaphores = {tHost[0]: asyncio.Semaphore(iPerHost) for tHost in lHosts}
+   dRtt = {tHost[0]: RttEstimator(oOptions.fTimeout, oOptions.fMinTimeout, oOptions.bAdaptiveTimeout) for tHost in lHosts}
+   cStates = Counter() if cStates is None else cStates
+   setTasks = set()
+   oControl = CongestionController(oOptions.fMaxRate if fRate is None else fRate, oOptions.fMinRate,
+                                   oOptions.fCongestionThreshold, oOptions.bCongestionControl)
+
+   async def fStatusMonitor():
+      while True:
+         await asyncio.sleep(oOptions.fStatusInterval)
+         fnOnStatus(oControl.fSnapshot())
+
+   bMonitor = oOptions.fStatusInterval > 0 and fnOnStatus is not None
+   oMonitor = asyncio.create_task(fStatusMonitor()) if bMonitor else None
+
+   # Identificación de servicios: solo puertos abiertos, en un grupo de
+   # workers aparte para no frenar el barrido de conexiones
+   oFingerprintQueue = asyncio.Queue()
+
+   async def fFingerprintWorker():
+      while True:
+         tHost, iPort, fLatency = await oFingerprintQueue.get()
+         try:
+            sService, sBanner = await fFingerprint(tHost, iPort, oOptions.fTimeout, oOptions.fProbeTimeout)
+         except Exception as e:
+            print(f"ERROR   - Error identificando el servicio de {tHost[0]}:{iPort}: {e}")
+            sService, sBanner = dCommonPorts.get(iPort, "Desconocido"), "N/A"
+         try:
+            fnOnResult(tHost[0], iPort, "abierto", sService, sBanner, fLatency)
+         finally:
+            oFingerprintQueue.task_done()
+
+   lFingerprintWorkers = [asyncio.create_task(fFingerprintWorker())
+                          for _ in range(oOptions.fFingerprintSlots())]
+
+   async def fScanLimited(tHost, iPort):
+      async with dHostSemaphores[tHost[0]]:
+         fStart = time.perf_counter()
+         sState = await fScanPort(tHost, iPort, dRtt[tHost[0]], oControl, oOptions.iMaxRetries)
+         fLatency = time.perf_counter() - fStart
+      cStates[sState] += 1
+      if sState == "abierto" and oOptions.bFingerprint:
+         oFingerprintQueue.put_nowait((tHost, iPort, fLatency))
+      elif sState == "abierto":
+         fnOnResult(tHost[0], iPort, sState, dCommonPorts.get(iPort, "Desconocido"), "N/A", fLatency)
+      elif bAllStates and sState != "error":
+         fnOnResult(tHost[0], iPort, sState, None, None, fLatency)
+
+   def fOnDone(oTask):
+      setTasks.discard(oTask)
+      oSemaphore.release()
+
+   try:
+      for tHost, iPort in fWorkQueue(lHosts, iterPorts, setSkip):
+         await oSemaphore.acquire()
+         oTask = asyncio.create_task(fScanLimited(tHost, iPort))
+         setTasks.add(oTask)
+         oTask.add_done_callback(fOnDone)
+
+      # Esperar a que terminen las conexiones que siguen en vuelo
+      if setTasks:
+         await asyncio.gather(*setTasks)
+      # Esperar a que se identifiquen los últimos puertos abiertos
+      await oFingerprintQueue.join()
+   finally:
+      # Si el escaneo se cancela (p. ej. al dejar de iterar Scanner.fScan),
+      # las conexiones en vuelo no deben seguir informando resultados
+      lPending = [*setTasks, *lFingerprintWorkers] + ([oMonitor] if oMonitor is not None else [])
+      for oPending in lPending:
+         oPending.cancel()
+      await asyncio.gather(*lPending, return_exceptions=True)
+   return cStates
+
+def fShardWorker(lHosts, iterPorts, iShard, iNumShards, bShardHosts, oOptions, iConcurrency, iPerHost, fRate, oQueue,
+                 setSkip=None, bAllStates=True):
+   """
+   Proceso de escaneo: ejecuta su propio bucle de eventos sobre una
+   porción (shard) de hosts o de puertos y envía los resultados por
+   lotes al colector del proceso principal, junto con sus métricas en vivo.
+   """
+   if bShardHosts:
+      lHosts = lHosts[iShard::iNumShards]
+   else:
+      iterPorts = itertools.islice(iterPorts, iShard, None, iNumShards)
+
+   lBatch = []
+   fLastFlush = time.monotonic()
+
+   def fFlush():
+      nonlocal lBatch, fLastFlush
+      if lBatch:
+         oQueue.put(("resultados", lBatch))
+         lBatch = []
+      fLastFlush = time.monotonic()
+
+   def fOnResult(*tResult):
+      lBatch.append(tResult)
+      if len(lBatch) >= iRESULT_BATCH or time.monotonic() - fLastFlush > 0.5:
+         fFlush()
+
+   def fOnStatus(dStats):
+      oQueue.put(("estado", (iShard, dStats)))
+
+   cStates = Counter()
+   try:
+      iConcurrency = fAjustarConcurrencia(iConcurrency, oOptions.fFingerprintSlots())
+      cStates = asyncio.run(fRunScan(lHosts, iterPorts, oOptions, iConcurrency, iPerHost, fOnResult, setSkip,
+                                     fRate=fRate, fnOnStatus=fOnStatus, bAllStates=bAllStates))
+   finally:
+      fFlush()
+      oQueue.put(("fin", dict(cStates)))
+
+def fRunScanSharded(lHosts, iterPorts, oOptions, iConcurrency, iPerHost, iProcesses, fnOnResult, setSkip=None,
+                    cStates=None, fnOnStatus=None, bAllStates=True, oStop=None):
+   """
+   Reparte el escaneo entre iProcesses procesos. Si hay suficientes hosts
+   se reparten los hosts (cada host queda en un único proceso, con su
+   propio estimador de RTT); si no, se reparten los puertos y el límite
+   por host se divide entre los procesos. Los resultados se fusionan en
+   un único colector (fnOnResult) en el proceso principal. La tasa
+   máxima se reparte a partes iguales y cada proceso aplica su propio AIMD.
+   Si se activa oStop (threading.Event) se detienen los procesos.
+
+   Returns:
+      Counter: Número de puertos por estado
+   """
+   bShardHosts = len(lHosts) >= iProcesses
+   iShardConcurrency = max(1, iConcurrency // iProcesses)
+   iShardPerHost = iPerHost if bShardHosts else max(1, iPerHost // iProcesses)
+   fShardRate = oOptions.fMaxRate / iProcesses
+
+   oQueue = multiprocessing.Queue()
+   lProcesses = [
+      multiprocessing.Process(
+         target=fShardWorker,
+         args=(lHosts, iterPorts, iShard, iProcesses, bShardHosts, oOptions, iShardConcurrency, iShardPerHost,
+               fShardRate, oQueue, setSkip, bAllStates),
+         daemon=True)
+      for iShard in range(iProcesses)
+   ]
+   for oProcess in lProcesses:
+      oProcess.start()
+
+   cStates = Counter() if cStates is None else cStates
+   iFinished = 0
+   dShardStatus = {}
+   try:
+      while iFinished < iProcesses:
+         if oStop is not None and oStop.is_set():
+            break
+         try:
+            sKind, oPayload = oQueue.get(timeout=0.5)
+         except queue.Empty:
+            # Si algún proceso murió sin avisar, no esperar indefinidamente
+            if not any(oProcess.is_alive() for oProcess in lProcesses):
+               print("ERROR   - Un proceso de escaneo terminó de forma inesperada")
+               break
+            continue
+         if sKind == "resultados":
+            for tResult in oPayload:
+               fnOnResult(*tResult)
+         elif sKind == "estado":
+            # Agregar las métricas de todos los procesos cuando ya han informado todos
+            iShard, dStats = oPayload
+            dShardStatus[iShard] = dStats
+            if len(dShardStatus) == iProcesses and fnOnStatus is not None:
+               fnOnStatus({
+                  "fRate": sum(d["fRate"] for d in dShardStatus.values()),
+                  "fMeasuredRate": sum(d["fMeasuredRate"] for d in dShardStatus.values()),
+                  "iInFlight": sum(d["iInFlight"] for d in dShardStatus.values()),
+                  "fErrorRate": sum(d["fErrorRate"] for d in dShardStatus.values()) / iProcesses,
+                  "iAttempts": sum(d["iAttempts"] for d in dShardStatus.values()),
+               })
+               dShardStatus.clear()
+         else:
+            cStates.update(oPayload)
+            iFinished += 1
+   finally:
+      bStopped = oStop is not None and oStop.is_set()
+      for oProcess in lProcesses:
+         if bStopped:
+            oProcess.terminate()
+         oProcess.join(timeout=1)
+         if oProcess.is_alive():
+            oProcess.terminate()
+   return cStates
 
 
 # ==========================================
-# INICIO DEL ESCANEO
+# API DEL ESCÁNER
 # ==========================================
-print(f"\nINFO    - Iniciando escaneo de {sTarget} (puertos {iStartPort}-{iEndPort})")
-dtInicio = datetime.now()
-print(f"INFO    - Inicio: {dtInicio.strftime('%Y-%m-%d %H:%M:%S')}\n")
+class ScanOptions:
+   """
+   Opciones de un escaneo. Los valores por defecto son los de la
+   configuración de este script; cada instancia de Scanner usa las suyas,
+   por lo que se pueden lanzar varios escaneos distintos en el mismo proceso.
+   """
+   __slots__ = ("sEngine", "iWorkerProcesses", "iMaxConcurrency", "iMaxPerHost", "fTimeout", "bAdaptiveTimeout",
+                "fMinTimeout", "iMaxRetries", "fMaxRate", "bCongestionControl", "fMinRate", "fCongestionThreshold",
+                "fStatusInterval", "bShowOnlyOpen", "bFingerprint", "iFingerprintConcurrency", "fProbeTimeout")
+
+   def __init__(self, sEngine=sEngine, iWorkerProcesses=iWorkerProcesses, iMaxConcurrency=iMaxConcurrency,
+                iMaxPerHost=iMaxPerHost, fTimeout=fTimeout, bAdaptiveTimeout=bAdaptiveTimeout, fMinTimeout=fMinTimeout,
+                iMaxRetries=iMaxRetries, fMaxRate=fMaxRate, bCongestionControl=bCongestionControl, fMinRate=fMinRate,
+                fCongestionThreshold=fCongestionThreshold, fStatusInterval=fStatusInterval, bShowOnlyOpen=bShowOnlyOpen,
+                bFingerprint=bFingerprint, iFingerprintConcurrency=iFingerprintConcurrency, fProbeTimeout=fProbeTimeout):
+      if sEngine not in ("asyncio", "multiproceso"):
+         raise ValueError(f"Motor de escaneo no válido: {sEngine}")
+      self.sEngine = sEngine
+      self.iWorkerProcesses = iWorkerProcesses
+      self.iMaxConcurrency = iMaxConcurrency
+      self.iMaxPerHost = iMaxPerHost
+      self.fTimeout = fTimeout
+      self.bAdaptiveTimeout = bAdaptiveTimeout
+      self.fMinTimeout = fMinTimeout
+      self.iMaxRetries = iMaxRetries
+      self.fMaxRate = fMaxRate
+      self.bCongestionControl = bCongestionControl
+      self.fMinRate = fMinRate
+      self.fCongestionThreshold = fCongestionThreshold
+      self.fStatusInterval = fStatusInterval
+      self.bShowOnlyOpen = bShowOnlyOpen
+      self.bFingerprint = bFingerprint
+      self.iFingerprintConcurrency = iFingerprintConcurrency
+      self.fProbeTimeout = fProbeTimeout
+
+   def fProcesses(self):
+      """Número de procesos de escaneo según el motor elegido."""
+      if self.sEngine == "asyncio":
+         return 1
+      return self.iWorkerProcesses or os.cpu_count() or 1
+
+   def fFingerprintSlots(self):
+      """Conexiones (y descriptores) dedicadas a la identificación de servicios."""
+      return self.iFingerprintConcurrency if self.bFingerprint else 0
+
+class ScanResult:
+   """Resultado del escaneo de un puerto."""
+   __slots__ = ("sHost", "iPort", "sState", "sService", "sBanner", "fLatency")
+
+   def __init__(self, sHost: str, iPort: int, sState: str, sService: str = None, sBanner: str = None,
+                fLatency: float = None):
+      self.sHost = sHost
+      self.iPort = iPort
+      self.sState = sState          # "abierto", "cerrado" o "filtrado"
+      self.sService = sService      # Solo en puertos abiertos
+      self.sBanner = sBanner
+      self.fLatency = fLatency      # Segundos (conexión y reintentos)
+
+   def fToDict(self):
+      return {sSlot: getattr(self, sSlot) for sSlot in self.__slots__}
+
+   def __repr__(self):
+      return f"ScanResult({self.sHost}:{self.iPort} {self.sState}, {self.sService!r})"
+
+class Scanner:
+   """
+   Escáner reutilizable: no depende de estado global, así que se pueden
+   ejecutar varios escaneos a la vez en el mismo bucle de eventos.
+
+   Ejemplo:
+      oScanner = Scanner("192.168.1.0/24", PortSequence(1, 1024), ScanOptions(iMaxConcurrency=500))
+      async for oResult in oScanner.fScan():
+         print(oResult.sHost, oResult.iPort, oResult.sService)
+   """
 
-# Crear hilos para cada puerto
-lThreads = []
-for iPuerto in range(iStartPort, iEndPort + 1):
-   t = threading.Thread(target=fScanPort, args=(iPuerto,))
-   lThreads.append(t)
-   t.start()
+   def __init__(self, sTargets, oPorts=None, oOptions=None, oSink=None, fnOnStatus=None):
+      """
+      Args:
+         sTargets: Objetivos separados por comas (IP, dominio, CIDR, rango o @archivo)
+         oPorts: Puertos a escanear (PortSequence o cualquier iterable de enteros)
+         oOptions: ScanOptions (por defecto, la configuración del script)
+         oSink: ResultSink donde guardar los resultados en streaming (None = no guardar)
+         fnOnStatus: Función que recibe periódicamente las métricas en vivo
+      """
+      self.sTargets = sTargets if isinstance(sTargets, str) else ",".join(sTargets)
+      self.oPorts = oPorts if oPorts is not None else PortSequence(iStartPort, iEndPort, sPortOrder, iTopPorts)
+      self.oOptions = oOptions if oOptions is not None else ScanOptions()
+      self.oSink = oSink
+      self.fnOnStatus = fnOnStatus
+      self.lTargets = fExpandTargets(self.sTargets)
 
-# Esperar a que todos los hilos terminen
-for t in lThreads:
-   t.join()
+      # En modo multiproceso cada proceso ajusta su parte al límite de descriptores
+      self.iProcesses = self.oOptions.fProcesses()
+      self.iConcurrency = self.oOptions.iMaxConcurrency
+      if self.iProcesses == 1:
+         self.iConcurrency = fAjustarConcurrencia(self.iConcurrency, self.oOptions.fFingerprintSlots())
+      self.iPerHost = max(1, min(self.oOptions.iMaxPerHost, self.iConcurrency))
 
-# Fin del escaneo
-dtFin = datetime.now()
-tdDuracion = dtFin - dtInicio
+      # Contadores del escaneo (disponibles aunque se interrumpa)
+      self.cStates = Counter()
+      self.cOpenPorts = Counter()
 
-print(f"\nINFO    - Escaneo finalizado: {dtFin.strftime('%Y-%m-%d %H:%M:%S')}")
-print(f"INFO    - Duración total: {tdDuracion}")
+   async def fScan(self):
+      """
+      Ejecuta el escaneo y devuelve los resultados a medida que llegan
+      (iterador asíncrono de ScanResult): los puertos abiertos y, si
+      bShowOnlyOpen es False, también los cerrados y filtrados. Todos se
+      escriben además en el sink. Si se deja de iterar, el escaneo se detiene.
+      """
+      oLoop = asyncio.get_running_loop()
+      oResults = asyncio.Queue()
+      bShowOnlyOpen = self.oOptions.bShowOnlyOpen
+      bAllStates = not bShowOnlyOpen or (self.oSink is not None and self.oSink.bRecordAllStates)
+      setSkip = self.oSink.setDone if self.oSink is not None else None
+
+      def fOnResult(sHost, iPort, sState, sService, sBanner, fLatency=None):
+         if sState == "abierto":
+            self.cOpenPorts[sHost] += 1
+         if self.oSink is not None:
+            self.oSink.fWrite(sHost, iPort, sState, sService, sBanner, fLatency)
+         if sState == "abierto" or not bShowOnlyOpen:
+            oResults.put_nowait(ScanResult(sHost, iPort, sState, sService, sBanner, fLatency))
+
+      lHosts = await fResolveTargets(self.lTargets, self.iConcurrency)
+      oStop = None
+      if self.iProcesses > 1:
+         # El colector multiproceso es bloqueante: se ejecuta en un hilo y
+         # entrega los resultados al bucle de eventos
+         oStop = threading.Event()
+         fnThreadResult = partial(oLoop.call_soon_threadsafe, fOnResult)
+         oTask = oLoop.run_in_executor(None, partial(
+            fRunScanSharded, lHosts, self.oPorts, self.oOptions, self.iConcurrency, self.iPerHost, self.iProcesses,
+            fnThreadResult, setSkip, self.cStates, self.fnOnStatus, bAllStates, oStop))
+      else:
+         oTask = asyncio.ensure_future(fRunScan(
+            lHosts, self.oPorts, self.oOptions, self.iConcurrency, self.iPerHost, fOnResult, setSkip, self.cStates,
+            fnOnStatus=self.fnOnStatus, bAllStates=bAllStates))
+      # Marca de fin: llega a la cola después del último resultado
+      oTask.add_done_callback(lambda _: oResults.put_nowait(None))
+
+      try:
+         while True:
+            oResult = await oResults.get()
+            if oResult is None:
+               break
+            yield oResult
+         oTask.result()
+      finally:
+         if not oTask.done():
+            if oStop is not None:
+               oStop.set()
+            oTask.cancel()
+            await asyncio.gather(oTask, return_exceptions=True)
 
 
 # ==========================================
-# GUARDAR RESULTADOS A ARCHIVO
+# LÍNEA DE COMANDOS
 # ==========================================
-try:
-   with open(sOUTPUT_FILE, "w") as fOut:
-      fOut.write(f"Escaneo de {sTarget}\n")
-      fOut.write(f"Inicio: {dtInicio}\nFin: {dtFin}\nDuración: {tdDuracion}\n\n")
-      for sLinea in lResults:
-         fOut.write(sLinea + "\n")
-   print(f"\nINFO    - Resultados guardados en: {sOUTPUT_FILE}")
-except Exception as e:
-   print(f"ERROR   - No se pudo guardar el archivo: {e}")
+def fParsePortRange(sRange):
+   """Convierte "inicio-fin" (o un único puerto) en una tupla (inicio, fin)."""
+   sStart, _, sEnd = sRange.partition("-")
+   try:
+      iStart, iEnd = int(sStart), int(sEnd or sStart)
+   except ValueError:
+      raise argparse.ArgumentTypeError(f"Rango de puertos no válido: {sRange}")
+   if not 1 <= iStart <= iEnd <= 65535:
+      raise argparse.ArgumentTypeError(f"Rango de puertos no válido: {sRange}")
+   return iStart, iEnd
+
+def fParseArgs(lArgs=None):
+   """Argumentos de la línea de comandos (por defecto, la configuración del script y el .env)."""
+   # Cargar el archivo .env (ruta del archivo donde se guardarán los resultados)
+   load_dotenv()
+
+   oParser = argparse.ArgumentParser(description="Escáner de puertos TCP asíncrono con identificación de servicios")
+   oParser.add_argument("objetivos", nargs="?", default=sTarget,
+                        help="IP, dominio, red CIDR, rango de IPs o @archivo, separados por comas")
+   oParser.add_argument("-p", "--puertos", type=fParsePortRange, default=(iStartPort, iEndPort),
+                        help="Rango de puertos, p. ej. 1-1024")
+   oParser.add_argument("--top", type=int, default=iTopPorts, help="Escanear solo los N puertos más frecuentes")
+   oParser.add_argument("--orden", choices=["frecuencia", "aleatorio", "lineal"], default=sPortOrder)
+   oParser.add_argument("--motor", choices=["asyncio", "multiproceso"], default=sEngine)
+   oParser.add_argument("--procesos", type=int, default=iWorkerProcesses,
+                        help="Procesos del motor multiproceso (0 = uno por núcleo)")
+   oParser.add_argument("-c", "--concurrencia", type=int, default=iMaxConcurrency, help="Conexiones simultáneas")
+   oParser.add_argument("--por-host", type=int, default=iMaxPerHost, help="Conexiones simultáneas por host")
+   oParser.add_argument("-t", "--timeout", type=float, default=fTimeout, help="Tiempo de espera máximo (s)")
+   oParser.add_argument("--timeout-fijo", action="store_true", help="No adaptar el tiempo de espera al RTT")
+   oParser.add_argument("--reintentos", type=int, default=iMaxRetries)
+   oParser.add_argument("--tasa", type=float, default=fMaxRate, help="Conexiones por segundo (0 = sin límite)")
+   oParser.add_argument("--sin-aimd", action="store_true", help="Desactivar el control de congestión")
+   oParser.add_argument("--estado", type=float, default=fStatusInterval,
+                        help="Segundos entre mensajes de estado (0 = nunca)")
+   oParser.add_argument("--todos", action="store_true", help="Mostrar también puertos cerrados y filtrados")
+   oParser.add_argument("--sin-fingerprint", action="store_true", help="No enviar sondas a los puertos abiertos")
+   oParser.add_argument("-o", "--salida", default=os.getenv('OUTPUT_FILE'),
+                        help="Archivo de resultados (por defecto OUTPUT_FILE del .env)")
+   oParser.add_argument("--formato", choices=["jsonl", "csv", "txt"], default=sOutputFormat)
+   oParser.add_argument("--reanudar", action="store_true", default=bResumeScan,
+                        help="Omitir los pares (host, puerto) ya guardados en el archivo de resultados")
+   return oParser.parse_args(lArgs)
+
+async def fScanConsole(oScanner):
+   """Muestra por consola los resultados del escaneo a medida que llegan."""
+   async for oResult in oScanner.fScan():
+      if oResult.sState == "abierto":
+         print(f"INFO    - [+] {oResult.sHost}:{oResult.iPort} ABIERTO ({oResult.sService}) | Banner: {oResult.sBanner}")
+      else:
+         print(f"INFO    - [-] {oResult.sHost}:{oResult.iPort} {oResult.sState}")
+
+def main(lArgs=None):
+   oArgs = fParseArgs(lArgs)
+   oOptions = ScanOptions(
+      sEngine=oArgs.motor, iWorkerProcesses=oArgs.procesos, iMaxConcurrency=oArgs.concurrencia,
+      iMaxPerHost=oArgs.por_host, fTimeout=oArgs.timeout, bAdaptiveTimeout=bAdaptiveTimeout and not oArgs.timeout_fijo,
+      iMaxRetries=oArgs.reintentos, fMaxRate=oArgs.tasa, bCongestionControl=bCongestionControl and not oArgs.sin_aimd,
+      fStatusInterval=oArgs.estado, bShowOnlyOpen=bShowOnlyOpen and not oArgs.todos,
+      bFingerprint=bFingerprint and not oArgs.sin_fingerprint)
+   oPorts = PortSequence(oArgs.puertos[0], oArgs.puertos[1], oArgs.orden, oArgs.top)
+
+   # Abrir el destino de resultados antes de escanear (escritura en streaming)
+   oSink = None
+   if oArgs.salida:
+      try:
+         oSink = ResultSink(oArgs.salida, oArgs.formato, bRecordAllStates, oArgs.reanudar)
+      except OSError as e:
+         print(f"ERROR   - No se pudo abrir el archivo de resultados: {e}")
+   else:
+      print("WARNING - OUTPUT_FILE no está definido: los resultados solo se mostrarán por consola")
+
+   # ==========================================
+   # INICIO DEL ESCANEO
+   # ==========================================
+   try:
+      oScanner = Scanner(oArgs.objetivos, oPorts, oOptions, oSink, fnOnStatus=fPrintStatus)
+   except (ValueError, OSError) as e:
+      print(f"ERROR   - Objetivos no válidos ({oArgs.objetivos}): {e}")
+      if oSink is not None:
+         oSink.fClose()
+      return
+
+   print(f"\nINFO    - Iniciando escaneo de {oArgs.objetivos} ({len(oScanner.lTargets)} hosts, {len(oPorts)} puertos: {oPorts})")
+   print(f"INFO    - Concurrencia máxima: {oScanner.iConcurrency} conexiones ({oScanner.iPerHost} por host) "
+         f"en {oScanner.iProcesses} proceso/s")
+   sModoTimeout = (f"adaptativo ({oOptions.fMinTimeout}-{oOptions.fTimeout} s)" if oOptions.bAdaptiveTimeout
+                   else f"fijo ({oOptions.fTimeout} s)")
+   print(f"INFO    - Tiempo de espera: {sModoTimeout}, reintentos: {oOptions.iMaxRetries}")
+   sModoTasa = ("sin límite" if oOptions.fMaxRate <= 0
+                else f"máximo {oOptions.fMaxRate:.0f} conexiones/s" + (" con AIMD" if oOptions.bCongestionControl else ""))
+   print(f"INFO    - Tasa: {sModoTasa}")
+   if oSink is not None and oSink.setDone:
+      print(f"INFO    - Reanudando: {len(oSink.setDone)} pares (host, puerto) ya escaneados se omitirán")
+   dtInicio = datetime.now()
+   print(f"INFO    - Inicio: {dtInicio.strftime('%Y-%m-%d %H:%M:%S')}\n")
+
+   cStates = oScanner.cStates
+   try:
+      if oSink is not None:
+         oSink.fWriteText(f"Escaneo de {oArgs.objetivos}\nInicio: {dtInicio}\n\n")
+      asyncio.run(fScanConsole(oScanner))
+   except KeyboardInterrupt:
+      print("\nWARNING - Escaneo interrumpido: los resultados ya obtenidos están guardados")
+   finally:
+      # Fin del escaneo
+      dtFin = datetime.now()
+      tdDuracion = dtFin - dtInicio
+      iTotalPorts = sum(cStates.values())
+      fPortsPerSecond = iTotalPorts / max(tdDuracion.total_seconds(), 1e-6)
+
+      print(f"\nINFO    - Escaneo finalizado: {dtFin.strftime('%Y-%m-%d %H:%M:%S')}")
+      print(f"INFO    - Duración total: {tdDuracion}")
+      print(f"INFO    - Velocidad: {fPortsPerSecond:.0f} puertos/s ({iTotalPorts} puertos)")
+      print(f"INFO    - Estados: {cStates['abierto']} abiertos, {cStates['cerrado']} cerrados, {cStates['filtrado']} filtrados")
+      print(f"INFO    - Hosts con puertos abiertos: {len(oScanner.cOpenPorts)}")
+
+      # ==========================================
+      # CERRAR EL ARCHIVO DE RESULTADOS
+      # ==========================================
+      if oSink is not None:
+         oSink.fWriteText(f"\nFin: {dtFin}\nDuración: {tdDuracion}\nVelocidad: {fPortsPerSecond:.0f} puertos/s\n")
+         oSink.fClose()
+         print(f"\nINFO    - Resultados guardados en: {oSink.sPath}")
+
+
+# Punto de entrada del script
+if __name__ == "__main__":
+   main()